@@ -0,0 +1,27 @@
+"""Add indexes for foreign keys and per-user date lookups."""
+
+from alembic import op
+
+
+revision = "0004_add_foreign_key_indexes"
+down_revision = "0003_add_reviewer_metrics"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_departments_admin_id", "departments", ["admin_id"])
+    op.create_index("ix_jobs_department_id", "jobs", ["department_id"])
+    op.create_index("ix_jobs_reviewer_id", "jobs", ["reviewer_id"])
+    op.create_index("ix_users_job_id", "users", ["job_id"])
+    op.create_index("ix_tasks_user_id_date", "tasks", ["user_id", "date"])
+    op.create_index("ix_statistics_user_id_date", "statistics", ["user_id", "date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_statistics_user_id_date", table_name="statistics")
+    op.drop_index("ix_tasks_user_id_date", table_name="tasks")
+    op.drop_index("ix_users_job_id", table_name="users")
+    op.drop_index("ix_jobs_reviewer_id", table_name="jobs")
+    op.drop_index("ix_jobs_department_id", table_name="jobs")
+    op.drop_index("ix_departments_admin_id", table_name="departments")
@@ -0,0 +1,56 @@
+"""Denormalize department_id/admin_id onto users, tasks and statistics."""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_denormalize_tenant_columns"
+down_revision = "0004_add_foreign_key_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("users", "tasks", "statistics"):
+        op.add_column(table, sa.Column("department_id", sa.Integer(), nullable=True))
+        op.add_column(table, sa.Column("admin_id", sa.Integer(), nullable=True))
+
+    op.execute(
+        """
+        UPDATE users SET
+            department_id = (SELECT jobs.department_id FROM jobs WHERE jobs.id = users.job_id),
+            admin_id = (
+                SELECT departments.admin_id FROM jobs
+                JOIN departments ON departments.id = jobs.department_id
+                WHERE jobs.id = users.job_id
+            )
+        """
+    )
+    for table in ("tasks", "statistics"):
+        op.execute(
+            f"""
+            UPDATE {table} SET
+                department_id = (SELECT users.department_id FROM users WHERE users.id = {table}.user_id),
+                admin_id = (SELECT users.admin_id FROM users WHERE users.id = {table}.user_id)
+            """
+        )
+
+    for table in ("users", "tasks", "statistics"):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column("department_id", existing_type=sa.Integer(), nullable=False)
+            batch_op.alter_column("admin_id", existing_type=sa.Integer(), nullable=False)
+
+    op.create_index("ix_users_admin_id", "users", ["admin_id"])
+    op.create_index("ix_tasks_admin_id_date", "tasks", ["admin_id", "date"])
+    op.create_index("ix_statistics_admin_id_date", "statistics", ["admin_id", "date"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_statistics_admin_id_date", table_name="statistics")
+    op.drop_index("ix_tasks_admin_id_date", table_name="tasks")
+    op.drop_index("ix_users_admin_id", table_name="users")
+
+    for table in ("statistics", "tasks", "users"):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column("admin_id")
+            batch_op.drop_column("department_id")
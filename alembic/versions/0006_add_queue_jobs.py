@@ -0,0 +1,40 @@
+"""Add queue_jobs table for the DB-backed background job queue."""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006_add_queue_jobs"
+down_revision = "0005_denormalize_tenant_columns"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "queue_jobs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(), nullable=False),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("lease_expires_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("admin_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_queue_jobs_admin_id", "queue_jobs", ["admin_id"])
+    op.create_index("ix_queue_jobs_status_run_at", "queue_jobs", ["status", "run_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_queue_jobs_status_run_at", table_name="queue_jobs")
+    op.drop_index("ix_queue_jobs_admin_id", table_name="queue_jobs")
+    op.drop_table("queue_jobs")
@@ -0,0 +1,30 @@
+"""Add maintained jobs_count/employees_count counters to departments."""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_department_counters"
+down_revision = "0006_add_queue_jobs"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("departments") as batch_op:
+        batch_op.add_column(sa.Column("jobs_count", sa.Integer(), nullable=False, server_default="0"))
+        batch_op.add_column(sa.Column("employees_count", sa.Integer(), nullable=False, server_default="0"))
+
+    op.execute(
+        """
+        UPDATE departments SET
+            jobs_count = (SELECT COUNT(*) FROM jobs WHERE jobs.department_id = departments.id),
+            employees_count = (SELECT COUNT(*) FROM users WHERE users.department_id = departments.id)
+        """
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("departments") as batch_op:
+        batch_op.drop_column("employees_count")
+        batch_op.drop_column("jobs_count")
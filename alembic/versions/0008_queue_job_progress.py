@@ -0,0 +1,20 @@
+"""Add progress column to queue_jobs."""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008_queue_job_progress"
+down_revision = "0007_department_counters"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("queue_jobs") as batch_op:
+        batch_op.add_column(sa.Column("progress", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("queue_jobs") as batch_op:
+        batch_op.drop_column("progress")
@@ -0,0 +1,65 @@
+"""Add weekly/monthly statistic_rollups and backfill them from statistics."""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_statistic_rollups"
+down_revision = "0008_queue_job_progress"
+branch_labels = None
+depends_on = None
+
+
+# Начало недели (понедельник) и месяца; должно совпадать с period_start в
+# app/services/statistics_aggregate.py
+_BUCKETS = {
+    "sqlite": {"week": "date(date, 'weekday 0', '-6 days')", "month": "strftime('%Y-%m-01', date)"},
+    "postgresql": {"week": "CAST(date_trunc('week', date) AS DATE)", "month": "CAST(date_trunc('month', date) AS DATE)"},
+    "mysql": {"week": "SUBDATE(date, WEEKDAY(date))", "month": "CAST(DATE_FORMAT(date, '%Y-%m-01') AS DATE)"},
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        "statistic_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("period", sa.String(), nullable=False),
+        sa.Column("bucket_start", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("department_id", sa.Integer(), nullable=False),
+        sa.Column("admin_id", sa.Integer(), nullable=False),
+        sa.Column("value_count", sa.Integer(), nullable=False),
+        sa.Column("value_sum", sa.Integer(), nullable=False),
+        sa.Column("value_min", sa.Integer(), nullable=False),
+        sa.Column("value_max", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], name="fk_statistic_rollups_user_id_users", ondelete="CASCADE"
+        ),
+        sa.UniqueConstraint("period", "bucket_start", "user_id", name="uq_statistic_rollups_bucket_user"),
+    )
+    op.create_index("ix_statistic_rollups_user_id", "statistic_rollups", ["user_id"])
+    op.create_index(
+        "ix_statistic_rollups_admin_id_period_bucket", "statistic_rollups", ["admin_id", "period", "bucket_start"]
+    )
+
+    dialect = op.get_bind().dialect.name
+    buckets = _BUCKETS["mysql" if dialect == "mariadb" else dialect]
+    for period, bucket in buckets.items():
+        op.execute(
+            f"""
+            INSERT INTO statistic_rollups (
+                period, bucket_start, user_id, department_id, admin_id,
+                value_count, value_sum, value_min, value_max
+            )
+            SELECT '{period}', {bucket}, user_id, department_id, admin_id,
+                COUNT(value), SUM(value), MIN(value), MAX(value)
+            FROM statistics
+            GROUP BY {bucket}, user_id, department_id, admin_id
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_statistic_rollups_admin_id_period_bucket", table_name="statistic_rollups")
+    op.drop_index("ix_statistic_rollups_user_id", table_name="statistic_rollups")
+    op.drop_table("statistic_rollups")
@@ -0,0 +1,30 @@
+"""Add deleting markers to departments/jobs/users and dedupe_key to queue_jobs."""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010_delete_markers"
+down_revision = "0009_statistic_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ("departments", "jobs", "users"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column("deleting", sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    with op.batch_alter_table("queue_jobs") as batch_op:
+        batch_op.add_column(sa.Column("dedupe_key", sa.String(), nullable=True))
+    op.create_index("ix_queue_jobs_dedupe_key", "queue_jobs", ["dedupe_key"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_queue_jobs_dedupe_key", table_name="queue_jobs")
+    with op.batch_alter_table("queue_jobs") as batch_op:
+        batch_op.drop_column("dedupe_key")
+
+    for table in ("users", "jobs", "departments"):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("deleting")
@@ -1,31 +1,70 @@
-from fastapi import Depends, Header, HTTPException, status
+import time
+
+from fastapi import Header, HTTPException, status
 from sqlalchemy.orm import Session
 
+from app.core.cache import TTLCache
+from app.core.config import get_settings
 from app.core.security import verify_password, decode_access_token
-from app.db.session import get_db
+from app.db.session import open_db, run_db
 from app.models import Admin as AdminModel
 
 
-def _get_admin_by_id(admin_id: int, db: Session) -> AdminModel:
+_settings = get_settings()
+
+# Кэш ключуется по id администратора (sub), а срок жизни записи не превышает exp токена.
+# Подпись и срок действия самого токена проверяются на каждом запросе.
+admin_cache = TTLCache(
+    maxsize=_settings.admin_cache_max_size if _settings.admin_cache_ttl_seconds > 0 else 0,
+    ttl=_settings.admin_cache_ttl_seconds,
+)
+
+
+def invalidate_admin_cache(admin_id: int) -> None:
+    admin_cache.invalidate(admin_id)
+
+
+def _get_admin_by_id(db: Session, admin_id: int) -> AdminModel:
     admin = db.query(AdminModel).get(admin_id)
     if not admin:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Admin not found")
     return admin
 
 
-def _resolve_admin_from_token(token: str, db: Session) -> AdminModel:
+async def _resolve_admin_from_token(token: str) -> AdminModel:
     try:
         payload = decode_access_token(token)
         admin_id = int(payload.get("sub"))
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token") from exc
 
-    return _get_admin_by_id(admin_id, db)
+    cached = admin_cache.get(admin_id)
+    if cached is not None:
+        # Отдаём отсоединённую копию, чтобы объекты не разделялись между сессиями
+        return AdminModel(**cached)
+
+    # Сессия открывается только при промахе кэша, чтобы не занимать соединение пула зря
+    async with open_db() as db:
+        admin = await run_db(db, _get_admin_by_id, admin_id)
+    ttl = admin_cache.ttl
+    if payload.get("exp") is not None:
+        ttl = min(ttl, float(payload["exp"]) - time.time())
+    if ttl > 0:
+        admin_cache.set(
+            admin_id,
+            {
+                "id": admin.id,
+                "email": admin.email,
+                "full_name": admin.full_name,
+                "password_hash": admin.password_hash,
+            },
+            ttl=ttl,
+        )
+    return admin
 
 
-def require_admin(
+async def require_admin(
     authorization: str | None = Header(None, alias="Authorization"),
-    db: Session = Depends(get_db),
 ) -> AdminModel:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(
@@ -33,14 +72,13 @@ def require_admin(
             detail="Authorization header with Bearer token is required",
         )
     token = authorization.split(" ", 1)[1]
-    return _resolve_admin_from_token(token, db)
+    return await _resolve_admin_from_token(token)
 
 
-def optional_admin(
+async def optional_admin(
     authorization: str | None = Header(None, alias="Authorization"),
-    db: Session = Depends(get_db),
 ) -> AdminModel | None:
     if not authorization or not authorization.lower().startswith("bearer "):
         return None
     token = authorization.split(" ", 1)[1]
-    return _resolve_admin_from_token(token, db)
+    return await _resolve_admin_from_token(token)
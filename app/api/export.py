@@ -0,0 +1,74 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import Callable, Iterator, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+from app.db.session import open_read_session
+
+
+EXPORT_BATCH_SIZE = 1000
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
+
+
+def _ndjson_lines(rows: Iterator, fields: Sequence[str]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(dict(zip(fields, row)), ensure_ascii=False, default=str) + "\n"
+
+
+def _csv_lines(rows: Iterator, fields: Sequence[str]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_export(
+    build_query: Callable[[Session], Query],
+    fields: Sequence[str],
+    export_format: ExportFormat,
+    filename: str,
+    sticky_key: Optional[str] = None,
+) -> StreamingResponse:
+    """Отдаёт выборку построчно, читая её серверным курсором пачками по EXPORT_BATCH_SIZE.
+
+    Сессия открывается внутри генератора: она должна жить столько же, сколько ответ,
+    а не столько, сколько зависимость get_db. sticky_key (см. get_sticky_key) направляет
+    экспорт сразу после записи в основную БД, как и get_read_db.
+    """
+    serialize = _csv_lines if export_format == ExportFormat.csv else _ndjson_lines
+
+    def body() -> Iterator[str]:
+        with open_read_session(sticky_key) as db:
+            rows = build_query(db).execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE)
+            chunk = []
+            for line in serialize(iter(rows), fields):
+                chunk.append(line)
+                if len(chunk) >= EXPORT_BATCH_SIZE:
+                    yield "".join(chunk)
+                    chunk = []
+            if chunk:
+                yield "".join(chunk)
+
+    return StreamingResponse(
+        body(),
+        media_type=_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{export_format.value}"'},
+    )
@@ -0,0 +1,109 @@
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Query, Session, contains_eager
+
+from app.models import (
+    Admin as AdminModel,
+    Department as DepartmentModel,
+    Job as JobModel,
+    QueueJob as QueueJobModel,
+    Statistic as StatisticModel,
+    Task as TaskModel,
+    User as UserModel,
+)
+
+
+# Все выборки ограничены владельцем одним запросом, без ленивой подгрузки цепочки
+# task.user.job.department: users, tasks и statistics фильтруются по денормализованному admin_id.
+# Отделы, должности и сотрудники, чьё поддерево удаляется в очереди (deleting), не видны никому,
+# кроме самого DELETE (include_deleting=True): он возвращает уже поставленную задачу.
+
+
+def owned_jobs_query(db: Session, current_admin: AdminModel, include_deleting: bool = False) -> Query:
+    query = (
+        db.query(JobModel)
+        .join(JobModel.department)
+        .options(contains_eager(JobModel.department))
+        .filter(DepartmentModel.admin_id == current_admin.id)
+    )
+    return query if include_deleting else query.filter(JobModel.deleting.is_(False))
+
+
+def owned_users_query(db: Session, current_admin: AdminModel, include_deleting: bool = False) -> Query:
+    query = db.query(UserModel).filter(UserModel.admin_id == current_admin.id)
+    return query if include_deleting else query.filter(UserModel.deleting.is_(False))
+
+
+def owned_tasks_query(db: Session, current_admin: AdminModel) -> Query:
+    return db.query(TaskModel).filter(TaskModel.admin_id == current_admin.id)
+
+
+def owned_statistics_query(db: Session, current_admin: AdminModel) -> Query:
+    return db.query(StatisticModel).filter(StatisticModel.admin_id == current_admin.id)
+
+
+def get_owned_department(
+    db: Session, department_id: int, current_admin: AdminModel, include_deleting: bool = False
+) -> DepartmentModel:
+    query = db.query(DepartmentModel).filter(
+        DepartmentModel.id == department_id, DepartmentModel.admin_id == current_admin.id
+    )
+    if not include_deleting:
+        query = query.filter(DepartmentModel.deleting.is_(False))
+    department = query.first()
+    if not department:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Department not found")
+    return department
+
+
+def get_owned_job(db: Session, job_id: int, current_admin: AdminModel, include_deleting: bool = False) -> JobModel:
+    job = owned_jobs_query(db, current_admin, include_deleting).filter(JobModel.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+def get_owned_user(db: Session, user_id: int, current_admin: AdminModel, include_deleting: bool = False) -> UserModel:
+    user = owned_users_query(db, current_admin, include_deleting).filter(UserModel.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return user
+
+
+def get_owned_task(db: Session, task_id: int, current_admin: AdminModel) -> TaskModel:
+    task = owned_tasks_query(db, current_admin).filter(TaskModel.id == task_id).first()
+    if not task:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+    return task
+
+
+def get_owned_statistic(db: Session, statistic_id: int, current_admin: AdminModel) -> StatisticModel:
+    statistic = owned_statistics_query(db, current_admin).filter(StatisticModel.id == statistic_id).first()
+    if not statistic:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Statistic not found")
+    return statistic
+
+
+def get_owned_queue_job(db: Session, job_id: int, current_admin: AdminModel) -> QueueJobModel:
+    job = (
+        db.query(QueueJobModel)
+        .filter(QueueJobModel.id == job_id, QueueJobModel.admin_id == current_admin.id)
+        .first()
+    )
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Queue job not found")
+    return job
+
+
+def apply_row_filters(query: Query, model, filters) -> Query:
+    """Фильтры списков задач/статистики; query должен быть построен через owned_*_query."""
+    if filters.user_id is not None:
+        query = query.filter(model.user_id == filters.user_id)
+    if filters.job_id is not None:
+        query = query.join(model.user).filter(UserModel.job_id == filters.job_id)
+    if filters.department_id is not None:
+        query = query.filter(model.department_id == filters.department_id)
+    if filters.date_from is not None:
+        query = query.filter(model.date >= filters.date_from)
+    if filters.date_to is not None:
+        query = query.filter(model.date <= filters.date_to)
+    return query
@@ -0,0 +1,90 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+import json
+from typing import Any, List, Sequence
+
+from fastapi import HTTPException, Query, Response, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query as OrmQuery
+
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """Параметры страницы; без limit и cursor список отдаётся целиком, как до пагинации."""
+
+    def __init__(
+        self,
+        cursor: str | None = Query(None, description=f"Значение заголовка {NEXT_CURSOR_HEADER} из предыдущего ответа"),
+        limit: int | None = Query(
+            None, ge=1, le=MAX_PAGE_SIZE, description=f"Размер страницы (с cursor по умолчанию {DEFAULT_PAGE_SIZE})"
+        ),
+    ) -> None:
+        self.cursor = cursor
+        self.limit = DEFAULT_PAGE_SIZE if limit is None and cursor else limit
+
+
+class RowFilters:
+    def __init__(
+        self,
+        user_id: int | None = None,
+        job_id: int | None = None,
+        department_id: int | None = None,
+        date_from: date | None = None,
+        date_to: date | None = None,
+    ) -> None:
+        self.user_id = user_id
+        self.job_id = job_id
+        self.department_id = department_id
+        self.date_from = date_from
+        self.date_to = date_to
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, date) else value for value in values])
+    return urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence[Any]) -> List[Any]:
+    try:
+        raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Cursor length mismatch")
+        result = []
+        for column, value in zip(columns, values):
+            python_type = column.type.python_type
+            result.append(python_type.fromisoformat(value) if python_type is date else python_type(value))
+        return result
+    except Exception as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def _after(columns: Sequence[Any], values: Sequence[Any]):
+    # (a, b) > (x, y)  ->  a > x OR (a = x AND b > y); раскрываем вручную ради переносимости
+    clauses = []
+    for index, column in enumerate(columns):
+        equal = [columns[i] == values[i] for i in range(index)]
+        clauses.append(and_(*equal, column > values[index]))
+    return or_(*clauses)
+
+
+def paginate(query: OrmQuery, columns: Sequence[Any], page: PageParams, response: Response) -> list:
+    """Keyset-пагинация по columns (последняя колонка должна быть уникальной, обычно id).
+
+    Курсор следующей страницы отдаётся в заголовке X-Next-Cursor; его отсутствие означает конец выборки.
+    Без limit и cursor возвращается вся выборка в том же порядке.
+    """
+    if page.limit is None:
+        return query.order_by(*columns).all()
+    if page.cursor:
+        query = query.filter(_after(columns, decode_cursor(page.cursor, columns)))
+    rows = query.order_by(*columns).limit(page.limit + 1).all()
+    if len(rows) > page.limit:
+        rows = rows[: page.limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(last, column.key) for column in columns])
+    return rows
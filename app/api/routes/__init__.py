@@ -1,6 +1,18 @@
 from fastapi import APIRouter
 
-from app.api.routes import admins, departments, jobs, users, tasks, statistics, reviewers, auth
+from app.api.routes import (
+    admins,
+    departments,
+    jobs,
+    users,
+    tasks,
+    statistics,
+    reviewers,
+    auth,
+    metrics,
+    jobs_queue,
+    imports,
+)
 
 
 router = APIRouter()
@@ -13,3 +25,6 @@ router.include_router(users.router, prefix="/users", tags=["users"], include_in_
 router.include_router(reviewers.router, prefix="/reviewers", tags=["reviewers"], include_in_schema=True)
 router.include_router(tasks.router, prefix="/tasks", tags=["tasks"], include_in_schema=True)
 router.include_router(statistics.router, prefix="/statistics", tags=["statistics"], include_in_schema=True)
+router.include_router(metrics.router, prefix="/metrics", tags=["metrics"], include_in_schema=True)
+router.include_router(jobs_queue.router, prefix="/jobs-queue", tags=["jobs-queue"], include_in_schema=True)
+router.include_router(imports.router, prefix="/imports", tags=["imports"], include_in_schema=True)
@@ -3,42 +3,28 @@ from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
-from app.api.dependencies import optional_admin, require_admin
+from app.api.dependencies import invalidate_admin_cache, optional_admin, require_admin
 from app.api.schemas.admin import Admin, AdminCreate, AdminUpdate
 from app.core.security import hash_password
-from app.db.session import get_db
+from app.db.session import DbSession, get_db, run_db
 from app.models import Admin as AdminModel
 
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[Admin])
-def list_admins(
-    db: Session = Depends(get_db),
-    current_admin=Depends(require_admin),
-) -> List[Admin]:
+def _list_admins(db: Session) -> List[AdminModel]:
     return db.query(AdminModel).all()
 
 
-@router.get("/{admin_id}", response_model=Admin)
-def get_admin(
-    admin_id: int,
-    db: Session = Depends(get_db),
-    current_admin=Depends(require_admin),
-) -> Admin:
+def _get_admin(db: Session, admin_id: int) -> AdminModel:
     admin = db.query(AdminModel).get(admin_id)
     if not admin:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin not found")
     return admin
 
 
-@router.post("", response_model=Admin, status_code=status.HTTP_201_CREATED)
-def create_admin(
-    payload: AdminCreate,
-    db: Session = Depends(get_db),
-    current_admin=Depends(optional_admin),
-) -> Admin:
+def _create_admin(db: Session, payload: AdminCreate, current_admin: AdminModel | None) -> AdminModel:
     existing = db.query(AdminModel).filter(AdminModel.email == payload.email).first()
     if existing:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Admin with this email already exists")
@@ -58,16 +44,8 @@ def create_admin(
     return admin
 
 
-@router.put("/{admin_id}", response_model=Admin)
-def update_admin(
-    admin_id: int,
-    payload: AdminUpdate,
-    db: Session = Depends(get_db),
-    current_admin=Depends(require_admin),
-) -> Admin:
-    admin = db.query(AdminModel).get(admin_id)
-    if not admin:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin not found")
+def _update_admin(db: Session, admin_id: int, payload: AdminUpdate) -> AdminModel:
+    admin = _get_admin(db, admin_id)
 
     update_data = payload.dict(exclude_unset=True)
     if "full_name" in update_data and update_data["full_name"] is not None:
@@ -77,18 +55,12 @@ def update_admin(
 
     db.commit()
     db.refresh(admin)
+    invalidate_admin_cache(admin.id)
     return admin
 
 
-@router.delete("/{admin_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_admin(
-    admin_id: int,
-    db: Session = Depends(get_db),
-    current_admin=Depends(require_admin),
-) -> None:
-    admin = db.query(AdminModel).get(admin_id)
-    if not admin:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin not found")
+def _delete_admin(db: Session, admin_id: int) -> None:
+    admin = _get_admin(db, admin_id)
 
     if admin.departments:
         raise HTTPException(
@@ -98,3 +70,49 @@ def delete_admin(
 
     db.delete(admin)
     db.commit()
+    invalidate_admin_cache(admin_id)
+
+
+@router.get("", response_model=List[Admin])
+async def list_admins(
+    db: DbSession = Depends(get_db),
+    current_admin=Depends(require_admin),
+) -> List[Admin]:
+    return await run_db(db, _list_admins)
+
+
+@router.get("/{admin_id}", response_model=Admin)
+async def get_admin(
+    admin_id: int,
+    db: DbSession = Depends(get_db),
+    current_admin=Depends(require_admin),
+) -> Admin:
+    return await run_db(db, _get_admin, admin_id)
+
+
+@router.post("", response_model=Admin, status_code=status.HTTP_201_CREATED)
+async def create_admin(
+    payload: AdminCreate,
+    db: DbSession = Depends(get_db),
+    current_admin=Depends(optional_admin),
+) -> Admin:
+    return await run_db(db, _create_admin, payload, current_admin)
+
+
+@router.put("/{admin_id}", response_model=Admin)
+async def update_admin(
+    admin_id: int,
+    payload: AdminUpdate,
+    db: DbSession = Depends(get_db),
+    current_admin=Depends(require_admin),
+) -> Admin:
+    return await run_db(db, _update_admin, admin_id, payload)
+
+
+@router.delete("/{admin_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_admin(
+    admin_id: int,
+    db: DbSession = Depends(get_db),
+    current_admin=Depends(require_admin),
+) -> None:
+    await run_db(db, _delete_admin, admin_id)
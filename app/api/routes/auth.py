@@ -4,16 +4,20 @@ from sqlalchemy.orm import Session
 
 from app.api.schemas.admin import AdminLoginRequest, TokenResponse
 from app.core.security import verify_password, create_access_token
-from app.db.session import get_db
+from app.db.session import DbSession, get_db, run_db
 from app.models import Admin as AdminModel
 
 
 router = APIRouter()
 
 
+def _find_admin(db: Session, email: str) -> AdminModel | None:
+    return db.query(AdminModel).filter(AdminModel.email == email).first()
+
+
 @router.post("/login", response_model=TokenResponse)
-def login(payload: AdminLoginRequest, db: Session = Depends(get_db)) -> TokenResponse:
-    admin = db.query(AdminModel).filter(AdminModel.email == payload.email).first()
+async def login(payload: AdminLoginRequest, db: DbSession = Depends(get_db)) -> TokenResponse:
+    admin = await run_db(db, _find_admin, payload.email)
     if not admin or not verify_password(payload.password, admin.password_hash):
         return JSONResponse(
             status_code=status.HTTP_400_BAD_REQUEST,
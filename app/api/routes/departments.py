@@ -1,139 +1,124 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import require_admin
+from app.api.ownership import get_owned_department
+from app.api.routes.jobs_queue import job_accepted_response
 from app.api.schemas.department import Department, DepartmentCreate, DepartmentUpdate
-from app.db.session import get_db
+from app.db.session import DbSession, get_db, get_read_db, run_db
 from app.models import (
     Department as DepartmentModel,
     Admin as AdminModel,
-    Job as JobModel,
-    User as UserModel,
+    QueueJob as QueueJobModel,
 )
+from app.services.cascade_delete import delete_subtree_or_enqueue
 
 
 router = APIRouter()
 
 
-def _to_department_response(
-    department: DepartmentModel, employees_count: int, jobs_count: int, admin: AdminModel
-) -> Department:
+def _to_department_response(department: DepartmentModel, admin: AdminModel) -> Department:
     return Department(
         id=department.id,
         name=department.name,
         admin_id=department.admin_id,
         admin_name=admin.full_name,
-        employees_count=employees_count,
-        jobs_count=jobs_count,
+        employees_count=department.employees_count,
+        jobs_count=department.jobs_count,
     )
 
 
-def _get_department_with_counts(
+def _get_department_response(
     db: Session, department_id: int, current_admin: AdminModel
-) -> tuple[DepartmentModel, int, int] | None:
-    return (
-        db.query(
-            DepartmentModel,
-            func.count(UserModel.id).label("employees_count"),
-            func.count(func.distinct(JobModel.id)).label("jobs_count"),
-        )
-        .outerjoin(JobModel, JobModel.department_id == DepartmentModel.id)
-        .outerjoin(UserModel, UserModel.job_id == JobModel.id)
-        .filter(DepartmentModel.id == department_id, DepartmentModel.admin_id == current_admin.id)
-        .group_by(DepartmentModel.id)
-        .first()
+) -> Department:
+    department = get_owned_department(db, department_id, current_admin)
+    return _to_department_response(department, current_admin)
+
+
+def _list_departments(db: Session, current_admin: AdminModel) -> List[Department]:
+    # Счётчики хранятся в самой строке отдела (app/services/department_counters.py),
+    # поэтому список читается по индексу admin_id без JOIN и GROUP BY
+    departments = (
+        db.query(DepartmentModel)
+        .filter(DepartmentModel.admin_id == current_admin.id, DepartmentModel.deleting.is_(False))
+        .order_by(DepartmentModel.id)
+        .all()
     )
+    return [_to_department_response(department, current_admin) for department in departments]
 
 
-def _get_department_response(
-    db: Session, department_id: int, current_admin: AdminModel
+def _create_department(db: Session, payload: DepartmentCreate, current_admin: AdminModel) -> Department:
+    department = DepartmentModel(**payload.dict(), admin_id=current_admin.id)
+    db.add(department)
+    db.commit()
+    db.refresh(department)
+    return _to_department_response(department, current_admin)
+
+
+def _update_department(
+    db: Session, department_id: int, payload: DepartmentUpdate, current_admin: AdminModel
 ) -> Department:
-    result = _get_department_with_counts(db, department_id, current_admin)
-    if not result:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Department not found")
-    department, employees_count, jobs_count = result
-    return _to_department_response(department, employees_count, jobs_count, current_admin)
+    department = get_owned_department(db, department_id, current_admin)
+
+    for field, value in payload.dict().items():
+        setattr(department, field, value)
+
+    db.commit()
+    db.refresh(department)
+    return _to_department_response(department, current_admin)
+
+
+def _delete_department(db: Session, department_id: int, current_admin: AdminModel) -> QueueJobModel | None:
+    get_owned_department(db, department_id, current_admin, include_deleting=True)
+    return delete_subtree_or_enqueue(db, "department", department_id, current_admin.id)
 
 
 @router.get("", response_model=List[Department])
-def list_departments(
-    db: Session = Depends(get_db),
+async def list_departments(
+    db: DbSession = Depends(get_read_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> List[Department]:
-    departments = (
-        db.query(
-            DepartmentModel,
-            func.count(UserModel.id).label("employees_count"),
-            func.count(func.distinct(JobModel.id)).label("jobs_count"),
-        )
-        .outerjoin(JobModel, JobModel.department_id == DepartmentModel.id)
-        .outerjoin(UserModel, UserModel.job_id == JobModel.id)
-        .filter(DepartmentModel.admin_id == current_admin.id)
-        .group_by(DepartmentModel.id)
-        .all()
-    )
-    return [
-        _to_department_response(department, employees_count, jobs_count, current_admin)
-        for department, employees_count, jobs_count in departments
-    ]
+    return await run_db(db, _list_departments, current_admin)
 
 
 @router.get("/{department_id}", response_model=Department)
-def get_department(
+async def get_department(
     department_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Department:
-    return _get_department_response(db, department_id, current_admin)
+    return await run_db(db, _get_department_response, department_id, current_admin)
 
 
 @router.post("", response_model=Department, status_code=status.HTTP_201_CREATED)
-def create_department(
+async def create_department(
     payload: DepartmentCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Department:
-    department = DepartmentModel(**payload.dict(), admin_id=current_admin.id)
-    db.add(department)
-    db.commit()
-    db.refresh(department)
-    # Reuse the same response shape with aggregated employees count
-    return _get_department_response(db, department.id, current_admin)
+    return await run_db(db, _create_department, payload, current_admin)
 
 
 @router.put("/{department_id}", response_model=Department)
-def update_department(
+async def update_department(
     department_id: int,
     payload: DepartmentUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Department:
-    department_with_count = _get_department_with_counts(db, department_id, current_admin)
-    if not department_with_count:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Department not found")
-
-    department, _, _ = department_with_count
-
-    for field, value in payload.dict().items():
-        setattr(department, field, value)
-
-    db.commit()
-    db.refresh(department)
-    return _get_department_response(db, department.id, current_admin)
+    return await run_db(db, _update_department, department_id, payload, current_admin)
 
 
 @router.delete("/{department_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_department(
+async def delete_department(
     department_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
-) -> None:
-    department = db.query(DepartmentModel).get(department_id)
-    if not department or department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Department not found")
-
-    db.delete(department)
-    db.commit()
+):
+    # Большое поддерево удаляется в очереди: 202 и ссылка на статус задачи
+    job = await run_db(db, _delete_department, department_id, current_admin)
+    if job is not None:
+        return job_accepted_response(job)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,85 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.api.dependencies import require_admin
+from app.api.routes.jobs_queue import job_accepted_response
+from app.api.schemas.data_import import ImportResult
+from app.api.schemas.queue_job import QueueJobAccepted
+from app.core.config import get_settings
+from app.db.session import DbSession, get_db, run_db
+from app.models import Admin as AdminModel
+from app.services.data_import import (
+    ImportFileError,
+    ImportFormat,
+    ImportKind,
+    ImportTooLargeError,
+    run_import_async,
+    spool_upload,
+)
+from app.services.job_queue import enqueue
+
+
+router = APIRouter()
+
+_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "text/csv": {"schema": {"type": "string", "format": "binary"}},
+            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": {
+                "schema": {"type": "string", "format": "binary"}
+            },
+        },
+    }
+}
+
+
+@router.post(
+    "/{kind}",
+    response_model=ImportResult,
+    responses={202: {"model": QueueJobAccepted}},
+    openapi_extra=_UPLOAD_BODY,
+)
+async def import_rows(
+    kind: ImportKind,
+    request: Request,
+    format: ImportFormat = ImportFormat.csv,
+    db: DbSession = Depends(get_db),
+    current_admin: AdminModel = Depends(require_admin),
+):
+    """Импорт файла из тела запроса (не multipart): CSV в UTF-8 или XLSX, первая строка — заголовок.
+
+    Колонки: users — name, job (или job_id), необязательная department для неоднозначных должностей;
+    tasks — user (или user_id), date, description; statistics — user (или user_id), date, value (upsert).
+    Файлы больше IMPORT_SYNC_MAX_BYTES импортируются в очереди: 202 и отчёт в /api/jobs-queue/{id}.
+    """
+    try:
+        path, size = await spool_upload(request.stream(), format)
+    except ImportTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc))
+
+    if size > get_settings().import_sync_max_bytes:
+        # Дальше файлом владеет задача: его удалит cleanup обработчика import_rows
+        try:
+            job = await run_db(
+                db,
+                enqueue,
+                "import_rows",
+                {"kind": kind.value, "format": format.value, "path": path, "admin_id": current_admin.id},
+                admin_id=current_admin.id,
+                # Повтор после частично записанного импорта задублировал бы задачи и сотрудников
+                max_attempts=1,
+            )
+        except BaseException:
+            os.remove(path)
+            raise
+        return job_accepted_response(job)
+
+    try:
+        report = await run_import_async(db, kind, format, path, current_admin.id)
+    except ImportFileError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    finally:
+        os.remove(path)
+    return report.as_dict()
@@ -1,15 +1,20 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import require_admin
+from app.api.ownership import get_owned_department, get_owned_job, owned_jobs_query
+from app.api.routes.jobs_queue import job_accepted_response
 from app.api.schemas.job import Job, JobCreate, JobUpdate
-from app.db.session import get_db
+from app.db.session import DbSession, get_db, run_db
+from app.services.cascade_delete import delete_subtree_or_enqueue
+from app.services.department_counters import adjust_department_counters, count_job_employees
+from app.services.tenancy import propagate_job_tenant
 from app.models import (
     Job as JobModel,
-    Department as DepartmentModel,
     Admin as AdminModel,
+    QueueJob as QueueJobModel,
     Reviewer as ReviewerModel,
 )
 
@@ -17,17 +22,6 @@ from app.models import (
 router = APIRouter()
 
 
-def _ensure_department_access(department: DepartmentModel | None, current_admin: AdminModel) -> None:
-    if not department or department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Department not found")
-
-
-def _ensure_job_access(job: JobModel | None, current_admin: AdminModel) -> JobModel:
-    if not job or job.department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
-    return job
-
-
 def _ensure_reviewer_exists(db: Session, reviewer_id: int | None) -> None:
     if reviewer_id is None:
         return
@@ -36,77 +30,93 @@ def _ensure_reviewer_exists(db: Session, reviewer_id: int | None) -> None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reviewer not found")
 
 
+def _list_jobs(db: Session, current_admin: AdminModel) -> List[JobModel]:
+    return owned_jobs_query(db, current_admin).all()
+
+
+def _create_job(db: Session, payload: JobCreate, current_admin: AdminModel) -> JobModel:
+    get_owned_department(db, payload.department_id, current_admin)
+    _ensure_reviewer_exists(db, payload.reviewer_id)
+
+    job = JobModel(**payload.dict())
+    db.add(job)
+    adjust_department_counters(db, job.department_id, jobs=1)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _update_job(db: Session, job_id: int, payload: JobUpdate, current_admin: AdminModel) -> JobModel:
+    job = get_owned_job(db, job_id, current_admin)
+
+    department = None
+    if payload.department_id != job.department_id:
+        department = get_owned_department(db, payload.department_id, current_admin)
+    _ensure_reviewer_exists(db, payload.reviewer_id)
+
+    previous_department_id = job.department_id
+    for field, value in payload.dict().items():
+        setattr(job, field, value)
+
+    if department is not None:
+        employees = count_job_employees(db, job.id)
+        adjust_department_counters(db, previous_department_id, jobs=-1, employees=-employees)
+        adjust_department_counters(db, department.id, jobs=1, employees=employees)
+        propagate_job_tenant(db, job, department)
+
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _delete_job(db: Session, job_id: int, current_admin: AdminModel) -> QueueJobModel | None:
+    get_owned_job(db, job_id, current_admin, include_deleting=True)
+    return delete_subtree_or_enqueue(db, "job", job_id, current_admin.id)
+
+
 @router.get("", response_model=List[Job])
-def list_jobs(
-    db: Session = Depends(get_db),
+async def list_jobs(
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> List[Job]:
-    return (
-        db.query(JobModel)
-        .join(JobModel.department)
-        .filter(DepartmentModel.admin_id == current_admin.id)
-        .all()
-    )
+    return await run_db(db, _list_jobs, current_admin)
 
 
 @router.get("/{job_id}", response_model=Job)
-def get_job(
+async def get_job(
     job_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Job:
-    job = db.query(JobModel).get(job_id)
-    return _ensure_job_access(job, current_admin)
+    return await run_db(db, get_owned_job, job_id, current_admin)
 
 
 @router.post("", response_model=Job, status_code=status.HTTP_201_CREATED)
-def create_job(
+async def create_job(
     payload: JobCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Job:
-    department = db.query(DepartmentModel).get(payload.department_id)
-    _ensure_department_access(department, current_admin)
-    _ensure_reviewer_exists(db, payload.reviewer_id)
-
-    job = JobModel(**payload.dict())
-    db.add(job)
-    db.commit()
-    db.refresh(job)
-    return job
+    return await run_db(db, _create_job, payload, current_admin)
 
 
 @router.put("/{job_id}", response_model=Job)
-def update_job(
+async def update_job(
     job_id: int,
     payload: JobUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Job:
-    job = db.query(JobModel).get(job_id)
-    _ensure_job_access(job, current_admin)
-
-    if payload.department_id != job.department_id:
-        department = db.query(DepartmentModel).get(payload.department_id)
-        _ensure_department_access(department, current_admin)
-    _ensure_reviewer_exists(db, payload.reviewer_id)
-
-    for field, value in payload.dict().items():
-        setattr(job, field, value)
-
-    db.commit()
-    db.refresh(job)
-    return job
+    return await run_db(db, _update_job, job_id, payload, current_admin)
 
 
 @router.delete("/{job_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_job(
+async def delete_job(
     job_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
-) -> None:
-    job = db.query(JobModel).get(job_id)
-    job = _ensure_job_access(job, current_admin)
-
-    db.delete(job)
-    db.commit()
+):
+    job = await run_db(db, _delete_job, job_id, current_admin)
+    if job is not None:
+        return job_accepted_response(job)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.api.dependencies import require_admin
+from app.api.ownership import get_owned_queue_job
+from app.api.schemas.queue_job import QueueJob, QueueJobAccepted
+from app.db.session import DbSession, get_db, run_db
+from app.models import Admin as AdminModel
+from app.models import QueueJob as QueueJobModel
+from app.services.job_queue import DEAD, requeue
+
+
+router = APIRouter()
+
+
+def job_accepted_response(job: QueueJobModel) -> JSONResponse:
+    """Ответ 202 на запрос, поставленный в очередь: статус опрашивается по status_url."""
+    status_url = f"/api/jobs-queue/{job.id}"
+    body = QueueJobAccepted(id=job.id, status=job.status, status_url=status_url)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=body.dict(), headers={"Location": status_url})
+
+
+def _requeue_job(db: Session, job_id: int, current_admin: AdminModel) -> QueueJobModel:
+    job = get_owned_queue_job(db, job_id, current_admin)
+    if job.status != DEAD:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only dead jobs can be requeued")
+    return requeue(db, job)
+
+
+@router.get("/{job_id}", response_model=QueueJob)
+async def get_queue_job(
+    job_id: int,
+    db: DbSession = Depends(get_db),
+    current_admin: AdminModel = Depends(require_admin),
+) -> QueueJob:
+    return await run_db(db, get_owned_queue_job, job_id, current_admin)
+
+
+@router.post("/{job_id}/requeue", response_model=QueueJob)
+async def requeue_queue_job(
+    job_id: int,
+    db: DbSession = Depends(get_db),
+    current_admin: AdminModel = Depends(require_admin),
+) -> QueueJob:
+    return await run_db(db, _requeue_job, job_id, current_admin)
@@ -0,0 +1,26 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+
+from app.api.dependencies import admin_cache, require_admin
+from app.db.session import pool_stats, read_router
+from app.services.evaluation import last_evaluation_report
+from app.services.gigachat import gigachat_stats
+from app.services.job_queue import job_queue_stats
+from app.services.llm_cache import description_cache
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.get("")
+async def get_metrics() -> Dict[str, Any]:
+    return {
+        "admin_cache": admin_cache.stats(),
+        "db_pool": pool_stats.snapshot(),
+        "read_replicas": read_router.stats(),
+        "gigachat": gigachat_stats(),
+        "description_cache": description_cache.stats(),
+        "evaluation": last_evaluation_report(),
+        "job_queue": job_queue_stats(),
+    }
@@ -1,12 +1,16 @@
-from typing import List
+from typing import Any, AsyncIterator, List
 import json
-import re
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session, joinedload
 
 from app.api.dependencies import require_admin
 from app.api.schemas.reviewer import (
+    Metric,
     Reviewer,
     ReviewerCreate,
     ReviewerDescriptionRequest,
@@ -14,10 +18,23 @@ from app.api.schemas.reviewer import (
     ReviewerWithJobs,
     ReviewerUpdate,
 )
-from app.db.session import get_db
+from app.api.routes.jobs_queue import job_accepted_response
+from app.db.session import DbSession, get_db, get_read_db, open_db, run_db
+from app.models import Admin as AdminModel
 from app.models import Reviewer as ReviewerModel
 from app.models import Job as JobModel
-from app.services.gigachat import GigaChatClient
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.gigachat import GigaChatTimeoutError, get_async_gigachat_client
+from app.services.job_queue import enqueue
+from app.services.json_stream import ArrayItemStreamParser
+from app.services.llm_cache import description_cache
+from app.services.reviewer_description import (
+    DescriptionFormatError,
+    build_description_prompt,
+    description_cache_key,
+    generate_description_data,
+    parse_description,
+)
 
 
 router = APIRouter(dependencies=[Depends(require_admin)])
@@ -45,8 +62,7 @@ def _to_reviewer_with_jobs(reviewer: ReviewerModel) -> ReviewerWithJobs:
     )
 
 
-@router.get("", response_model=List[ReviewerWithJobs])
-def list_reviewers(db: Session = Depends(get_db)) -> List[ReviewerWithJobs]:
+def _list_reviewers(db: Session) -> List[ReviewerWithJobs]:
     reviewers = (
         db.query(ReviewerModel)
         .options(joinedload(ReviewerModel.jobs).joinedload(JobModel.department))
@@ -55,8 +71,7 @@ def list_reviewers(db: Session = Depends(get_db)) -> List[ReviewerWithJobs]:
     return [_to_reviewer_with_jobs(reviewer) for reviewer in reviewers]
 
 
-@router.get("/{reviewer_id}", response_model=ReviewerWithJobs)
-def get_reviewer(reviewer_id: int, db: Session = Depends(get_db)) -> ReviewerWithJobs:
+def _get_reviewer(db: Session, reviewer_id: int) -> ReviewerWithJobs:
     reviewer = (
         db.query(ReviewerModel)
         .options(joinedload(ReviewerModel.jobs).joinedload(JobModel.department))
@@ -68,8 +83,7 @@ def get_reviewer(reviewer_id: int, db: Session = Depends(get_db)) -> ReviewerWit
     return _to_reviewer_with_jobs(reviewer)
 
 
-@router.post("", response_model=Reviewer, status_code=status.HTTP_201_CREATED)
-def create_reviewer(payload: ReviewerCreate, db: Session = Depends(get_db)) -> Reviewer:
+def _create_reviewer(db: Session, payload: ReviewerCreate) -> ReviewerModel:
     reviewer = ReviewerModel(**payload.dict())
     db.add(reviewer)
     db.commit()
@@ -77,10 +91,7 @@ def create_reviewer(payload: ReviewerCreate, db: Session = Depends(get_db)) -> R
     return reviewer
 
 
-@router.put("/{reviewer_id}", response_model=Reviewer)
-def update_reviewer(
-    reviewer_id: int, payload: ReviewerUpdate, db: Session = Depends(get_db)
-) -> Reviewer:
+def _update_reviewer(db: Session, reviewer_id: int, payload: ReviewerUpdate) -> ReviewerModel:
     reviewer = db.query(ReviewerModel).get(reviewer_id)
     if not reviewer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reviewer not found")
@@ -93,8 +104,7 @@ def update_reviewer(
     return reviewer
 
 
-@router.delete("/{reviewer_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_reviewer(reviewer_id: int, db: Session = Depends(get_db)) -> None:
+def _delete_reviewer(db: Session, reviewer_id: int) -> None:
     reviewer = db.query(ReviewerModel).get(reviewer_id)
     if not reviewer:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reviewer not found")
@@ -103,35 +113,131 @@ def delete_reviewer(reviewer_id: int, db: Session = Depends(get_db)) -> None:
     db.commit()
 
 
+@router.get("", response_model=List[ReviewerWithJobs])
+async def list_reviewers(db: DbSession = Depends(get_read_db)) -> List[ReviewerWithJobs]:
+    return await run_db(db, _list_reviewers)
+
+
+@router.get("/{reviewer_id}", response_model=ReviewerWithJobs)
+async def get_reviewer(reviewer_id: int, db: DbSession = Depends(get_db)) -> ReviewerWithJobs:
+    return await run_db(db, _get_reviewer, reviewer_id)
+
+
+@router.post("", response_model=Reviewer, status_code=status.HTTP_201_CREATED)
+async def create_reviewer(payload: ReviewerCreate, db: DbSession = Depends(get_db)) -> Reviewer:
+    return await run_db(db, _create_reviewer, payload)
+
+
+@router.put("/{reviewer_id}", response_model=Reviewer)
+async def update_reviewer(
+    reviewer_id: int, payload: ReviewerUpdate, db: DbSession = Depends(get_db)
+) -> Reviewer:
+    return await run_db(db, _update_reviewer, reviewer_id, payload)
+
+
+@router.delete("/{reviewer_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_reviewer(reviewer_id: int, db: DbSession = Depends(get_db)) -> None:
+    await run_db(db, _delete_reviewer, reviewer_id)
+
+
 @router.post("/description", response_model=ReviewerDescriptionResponse)
-def generate_description(payload: ReviewerDescriptionRequest) -> ReviewerDescriptionResponse:
-    client = GigaChatClient()
-    base_prompt = (
-        # Метрика: значение 1-10, json_название (id поля), имя для пользователя, короткое описание что отслеживает
-        "Сформируй структурированное описание оценщика по короткому описанию. "
-        "Ответ верни строго в JSON без markdown и без пояснений. Количество metrics должно быть от 4 и более. "
-        "Поле value должно быть числом от 1 до 10. (оно отображает ценность и приоритетность метрики, значит чем больше значение value тем ценне метрика)"
-        "Структура: {"
-        "\"name\": string, "
-        "\"summary\": string, "
-        "\"what_is_evaluated\": [string], "
-        "\"metrics\": ["
-        "{"
-        "\"value\": number, "
-        "\"json_name\": string, "
-        "\"display_name\": string, "
-        "\"description\": string"
-        "}"
-        "],"
-        "}."
-    )
-    prompt = f"{base_prompt} Название оценщика: {payload.name}. Короткое описание оценщика: {payload.description}."
-    response = client.chat(prompt)
-    content = response["choices"][0]["message"]["content"]
-    cleaned = re.sub(r"^```json\s*|\s*```$", "", content.strip(), flags=re.IGNORECASE)
+async def generate_description(
+    payload: ReviewerDescriptionRequest,
+    bypass_cache: bool = Query(False, description="Сгенерировать заново, не читая кэш"),
+    background: bool = Query(False, description="Поставить генерацию в очередь и сразу вернуть 202"),
+    current_admin: AdminModel = Depends(require_admin),
+):
+    # Сессия нужна только для постановки в очередь: соединение из пула не держится,
+    # пока запрос ждёт GigaChat
+    if background:
+        async with open_db() as db:
+            job = await run_db(
+                db,
+                enqueue,
+                "reviewer_description",
+                {"name": payload.name, "description": payload.description, "bypass_cache": bypass_cache},
+                admin_id=current_admin.id,
+            )
+        return job_accepted_response(job)
+
     try:
-        data = json.loads(cleaned)
-    except json.JSONDecodeError as exc:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                            detail=f"Invalid JSON from GigaChat: {exc}") from exc
+        data = await generate_description_data(payload.name, payload.description, bypass_cache=bypass_cache)
+    except GigaChatTimeoutError as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=str(exc)) from exc
+    except DescriptionFormatError as exc:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(exc)) from exc
+    except httpx.HTTPError as exc:
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"GigaChat request failed: {exc}") from exc
+    except CircuitOpenError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(exc),
+            headers={"Retry-After": str(max(int(exc.retry_after), 1))},
+        ) from exc
     return ReviewerDescriptionResponse(gigachat_response=data)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/description/stream")
+async def stream_description(
+    payload: ReviewerDescriptionRequest,
+    bypass_cache: bool = Query(False, description="Сгенерировать заново, не читая кэш"),
+) -> StreamingResponse:
+    """Генерация описания в виде server-sent events.
+
+    События: token — очередной фрагмент текста модели, metric — очередная метрика, как только
+    её объект закрылся, done — итоговый ReviewerDescriptionResponse, error — ошибка генерации.
+    """
+    client = get_async_gigachat_client()
+    prompt = build_description_prompt(payload.name, payload.description)
+    key = description_cache_key(prompt)
+    cached = None if bypass_cache else await run_in_threadpool(description_cache.get, key)
+
+    async def replay(data: dict) -> AsyncIterator[str]:
+        for metric in data["metrics"]:
+            yield _sse("metric", metric)
+        yield _sse("done", {"gigachat_response": data})
+
+    async def events() -> AsyncIterator[str]:
+        if cached is not None:
+            async for event in replay(cached):
+                yield event
+            return
+
+        parser = ArrayItemStreamParser("metrics")
+        try:
+            async for delta in client.chat_stream(prompt):
+                yield _sse("token", {"text": delta})
+                for item in parser.feed(delta):
+                    try:
+                        yield _sse("metric", Metric(**item).dict())
+                    except (TypeError, ValidationError):
+                        continue
+            data = parse_description(parser.text)
+        except (GigaChatTimeoutError, DescriptionFormatError) as exc:
+            yield _sse("error", {"detail": str(exc)})
+            return
+        except httpx.HTTPError as exc:
+            yield _sse("error", {"detail": f"GigaChat request failed: {exc}"})
+            return
+        except CircuitOpenError as exc:
+            # Как и generate_description_data: последний удачный ответ, даже истёкший
+            fallback = await run_in_threadpool(description_cache.get_stale, key)
+            if fallback is None:
+                yield _sse("error", {"detail": str(exc)})
+                return
+            async for event in replay(fallback):
+                yield event
+            return
+
+        await run_in_threadpool(description_cache.set, key, data.dict())
+        yield _sse("done", ReviewerDescriptionResponse(gigachat_response=data).dict())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,106 +1,288 @@
+from datetime import date
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import require_admin
-from app.api.schemas.statistic import Statistic, StatisticCreate, StatisticUpdate
-from app.db.session import get_db
+from app.api.export import ExportFormat, stream_export
+from app.api.ownership import apply_row_filters, get_owned_statistic, get_owned_user, owned_statistics_query
+from app.api.pagination import PageParams, RowFilters, paginate
+from app.api.routes.jobs_queue import job_accepted_response
+from app.api.schemas.queue_job import QueueJobAccepted
+from app.api.schemas.statistic import (
+    Statistic,
+    StatisticAggregateResult,
+    StatisticBulkItemResult,
+    StatisticBulkResult,
+    StatisticBulkUpsert,
+    StatisticCreate,
+    StatisticEvaluationRequest,
+    StatisticUpdate,
+)
+from app.core.config import get_settings
+from app.db.session import DbSession, get_db, get_read_db, get_sticky_key, run_db
+from app.db.upsert import upsert
+from app.services.job_queue import enqueue
+from app.services.statistic_rollups import refresh_statistic_rollups
+from app.services.statistics_aggregate import (
+    DEFAULT_AGGREGATES,
+    PERIODS,
+    Aggregate,
+    Dimension,
+    aggregate_statistics,
+)
+from app.services.tenancy import assign_row_tenant
 from app.models import (
     Statistic as StatisticModel,
-    User as UserModel,
-    Job as JobModel,
-    Department as DepartmentModel,
     Admin as AdminModel,
+    User as UserModel,
 )
 
 
 router = APIRouter()
 
 
-def _ensure_user_access(user: UserModel | None, current_admin: AdminModel) -> UserModel:
-    if not user or user.job.department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return user
+def _list_statistics(
+    db: Session, filters: RowFilters, page: PageParams, response: Response, current_admin: AdminModel
+) -> List[StatisticModel]:
+    query = apply_row_filters(owned_statistics_query(db, current_admin), StatisticModel, filters)
+    return paginate(query, [StatisticModel.date, StatisticModel.id], page, response)
+
+
+def _create_statistic(db: Session, payload: StatisticCreate, current_admin: AdminModel) -> StatisticModel:
+    user = get_owned_user(db, payload.user_id, current_admin)
+
+    statistic = StatisticModel(**payload.dict())
+    assign_row_tenant(statistic, user)
+    db.add(statistic)
+    refresh_statistic_rollups(db, [(statistic.user_id, statistic.date)])
+    db.commit()
+    db.refresh(statistic)
+    return statistic
+
+
+def _upsert_statistics_bulk(
+    db: Session, payload: StatisticBulkUpsert, current_admin: AdminModel
+) -> StatisticBulkResult:
+    """Вставляет или обновляет значения по uq_statistics_date_user пачками по BULK_CHUNK_SIZE.
+
+    Владение всеми user_id проверяется одним запросом; повтор пары (date, user_id) в запросе
+    побеждает последним значением, более ранние записи помечаются как superseded.
+    """
+    settings = get_settings()
+    if len(payload.items) > settings.bulk_max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.bulk_max_items} items per request",
+        )
+
+    user_ids = {item.user_id for item in payload.items}
+    tenants = {
+        user_id: (department_id, admin_id)
+        for user_id, department_id, admin_id in db.query(UserModel.id, UserModel.department_id, UserModel.admin_id)
+        .filter(UserModel.admin_id == current_admin.id, UserModel.id.in_(user_ids), UserModel.deleting.is_(False))
+    }
 
+    results = [StatisticBulkItemResult(index=index, status="upserted") for index in range(len(payload.items))]
+    rows = {}
+    for index, item in enumerate(payload.items):
+        tenant = tenants.get(item.user_id)
+        if tenant is None:
+            results[index].status = "error"
+            results[index].error = "User not found"
+            continue
+        key = (item.date, item.user_id)
+        if key in rows:
+            results[rows[key][0]].status = "superseded"
+        department_id, admin_id = tenant
+        rows[key] = (index, {**item.dict(), "department_id": department_id, "admin_id": admin_id})
 
-def _ensure_statistic_access(statistic: StatisticModel | None, current_admin: AdminModel) -> StatisticModel:
-    if not statistic or statistic.user.job.department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Statistic not found")
+    # ON CONFLICT не может затронуть одну строку дважды в одном запросе, поэтому ключи уникальны
+    values = [row for _, row in rows.values()]
+    for start in range(0, len(values), settings.bulk_chunk_size):
+        chunk = values[start:start + settings.bulk_chunk_size]
+        upsert(
+            db,
+            StatisticModel,
+            chunk,
+            index_elements=["date", "user_id"],
+            update_columns=["value", "department_id", "admin_id"],
+        )
+        refresh_statistic_rollups(db, [(row["user_id"], row["date"]) for row in chunk])
+        db.commit()
+
+    failed = sum(1 for result in results if result.status == "error")
+    return StatisticBulkResult(upserted=len(values), failed=failed, items=results)
+
+
+def _update_statistic(
+    db: Session, statistic_id: int, payload: StatisticUpdate, current_admin: AdminModel
+) -> StatisticModel:
+    statistic = get_owned_statistic(db, statistic_id, current_admin)
+    previous = (statistic.user_id, statistic.date)
+
+    if payload.user_id != statistic.user_id:
+        user = get_owned_user(db, payload.user_id, current_admin)
+        assign_row_tenant(statistic, user)
+
+    for field, value in payload.dict().items():
+        setattr(statistic, field, value)
+
+    refresh_statistic_rollups(db, [previous, (statistic.user_id, statistic.date)])
+    db.commit()
+    db.refresh(statistic)
     return statistic
 
 
+def _delete_statistic(db: Session, statistic_id: int, current_admin: AdminModel) -> None:
+    statistic = get_owned_statistic(db, statistic_id, current_admin)
+
+    db.delete(statistic)
+    refresh_statistic_rollups(db, [(statistic.user_id, statistic.date)])
+    db.commit()
+
+
 @router.get("", response_model=List[Statistic])
-def list_statistics(
-    db: Session = Depends(get_db),
+async def list_statistics(
+    response: Response,
+    filters: RowFilters = Depends(),
+    page: PageParams = Depends(),
+    db: DbSession = Depends(get_read_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> List[Statistic]:
-    return (
-        db.query(StatisticModel)
-        .join(StatisticModel.user)
-        .join(UserModel.job)
-        .join(JobModel.department)
-        .filter(DepartmentModel.admin_id == current_admin.id)
-        .all()
+    return await run_db(db, _list_statistics, filters, page, response, current_admin)
+
+
+@router.get("/export")
+async def export_statistics(
+    format: ExportFormat = ExportFormat.ndjson,
+    filters: RowFilters = Depends(),
+    sticky_key: str | None = Depends(get_sticky_key),
+    current_admin: AdminModel = Depends(require_admin),
+):
+    def build_query(db: Session):
+        query = apply_row_filters(owned_statistics_query(db, current_admin), StatisticModel, filters)
+        return (
+            query.with_entities(StatisticModel.id, StatisticModel.user_id, StatisticModel.date, StatisticModel.value)
+            .order_by(StatisticModel.date, StatisticModel.id)
+        )
+
+    return stream_export(build_query, ["id", "user_id", "date", "value"], format, "statistics", sticky_key)
+
+
+@router.get("/aggregate", response_model=StatisticAggregateResult)
+async def aggregate_statistics_view(
+    date_from: date,
+    date_to: date,
+    group_by: List[Dimension] = Query([], description="Измерения группировки; не больше одного из day, week, month"),
+    aggregates: List[Aggregate] = Query(list(DEFAULT_AGGREGATES)),
+    user_id: int | None = None,
+    job_id: int | None = None,
+    department_id: int | None = None,
+    limit: int = Query(1000, ge=1, le=10000, description="Максимум групп в ответе"),
+    db: DbSession = Depends(get_read_db),
+    current_admin: AdminModel = Depends(require_admin),
+) -> StatisticAggregateResult:
+    """Агрегаты значений за период, посчитанные в БД, по строке на группу."""
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must not be after date_to")
+    group_by = list(dict.fromkeys(group_by))
+    if sum(1 for dimension in group_by if dimension in PERIODS) > 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="At most one of day, week, month")
+    aggregates = list(dict.fromkeys(aggregates))
+
+    groups, truncated, source = await run_db(
+        db,
+        aggregate_statistics,
+        current_admin.id,
+        date_from,
+        date_to,
+        group_by,
+        aggregates,
+        user_id=user_id,
+        job_id=job_id,
+        department_id=department_id,
+        limit=limit,
+    )
+    return StatisticAggregateResult(
+        date_from=date_from,
+        date_to=date_to,
+        group_by=[dimension.value for dimension in group_by],
+        aggregates=[aggregate.value for aggregate in aggregates],
+        groups=groups,
+        truncated=truncated,
+        source=source,
     )
 
 
 @router.get("/{statistic_id}", response_model=Statistic)
-def get_statistic(
+async def get_statistic(
     statistic_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Statistic:
-    statistic = db.query(StatisticModel).get(statistic_id)
-    return _ensure_statistic_access(statistic, current_admin)
+    return await run_db(db, get_owned_statistic, statistic_id, current_admin)
+
+
+@router.post("/evaluate", status_code=status.HTTP_202_ACCEPTED, response_model=QueueJobAccepted)
+async def evaluate_statistics(
+    payload: StatisticEvaluationRequest,
+    db: DbSession = Depends(get_db),
+    current_admin: AdminModel = Depends(require_admin),
+):
+    """Ставит в очередь оценку задач за период оценщиками должностей; итог — в /api/jobs-queue/{id}."""
+    if payload.date_from > payload.date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from must not be after date_to")
+    job = await run_db(
+        db,
+        enqueue,
+        "evaluate_statistics",
+        {
+            "date_from": payload.date_from.isoformat(),
+            "date_to": payload.date_to.isoformat(),
+            "admin_id": current_admin.id,
+            "overwrite": payload.overwrite,
+        },
+        admin_id=current_admin.id,
+        # Прогон сам дозаписывает недостающее при повторе, но долгий прогон не стоит гонять много раз
+        max_attempts=2,
+    )
+    return job_accepted_response(job)
 
 
 @router.post("", response_model=Statistic, status_code=status.HTTP_201_CREATED)
-def create_statistic(
+async def create_statistic(
     payload: StatisticCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Statistic:
-    user = db.query(UserModel).get(payload.user_id)
-    _ensure_user_access(user, current_admin)
+    return await run_db(db, _create_statistic, payload, current_admin)
 
-    statistic = StatisticModel(**payload.dict())
-    db.add(statistic)
-    db.commit()
-    db.refresh(statistic)
-    return statistic
+
+@router.put("/bulk", response_model=StatisticBulkResult)
+async def upsert_statistics_bulk(
+    payload: StatisticBulkUpsert,
+    db: DbSession = Depends(get_db),
+    current_admin: AdminModel = Depends(require_admin),
+) -> StatisticBulkResult:
+    return await run_db(db, _upsert_statistics_bulk, payload, current_admin)
 
 
 @router.put("/{statistic_id}", response_model=Statistic)
-def update_statistic(
+async def update_statistic(
     statistic_id: int,
     payload: StatisticUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Statistic:
-    statistic = db.query(StatisticModel).get(statistic_id)
-    statistic = _ensure_statistic_access(statistic, current_admin)
-
-    if payload.user_id != statistic.user_id:
-        user = db.query(UserModel).get(payload.user_id)
-        _ensure_user_access(user, current_admin)
-
-    for field, value in payload.dict().items():
-        setattr(statistic, field, value)
-
-    db.commit()
-    db.refresh(statistic)
-    return statistic
+    return await run_db(db, _update_statistic, statistic_id, payload, current_admin)
 
 
 @router.delete("/{statistic_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_statistic(
+async def delete_statistic(
     statistic_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> None:
-    statistic = db.query(StatisticModel).get(statistic_id)
-    statistic = _ensure_statistic_access(statistic, current_admin)
-
-    db.delete(statistic)
-    db.commit()
+    await run_db(db, _delete_statistic, statistic_id, current_admin)
@@ -1,106 +1,175 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import require_admin
-from app.api.schemas.task import Task, TaskCreate, TaskUpdate
-from app.db.session import get_db
+from app.api.export import ExportFormat, stream_export
+from app.api.ownership import apply_row_filters, get_owned_task, get_owned_user, owned_tasks_query
+from app.api.pagination import PageParams, RowFilters, paginate
+from app.api.schemas.task import Task, TaskBulkCreate, TaskBulkItemResult, TaskBulkResult, TaskCreate, TaskUpdate
+from app.core.config import get_settings
+from app.db.bulk import bulk_insert
+from app.db.session import DbSession, get_db, get_read_db, get_sticky_key, run_db
+from app.services.tenancy import assign_row_tenant
 from app.models import (
     Task as TaskModel,
-    User as UserModel,
-    Job as JobModel,
-    Department as DepartmentModel,
     Admin as AdminModel,
+    User as UserModel,
 )
 
 
 router = APIRouter()
 
 
-def _ensure_user_access(user: UserModel | None, current_admin: AdminModel) -> UserModel:
-    if not user or user.job.department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return user
+def _list_tasks(
+    db: Session, filters: RowFilters, page: PageParams, response: Response, current_admin: AdminModel
+) -> List[TaskModel]:
+    query = apply_row_filters(owned_tasks_query(db, current_admin), TaskModel, filters)
+    return paginate(query, [TaskModel.date, TaskModel.id], page, response)
 
 
-def _ensure_task_access(task: TaskModel | None, current_admin: AdminModel) -> TaskModel:
-    if not task or task.user.job.department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task not found")
+def _create_task(db: Session, payload: TaskCreate, current_admin: AdminModel) -> TaskModel:
+    user = get_owned_user(db, payload.user_id, current_admin)
+
+    task = TaskModel(**payload.dict())
+    assign_row_tenant(task, user)
+    db.add(task)
+    db.commit()
+    db.refresh(task)
     return task
 
 
+def _create_tasks_bulk(db: Session, payload: TaskBulkCreate, current_admin: AdminModel) -> TaskBulkResult:
+    """Проверяет владение всеми user_id одним запросом и вставляет задачи одной транзакцией.
+
+    Записи с чужим или несуществующим user_id отклоняются по отдельности, остальные создаются.
+    """
+    max_items = get_settings().bulk_max_items
+    if len(payload.items) > max_items:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=f"At most {max_items} items per request"
+        )
+
+    user_ids = {item.user_id for item in payload.items}
+    tenants = {
+        user_id: (department_id, admin_id)
+        for user_id, department_id, admin_id in db.query(UserModel.id, UserModel.department_id, UserModel.admin_id)
+        .filter(UserModel.admin_id == current_admin.id, UserModel.id.in_(user_ids), UserModel.deleting.is_(False))
+    }
+
+    results = []
+    rows = []
+    for index, item in enumerate(payload.items):
+        tenant = tenants.get(item.user_id)
+        if tenant is None:
+            results.append(TaskBulkItemResult(index=index, status="error", error="User not found"))
+            continue
+        department_id, admin_id = tenant
+        rows.append({**item.dict(), "department_id": department_id, "admin_id": admin_id})
+        results.append(TaskBulkItemResult(index=index, status="created"))
+
+    ids = bulk_insert(db, TaskModel, rows)
+    db.commit()
+
+    created = [result for result in results if result.status == "created"]
+    if ids is not None:
+        for result, task_id in zip(created, ids):
+            result.id = task_id
+    return TaskBulkResult(created=len(created), failed=len(results) - len(created), items=results)
+
+
+def _update_task(db: Session, task_id: int, payload: TaskUpdate, current_admin: AdminModel) -> TaskModel:
+    task = get_owned_task(db, task_id, current_admin)
+
+    if payload.user_id != task.user_id:
+        user = get_owned_user(db, payload.user_id, current_admin)
+        assign_row_tenant(task, user)
+
+    for field, value in payload.dict().items():
+        setattr(task, field, value)
+
+    db.commit()
+    db.refresh(task)
+    return task
+
+
+def _delete_task(db: Session, task_id: int, current_admin: AdminModel) -> None:
+    task = get_owned_task(db, task_id, current_admin)
+
+    db.delete(task)
+    db.commit()
+
+
 @router.get("", response_model=List[Task])
-def list_tasks(
-    db: Session = Depends(get_db),
+async def list_tasks(
+    response: Response,
+    filters: RowFilters = Depends(),
+    page: PageParams = Depends(),
+    db: DbSession = Depends(get_read_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> List[Task]:
-    return (
-        db.query(TaskModel)
-        .join(TaskModel.user)
-        .join(UserModel.job)
-        .join(JobModel.department)
-        .filter(DepartmentModel.admin_id == current_admin.id)
-        .all()
-    )
+    return await run_db(db, _list_tasks, filters, page, response, current_admin)
+
+
+@router.get("/export")
+async def export_tasks(
+    format: ExportFormat = ExportFormat.ndjson,
+    filters: RowFilters = Depends(),
+    sticky_key: str | None = Depends(get_sticky_key),
+    current_admin: AdminModel = Depends(require_admin),
+):
+    def build_query(db: Session):
+        query = apply_row_filters(owned_tasks_query(db, current_admin), TaskModel, filters)
+        return (
+            query.with_entities(TaskModel.id, TaskModel.user_id, TaskModel.date, TaskModel.description)
+            .order_by(TaskModel.date, TaskModel.id)
+        )
+
+    return stream_export(build_query, ["id", "user_id", "date", "description"], format, "tasks", sticky_key)
 
 
 @router.get("/{task_id}", response_model=Task)
-def get_task(
+async def get_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Task:
-    task = db.query(TaskModel).get(task_id)
-    return _ensure_task_access(task, current_admin)
+    return await run_db(db, get_owned_task, task_id, current_admin)
 
 
 @router.post("", response_model=Task, status_code=status.HTTP_201_CREATED)
-def create_task(
+async def create_task(
     payload: TaskCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Task:
-    user = db.query(UserModel).get(payload.user_id)
-    _ensure_user_access(user, current_admin)
+    return await run_db(db, _create_task, payload, current_admin)
 
-    task = TaskModel(**payload.dict())
-    db.add(task)
-    db.commit()
-    db.refresh(task)
-    return task
+
+@router.post("/bulk", response_model=TaskBulkResult)
+async def create_tasks_bulk(
+    payload: TaskBulkCreate,
+    db: DbSession = Depends(get_db),
+    current_admin: AdminModel = Depends(require_admin),
+) -> TaskBulkResult:
+    return await run_db(db, _create_tasks_bulk, payload, current_admin)
 
 
 @router.put("/{task_id}", response_model=Task)
-def update_task(
+async def update_task(
     task_id: int,
     payload: TaskUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> Task:
-    task = db.query(TaskModel).get(task_id)
-    task = _ensure_task_access(task, current_admin)
-
-    if payload.user_id != task.user_id:
-        user = db.query(UserModel).get(payload.user_id)
-        _ensure_user_access(user, current_admin)
-
-    for field, value in payload.dict().items():
-        setattr(task, field, value)
-
-    db.commit()
-    db.refresh(task)
-    return task
+    return await run_db(db, _update_task, task_id, payload, current_admin)
 
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(
+async def delete_task(
     task_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> None:
-    task = db.query(TaskModel).get(task_id)
-    task = _ensure_task_access(task, current_admin)
-
-    db.delete(task)
-    db.commit()
+    await run_db(db, _delete_task, task_id, current_admin)
@@ -1,104 +1,128 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.orm import Session
 
 from app.api.dependencies import require_admin
+from app.api.ownership import get_owned_job, get_owned_user, owned_users_query
+from app.api.pagination import PageParams, paginate
+from app.api.routes.jobs_queue import job_accepted_response
 from app.api.schemas.user import User, UserCreate, UserUpdate
-from app.db.session import get_db
+from app.db.session import DbSession, get_db, run_db
+from app.services.cascade_delete import delete_subtree_or_enqueue
+from app.services.department_counters import adjust_department_counters
+from app.services.tenancy import assign_user_tenant, propagate_user_tenant
 from app.models import (
     User as UserModel,
-    Job as JobModel,
-    Department as DepartmentModel,
     Admin as AdminModel,
+    QueueJob as QueueJobModel,
 )
 
 
 router = APIRouter()
 
 
-def _ensure_job_access(job: JobModel | None, current_admin: AdminModel) -> JobModel:
-    if not job or job.department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
-    return job
+def _list_users(
+    db: Session,
+    job_id: int | None,
+    department_id: int | None,
+    page: PageParams,
+    response: Response,
+    current_admin: AdminModel,
+) -> List[UserModel]:
+    query = owned_users_query(db, current_admin)
+    if job_id is not None:
+        query = query.filter(UserModel.job_id == job_id)
+    if department_id is not None:
+        query = query.filter(UserModel.department_id == department_id)
+    return paginate(query, [UserModel.id], page, response)
 
 
-def _ensure_user_access(user: UserModel | None, current_admin: AdminModel) -> UserModel:
-    if not user or user.job.department.admin_id != current_admin.id:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+def _create_user(db: Session, payload: UserCreate, current_admin: AdminModel) -> UserModel:
+    job = get_owned_job(db, payload.job_id, current_admin)
+
+    user = UserModel(**payload.dict())
+    assign_user_tenant(user, job)
+    db.add(user)
+    adjust_department_counters(db, user.department_id, employees=1)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def _update_user(db: Session, user_id: int, payload: UserUpdate, current_admin: AdminModel) -> UserModel:
+    user = get_owned_user(db, user_id, current_admin)
+
+    job = None
+    if payload.job_id != user.job_id:
+        job = get_owned_job(db, payload.job_id, current_admin)
+
+    for field, value in payload.dict().items():
+        setattr(user, field, value)
+
+    if job is not None and job.department_id != user.department_id:
+        adjust_department_counters(db, user.department_id, employees=-1)
+        adjust_department_counters(db, job.department_id, employees=1)
+        assign_user_tenant(user, job)
+        propagate_user_tenant(db, user)
+
+    db.commit()
+    db.refresh(user)
     return user
 
 
+def _delete_user(db: Session, user_id: int, current_admin: AdminModel) -> QueueJobModel | None:
+    get_owned_user(db, user_id, current_admin, include_deleting=True)
+    return delete_subtree_or_enqueue(db, "user", user_id, current_admin.id)
+
+
 @router.get("", response_model=List[User])
-def list_users(
-    db: Session = Depends(get_db),
+async def list_users(
+    response: Response,
+    job_id: int | None = None,
+    department_id: int | None = None,
+    page: PageParams = Depends(),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> List[User]:
-    return (
-        db.query(UserModel)
-        .join(UserModel.job)
-        .join(JobModel.department)
-        .filter(DepartmentModel.admin_id == current_admin.id)
-        .all()
-    )
+    return await run_db(db, _list_users, job_id, department_id, page, response, current_admin)
 
 
 @router.get("/{user_id}", response_model=User)
-def get_user(
+async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> User:
-    user = db.query(UserModel).get(user_id)
-    return _ensure_user_access(user, current_admin)
+    return await run_db(db, get_owned_user, user_id, current_admin)
 
 
 @router.post("", response_model=User, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     payload: UserCreate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> User:
-    job = db.query(JobModel).get(payload.job_id)
-    _ensure_job_access(job, current_admin)
-
-    user = UserModel(**payload.dict())
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    return await run_db(db, _create_user, payload, current_admin)
 
 
 @router.put("/{user_id}", response_model=User)
-def update_user(
+async def update_user(
     user_id: int,
     payload: UserUpdate,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
 ) -> User:
-    user = db.query(UserModel).get(user_id)
-    user = _ensure_user_access(user, current_admin)
-
-    if payload.job_id != user.job_id:
-        job = db.query(JobModel).get(payload.job_id)
-        _ensure_job_access(job, current_admin)
-
-    for field, value in payload.dict().items():
-        setattr(user, field, value)
-
-    db.commit()
-    db.refresh(user)
-    return user
+    return await run_db(db, _update_user, user_id, payload, current_admin)
 
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(
+async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: DbSession = Depends(get_db),
     current_admin: AdminModel = Depends(require_admin),
-) -> None:
-    user = db.query(UserModel).get(user_id)
-    user = _ensure_user_access(user, current_admin)
-
-    db.delete(user)
-    db.commit()
+):
+    job = await run_db(db, _delete_user, user_id, current_admin)
+    if job is not None:
+        return job_accepted_response(job)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
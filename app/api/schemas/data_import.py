@@ -0,0 +1,18 @@
+from typing import List
+
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    kind: str
+    rows: int
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool
+    elapsed_seconds: float
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel
+
+
+class QueueJob(BaseModel):
+    id: int
+    kind: str
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    progress: Optional[Any] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class QueueJobAccepted(BaseModel):
+    id: int
+    status: str
+    status_url: str
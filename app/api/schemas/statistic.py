@@ -1,4 +1,5 @@
 from datetime import date
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -26,3 +27,36 @@ class StatisticInDBBase(StatisticBase):
 
 class Statistic(StatisticInDBBase):
     pass
+
+
+class StatisticBulkUpsert(BaseModel):
+    items: List[StatisticCreate]
+
+
+class StatisticBulkItemResult(BaseModel):
+    index: int
+    status: str
+    error: Optional[str] = None
+
+
+class StatisticBulkResult(BaseModel):
+    upserted: int
+    failed: int
+    items: List[StatisticBulkItemResult]
+
+
+class StatisticEvaluationRequest(BaseModel):
+    date_from: date
+    date_to: date
+    overwrite: bool = False
+
+
+class StatisticAggregateResult(BaseModel):
+    date_from: date
+    date_to: date
+    group_by: List[str]
+    aggregates: List[str]
+    groups: List[Dict[str, Any]]
+    truncated: bool
+    # statistics или statistic_rollups:<period>, если целые корзины взяты из свёрток
+    source: str
@@ -1,4 +1,5 @@
 from datetime import date
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -26,3 +27,20 @@ class TaskInDBBase(TaskBase):
 
 class Task(TaskInDBBase):
     pass
+
+
+class TaskBulkCreate(BaseModel):
+    items: List[TaskCreate]
+
+
+class TaskBulkItemResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class TaskBulkResult(BaseModel):
+    created: int
+    failed: int
+    items: List[TaskBulkItemResult]
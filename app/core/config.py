@@ -1,6 +1,6 @@
 from functools import lru_cache
 import os
-from typing import Optional
+from typing import List, Optional
 
 from dotenv import load_dotenv
 
@@ -14,6 +14,31 @@ class Settings:
         # Database
         # По умолчанию используем SQLite в файле, чтобы проект запускался "из коробки"
         self.database_url: str = os.getenv("DATABASE_URL", "sqlite:///./daily_crm.db")
+        # Асинхронный режим: запросы к БД идут через AsyncEngine (aiosqlite/asyncpg) без потоков
+        self.db_async: bool = os.getenv("DB_ASYNC", "false").lower() == "true"
+        # Если не задан, выводится из DATABASE_URL (sqlite -> sqlite+aiosqlite, postgresql -> postgresql+asyncpg)
+        self.database_async_url: Optional[str] = os.getenv("DATABASE_ASYNC_URL")
+        # Реплики только для чтения (через запятую); пусто - все запросы идут в DATABASE_URL
+        self.database_read_urls: List[str] = [
+            url.strip() for url in os.getenv("DATABASE_READ_URLS", "").split(",") if url.strip()
+        ]
+        # round_robin или least_busy
+        self.read_replica_strategy: str = os.getenv("READ_REPLICA_STRATEGY", "round_robin")
+        # Сколько секунд после записи чтения того же токена идут в основную БД (read-your-writes)
+        self.read_your_writes_seconds: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+        # Пул соединений (для SQLite в памяти не используется)
+        self.db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "5"))
+        self.db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        self.db_pool_timeout: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+        self.db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+        self.db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+        # Прагмы SQLite, выставляются на каждом новом соединении
+        self.sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+        self.sqlite_synchronous: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+        self.sqlite_busy_timeout_ms: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+        self.sqlite_mmap_size: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+        # Отрицательное значение - размер в КиБ (см. PRAGMA cache_size)
+        self.sqlite_cache_size: int = int(os.getenv("SQLITE_CACHE_SIZE", "-65536"))
 
         # GigaChat
         self.gigachat_base_url: Optional[str] = os.getenv("GIGACHAT_BASE_URL")
@@ -24,11 +49,75 @@ class Settings:
         self.gigachat_scope: str = os.getenv("GIGACHAT_SCOPE", "GIGACHAT_API_PERS")
         self.gigachat_model: str = os.getenv("GIGACHAT_MODEL", "GigaChat")
         self.gigachat_verify_ssl: bool = os.getenv("GIGACHAT_VERIFY_SSL", "true").lower() == "true"
+        self.gigachat_timeout_seconds: float = float(os.getenv("GIGACHAT_TIMEOUT_SECONDS", "30"))
+        # HTTP/2 требует пакет h2 (pip install "httpx[http2]")
+        self.gigachat_http2: bool = os.getenv("GIGACHAT_HTTP2", "false").lower() == "true"
+        self.gigachat_max_connections: int = int(os.getenv("GIGACHAT_MAX_CONNECTIONS", "20"))
+        self.gigachat_max_keepalive_connections: int = int(os.getenv("GIGACHAT_MAX_KEEPALIVE_CONNECTIONS", "10"))
+        # За сколько секунд до expires_at OAuth-токен считается устаревшим
+        self.gigachat_token_refresh_margin_seconds: float = float(
+            os.getenv("GIGACHAT_TOKEN_REFRESH_MARGIN_SECONDS", "60")
+        )
+        # Асинхронный клиент: не больше N одновременных вызовов LLM на процесс, общий дедлайн
+        # на вызов (включая ожидание слота и повторы) и повторы 429/5xx с джиттером
+        self.gigachat_max_in_flight: int = int(os.getenv("GIGACHAT_MAX_IN_FLIGHT", "8"))
+        self.gigachat_deadline_seconds: float = float(os.getenv("GIGACHAT_DEADLINE_SECONDS", "60"))
+        self.gigachat_max_retries: int = int(os.getenv("GIGACHAT_MAX_RETRIES", "3"))
+        self.gigachat_retry_backoff_seconds: float = float(os.getenv("GIGACHAT_RETRY_BACKOFF_SECONDS", "0.5"))
+        self.gigachat_retry_backoff_max_seconds: float = float(os.getenv("GIGACHAT_RETRY_BACKOFF_MAX_SECONDS", "8"))
+        # Автомат отключения GigaChat: окно последних вызовов, порог доли ошибок и p95 длительности
+        # (0 — не учитывать), время в open и число пробных вызовов в half-open
+        self.gigachat_breaker_window: int = int(os.getenv("GIGACHAT_BREAKER_WINDOW", "50"))
+        self.gigachat_breaker_min_calls: int = int(os.getenv("GIGACHAT_BREAKER_MIN_CALLS", "10"))
+        self.gigachat_breaker_failure_rate: float = float(os.getenv("GIGACHAT_BREAKER_FAILURE_RATE", "0.5"))
+        self.gigachat_breaker_p95_seconds: float = float(os.getenv("GIGACHAT_BREAKER_P95_SECONDS", "25"))
+        self.gigachat_breaker_open_seconds: float = float(os.getenv("GIGACHAT_BREAKER_OPEN_SECONDS", "30"))
+        self.gigachat_breaker_half_open_calls: int = int(os.getenv("GIGACHAT_BREAKER_HALF_OPEN_CALLS", "2"))
+        # Хеджирование: повторный запрос, если ответа нет дольше p95 (но не раньше минимальной паузы)
+        self.gigachat_hedge_enabled: bool = os.getenv("GIGACHAT_HEDGE_ENABLED", "false").lower() == "true"
+        self.gigachat_hedge_min_delay_seconds: float = float(os.getenv("GIGACHAT_HEDGE_MIN_DELAY_SECONDS", "2"))
+        # Кэш разобранных ответов генерации описаний: LRU в памяти + SQLite-файл на диске
+        # (пустой DESCRIPTION_CACHE_PATH отключает дисковый уровень, TTL 0 — весь кэш)
+        self.description_cache_ttl_seconds: float = float(os.getenv("DESCRIPTION_CACHE_TTL_SECONDS", "604800"))
+        self.description_cache_memory_size: int = int(os.getenv("DESCRIPTION_CACHE_MEMORY_SIZE", "256"))
+        self.description_cache_path: str = os.getenv("DESCRIPTION_CACHE_PATH", "description_cache.db")
+        self.description_cache_disk_max_entries: int = int(os.getenv("DESCRIPTION_CACHE_DISK_MAX_ENTRIES", "10000"))
+        # Сколько истёкшие записи ещё хранятся на диске как запасной ответ при открытом автомате GigaChat
+        self.description_cache_stale_seconds: float = float(os.getenv("DESCRIPTION_CACHE_STALE_SECONDS", "2592000"))
+        # Пакетная оценка задач: бюджет токенов на записи в одном промпте и число параллельных промптов
+        self.evaluation_prompt_token_budget: int = int(os.getenv("EVALUATION_PROMPT_TOKEN_BUDGET", "3000"))
+        self.evaluation_max_items_per_prompt: int = int(os.getenv("EVALUATION_MAX_ITEMS_PER_PROMPT", "40"))
+        self.evaluation_concurrency: int = int(os.getenv("EVALUATION_CONCURRENCY", "4"))
+        # Очередь фоновых задач в таблице queue_jobs; воркер запускается внутри приложения
+        # (JOB_QUEUE_IN_PROCESS) или отдельно: python scripts/run_job_worker.py
+        self.job_queue_in_process: bool = os.getenv("JOB_QUEUE_IN_PROCESS", "true").lower() == "true"
+        self.job_queue_workers: int = int(os.getenv("JOB_QUEUE_WORKERS", "2"))
+        self.job_queue_poll_interval_seconds: float = float(os.getenv("JOB_QUEUE_POLL_INTERVAL_SECONDS", "1"))
+        self.job_queue_lease_seconds: float = float(os.getenv("JOB_QUEUE_LEASE_SECONDS", "60"))
+        self.job_queue_max_attempts: int = int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "5"))
+        self.job_queue_retry_backoff_seconds: float = float(os.getenv("JOB_QUEUE_RETRY_BACKOFF_SECONDS", "5"))
+        self.job_queue_retry_backoff_max_seconds: float = float(os.getenv("JOB_QUEUE_RETRY_BACKOFF_MAX_SECONDS", "300"))
+        # Пакетные эндпоинты (/bulk): предел записей в запросе и размер одной транзакции upsert
+        self.bulk_max_items: int = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+        self.bulk_chunk_size: int = int(os.getenv("BULK_CHUNK_SIZE", "500"))
+        # Импорт CSV/XLSX: каталог для загрузок (пустой — системный temp; у отдельного воркера
+        # очереди он должен быть общим), порог размера для фонового импорта, предел загрузки
+        # и число строк с ошибками в отчёте
+        self.import_spool_dir: str = os.getenv("IMPORT_SPOOL_DIR", "")
+        self.import_sync_max_bytes: int = int(os.getenv("IMPORT_SYNC_MAX_BYTES", "1048576"))
+        self.import_max_bytes: int = int(os.getenv("IMPORT_MAX_BYTES", "104857600"))
+        self.import_max_errors: int = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+        # Каскадное удаление: строк в одной пачке DELETE и размер поддерева, выше которого
+        # удаление уходит в очередь (DELETE отвечает 202)
+        self.cascade_delete_chunk_size: int = int(os.getenv("CASCADE_DELETE_CHUNK_SIZE", "1000"))
+        self.cascade_delete_sync_max_rows: int = int(os.getenv("CASCADE_DELETE_SYNC_MAX_ROWS", "5000"))
 
-        
         # Auth
         self.auth_secret: str = os.getenv("AUTH_SECRET", "CHANGE_ME_SECRET_KEY")
         self.access_token_exp_minutes: int = int(os.getenv("ACCESS_TOKEN_EXP_MINUTES", "10080"))
+        # Кэш администраторов, найденных по токену (0 отключает кэш)
+        self.admin_cache_ttl_seconds: float = float(os.getenv("ADMIN_CACHE_TTL_SECONDS", "60"))
+        self.admin_cache_max_size: int = int(os.getenv("ADMIN_CACHE_MAX_SIZE", "1024"))
 
 
 @lru_cache()
@@ -0,0 +1,22 @@
+from typing import Any, Dict, List, Optional, Sequence, Type
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+
+
+def bulk_insert(db: Session, model: Type[Base], rows: Sequence[Dict[str, Any]]) -> Optional[List[int]]:
+    """Вставляет rows одним executemany (драйвер сам режет на пачки insertmanyvalues).
+
+    Возвращает id вставленных строк в порядке rows, если диалект умеет упорядоченный
+    RETURNING для executemany (SQLite, PostgreSQL), иначе None.
+    """
+    if not rows:
+        return []
+    dialect = db.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+        return list(db.execute(statement, list(rows)).scalars())
+    db.execute(insert(model), list(rows))
+    return None
@@ -1,21 +1,342 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from contextlib import asynccontextmanager, contextmanager
+from threading import Lock
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar, Union
 
-from app.core.config import get_settings
+from fastapi import Header
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import TTLCache
+from app.core.config import Settings, get_settings
 
 
 settings = get_settings()
 
-engine = create_engine(settings.database_url, future=True)
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def _engine_options(url: URL, settings: Settings) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"future": True, "pool_pre_ping": settings.db_pool_pre_ping}
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"timeout": settings.sqlite_busy_timeout_ms / 1000}
+    if not _is_sqlite_memory(url):
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return options
+
+
+def _apply_sqlite_pragmas(engine: Engine, settings: Settings) -> None:
+    memory = _is_sqlite_memory(engine.url)
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if not memory:
+            cursor.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+            cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+        cursor.close()
+
+
+class PoolStats:
+    """Счётчики пула: сколько соединений выдано/возвращено и сколько запросы ждали соединение."""
+
+    def __init__(self, engine: Engine) -> None:
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.wait_count = 0
+        self.wait_total_seconds = 0.0
+        self.wait_max_seconds = 0.0
+        self._lock = Lock()
+
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *args) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *args) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, *args) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def _on_invalidate(self, *args) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_seconds += seconds
+            self.wait_max_seconds = max(self.wait_max_seconds, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        with self._lock:
+            data = {
+                "pool": type(pool).__name__,
+                "status": pool.status(),
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "wait_count": self.wait_count,
+                "wait_avg_ms": (self.wait_total_seconds / self.wait_count * 1000) if self.wait_count else 0.0,
+                "wait_max_ms": self.wait_max_seconds * 1000,
+            }
+        for name in ("size", "checkedout", "overflow", "checkedin"):
+            if hasattr(pool, name):
+                data[name] = getattr(pool, name)()
+        return data
+
+
+def build_engine(database_url: str, settings: Settings) -> Engine:
+    url = make_url(database_url)
+    new_engine = create_engine(url, **_engine_options(url, settings))
+    if new_engine.url.get_backend_name() == "sqlite":
+        _apply_sqlite_pragmas(new_engine, settings)
+    return new_engine
+
+
+_ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def to_async_url(database_url: str) -> URL:
+    url = make_url(database_url)
+    return url.set(drivername=_ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername))
+
+
+def async_database_url(settings: Settings) -> URL:
+    if settings.database_async_url:
+        return make_url(settings.database_async_url)
+    return to_async_url(settings.database_url)
+
+
+def build_async_engine(url: URL, settings: Settings):
+    options = _engine_options(url, settings)
+    options.pop("future")
+    if "pool_size" in options:
+        options["poolclass"] = AsyncAdaptedQueuePool
+    new_engine = create_async_engine(url, **options)
+    if url.get_backend_name() == "sqlite":
+        _apply_sqlite_pragmas(new_engine.sync_engine, settings)
+    return new_engine
+
+
+# Синхронный движок нужен всегда: стриминговый экспорт, скрипты и миграции работают через него
+engine = build_engine(settings.database_url, settings)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 
+async_engine = build_async_engine(async_database_url(settings), settings) if settings.db_async else None
+AsyncSessionLocal = (
+    async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
+)
+
+# Движок, через который обслуживаются запросы API
+active_engine: Engine = async_engine.sync_engine if async_engine is not None else engine
+pool_stats = PoolStats(active_engine)
+
+DbSession = Union[Session, AsyncSession]
+T = TypeVar("T")
+
+
+async def run_db(db: DbSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполняет синхронную ORM-функцию fn(session, *args) без блокировки event loop.
+
+    Для AsyncSession код выполняется через run_sync (greenlet поверх асинхронного драйвера),
+    для обычной Session - в пуле потоков, как раньше выполнялись синхронные обработчики.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(_timed_pool_wait, fn, *args, **kwargs)
+    return await run_in_threadpool(_timed_pool_wait, db, fn, *args, **kwargs)
+
+
+def _timed_pool_wait(session: Session, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    # Сессия берёт соединение лениво; если fn его возьмёт, берём его здесь же, непосредственно
+    # перед запросами, чтобы измерить ожидание свободного слота в пуле основной БД
+    if not session.in_transaction() and session.get_bind() is active_engine:
+        started = time.perf_counter()
+        session.connection()
+        pool_stats.record_wait(time.perf_counter() - started)
+    return fn(session, *args, **kwargs)
+
+
+class ReadReplicaRouter:
+    """Выбирает реплику для читающих обработчиков.
+
+    После коммита с изменениями токен автора на read_your_writes_seconds закрепляется за основной БД,
+    чтобы клиент сразу видел свои записи, несмотря на отставание реплик.
+    """
 
-def get_db():
-    from sqlalchemy.orm import Session
+    def __init__(self, engines: List[Engine], strategy: str, sticky_seconds: float) -> None:
+        self.engines = engines
+        self.strategy = strategy
+        self.in_flight = [0] * len(engines)
+        self.served = [0] * len(engines)
+        self.primary_reads = 0
+        self._sticky = TTLCache(maxsize=10000, ttl=sticky_seconds)
+        self._next = 0
+        self._lock = Lock()
 
+    def acquire(self, sticky_key: Optional[str]) -> Optional[int]:
+        """Возвращает индекс реплики или None, если читать нужно из основной БД."""
+        count = len(self.engines)
+        if count == 0 or (sticky_key and self._sticky.get(sticky_key) is not None):
+            with self._lock:
+                self.primary_reads += 1
+            return None
+        with self._lock:
+            if self.strategy == "least_busy":
+                index = min(range(count), key=lambda i: (self.in_flight[i], (i - self._next) % count))
+            else:
+                index = self._next
+            self._next = (index + 1) % count
+            self.in_flight[index] += 1
+            self.served[index] += 1
+            return index
+
+    def release(self, index: Optional[int]) -> None:
+        if index is None:
+            return
+        with self._lock:
+            self.in_flight[index] -= 1
+
+    def mark_write(self, sticky_key: Optional[str]) -> None:
+        if sticky_key and self.engines:
+            self._sticky.set(sticky_key, True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "strategy": self.strategy,
+                "primary_reads": self.primary_reads,
+                "replicas": [
+                    {
+                        "url": engine.url.render_as_string(hide_password=True),
+                        "in_flight": self.in_flight[index],
+                        "served": self.served[index],
+                        "pool": engine.pool.status(),
+                    }
+                    for index, engine in enumerate(self.engines)
+                ],
+            }
+
+
+replica_engines = [build_engine(url, settings) for url in settings.database_read_urls]
+ReplicaSessionLocals = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica, future=True) for replica in replica_engines
+]
+async_replica_engines = (
+    [build_async_engine(to_async_url(url), settings) for url in settings.database_read_urls] if settings.db_async else []
+)
+AsyncReplicaSessionLocals = [
+    async_sessionmaker(replica, autoflush=False, expire_on_commit=False) for replica in async_replica_engines
+]
+read_router = ReadReplicaRouter(
+    [replica.sync_engine for replica in async_replica_engines] if settings.db_async else replica_engines,
+    settings.read_replica_strategy,
+    settings.read_your_writes_seconds,
+)
+
+
+@event.listens_for(Session, "after_flush")
+def _remember_flush(session: Session, flush_context) -> None:
+    session.info["has_writes"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _stick_to_primary(session: Session) -> None:
+    if session.info.pop("has_writes", False):
+        read_router.mark_write(session.info.get("sticky_key"))
+
+
+def _get_sync_db(authorization: str | None = Header(None, alias="Authorization")):
     db: Session = SessionLocal()
+    db.info["sticky_key"] = authorization
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def _get_async_db(authorization: str | None = Header(None, alias="Authorization")):
+    async with AsyncSessionLocal() as db:
+        db.info["sticky_key"] = authorization
+        yield db
+
+
+def _get_sync_read_db(authorization: str | None = Header(None, alias="Authorization")):
+    index = read_router.acquire(authorization)
+    db: Session = (SessionLocal if index is None else ReplicaSessionLocals[index])()
     try:
         yield db
     finally:
         db.close()
+        read_router.release(index)
 
+
+async def _get_async_read_db(authorization: str | None = Header(None, alias="Authorization")):
+    index = read_router.acquire(authorization)
+    try:
+        async with (AsyncSessionLocal if index is None else AsyncReplicaSessionLocals[index])() as db:
+            yield db
+    finally:
+        read_router.release(index)
+
+
+get_db = _get_async_db if settings.db_async else _get_sync_db
+# Для обработчиков, которые только читают: сессия на реплике, если они настроены
+get_read_db = _get_async_read_db if settings.db_async else _get_sync_read_db
+
+
+def get_sticky_key(authorization: str | None = Header(None, alias="Authorization")) -> Optional[str]:
+    """Ключ read-your-writes тех же запросов, что и в get_read_db, для сессий вне зависимостей."""
+    return authorization
+
+
+@asynccontextmanager
+async def open_db():
+    """Короткая сессия основной БД вне зависимостей FastAPI (например, для проверки токена)."""
+    if settings.db_async:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@contextmanager
+def open_read_session(sticky_key: Optional[str] = None):
+    """Синхронная читающая сессия для долгих выборок (экспорт), выбранная тем же роутером реплик."""
+    index = read_router.acquire(sticky_key)
+    db: Session = (SessionLocal if index is None else ReplicaSessionLocals[index])()
+    try:
+        yield db
+    finally:
+        db.close()
+        read_router.release(index)
@@ -0,0 +1,38 @@
+from typing import Any, Dict, Optional, Sequence, Type
+
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.base import Base
+
+
+def upsert(
+    db: Session,
+    model: Type[Base],
+    rows: Sequence[Dict[str, Any]],
+    index_elements: Sequence[str],
+    update_columns: Optional[Sequence[str]] = None,
+) -> None:
+    """Пакетная вставка с разрешением конфликта по уникальному ключу index_elements одним запросом.
+
+    update_columns=None оставляет существующие строки как есть (ON CONFLICT DO NOTHING).
+    """
+    if not rows:
+        return
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = (sqlite if dialect == "sqlite" else postgresql).insert(model).values(list(rows))
+        if update_columns:
+            statement = insert.on_conflict_do_update(
+                index_elements=list(index_elements),
+                set_={column: insert.excluded[column] for column in update_columns},
+            )
+        else:
+            statement = insert.on_conflict_do_nothing(index_elements=list(index_elements))
+    elif dialect in ("mysql", "mariadb"):
+        insert = mysql.insert(model).values(list(rows))
+        columns = update_columns or list(index_elements)[:1]
+        statement = insert.on_duplicate_key_update({column: insert.inserted[column] for column in columns})
+    else:
+        raise NotImplementedError(f"Upsert is not supported for {dialect}")
+    db.execute(statement)
@@ -1,7 +1,20 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.pagination import NEXT_CURSOR_HEADER
 from app.api.routes import router as api_router
+from app.services.gigachat import close_async_gigachat_client
+from app.services.job_queue import start_in_process_worker, stop_in_process_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_in_process_worker()
+    yield
+    await stop_in_process_worker()
+    await close_async_gigachat_client()
 
 
 def create_app() -> FastAPI:
@@ -9,6 +22,7 @@ def create_app() -> FastAPI:
         title="Daily CRM Backend",
         description="FastAPI backend for daily CRM with GigaChat integration",
         version="0.1.0",
+        lifespan=lifespan,
     )
 
     app.add_middleware(
@@ -20,6 +34,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
     app.include_router(api_router, prefix="/api")
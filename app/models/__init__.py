@@ -5,3 +5,5 @@ from app.models.user import User  # noqa: F401
 from app.models.task import Task  # noqa: F401
 from app.models.reviewer import Reviewer  # noqa: F401
 from app.models.statistic import Statistic  # noqa: F401
+from app.models.queue_job import QueueJob  # noqa: F401
+from app.models.statistic_rollup import StatisticRollup  # noqa: F401
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, false
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -9,7 +9,12 @@ class Department(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, unique=True)
-    admin_id = Column(Integer, ForeignKey("admins.id", ondelete="RESTRICT"), nullable=False)
+    admin_id = Column(Integer, ForeignKey("admins.id", ondelete="RESTRICT"), nullable=False, index=True)
+    # Поддерживаемые счётчики (см. app/services/department_counters.py)
+    jobs_count = Column(Integer, nullable=False, default=0, server_default="0")
+    employees_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Поддерево удаляется в очереди (app/services/cascade_delete.py): строка скрыта из выборок
+    deleting = Column(Boolean, nullable=False, default=False, server_default=false())
 
     jobs = relationship("Job", back_populates="department", cascade="all, delete-orphan")
     admin = relationship("Admin", back_populates="departments")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, false
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -9,8 +9,10 @@ class Job(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    department_id = Column(Integer, ForeignKey("departments.id", ondelete="RESTRICT"), nullable=False)
-    reviewer_id = Column(Integer, ForeignKey("reviewers.id", ondelete="SET NULL"), nullable=True)
+    department_id = Column(Integer, ForeignKey("departments.id", ondelete="RESTRICT"), nullable=False, index=True)
+    reviewer_id = Column(Integer, ForeignKey("reviewers.id", ondelete="SET NULL"), nullable=True, index=True)
+    # Поддерево удаляется в очереди (app/services/cascade_delete.py): строка скрыта из выборок
+    deleting = Column(Boolean, nullable=False, default=False, server_default=false())
 
     department = relationship("Department", back_populates="jobs")
     reviewer = relationship("Reviewer", back_populates="jobs")
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, DateTime, Index, Integer, JSON, String
+
+from app.db.base import Base
+
+
+class QueueJob(Base):
+    """Задача фоновой очереди (см. app/services/job_queue.py)."""
+
+    __tablename__ = "queue_jobs"
+    __table_args__ = (Index("ix_queue_jobs_status_run_at", "status", "run_at"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    # queued -> running -> succeeded | queued (повтор) | dead
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    # Все отметки времени — naive UTC
+    run_at = Column(DateTime, nullable=False)
+    locked_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    # Промежуточный прогресс от обработчика (report_progress)
+    progress = Column(JSON, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    admin_id = Column(Integer, nullable=True, index=True)
+    # Ключ, по которому в очереди не больше одной незавершённой задачи (см. enqueue);
+    # снимается, когда задача уходит в succeeded или dead
+    dedupe_key = Column(String, nullable=True, unique=True, index=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=True)
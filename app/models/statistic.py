@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import Column, Date, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -10,11 +10,16 @@ class Statistic(Base):
     __tablename__ = "statistics"
     __table_args__ = (
         UniqueConstraint("date", "user_id", name="uq_statistics_date_user"),
+        Index("ix_statistics_user_id_date", "user_id", "date"),
+        Index("ix_statistics_admin_id_date", "admin_id", "date"),
     )
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     value = Column(Integer, nullable=False)
+    # Денормализованные копии user.department_id и user.admin_id (см. app/services/tenancy.py)
+    department_id = Column(Integer, nullable=False)
+    admin_id = Column(Integer, nullable=False)
 
     user = relationship("User", back_populates="statistics")
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String, UniqueConstraint
+
+from app.db.base import Base
+
+
+class StatisticRollup(Base):
+    """Сумма, число, минимум и максимум значений сотрудника за неделю или месяц.
+
+    Поддерживается app/services/statistic_rollups.py в тех же транзакциях, что и statistics.
+    """
+
+    __tablename__ = "statistic_rollups"
+    __table_args__ = (
+        UniqueConstraint("period", "bucket_start", "user_id", name="uq_statistic_rollups_bucket_user"),
+        Index("ix_statistic_rollups_admin_id_period_bucket", "admin_id", "period", "bucket_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # week (начало — понедельник) или month (начало — первое число)
+    period = Column(String, nullable=False)
+    bucket_start = Column(Date, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Денормализованные копии user.department_id и user.admin_id (см. app/services/tenancy.py)
+    department_id = Column(Integer, nullable=False)
+    admin_id = Column(Integer, nullable=False)
+    value_count = Column(Integer, nullable=False)
+    value_sum = Column(Integer, nullable=False)
+    value_min = Column(Integer, nullable=False)
+    value_max = Column(Integer, nullable=False)
@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import Column, Date, ForeignKey, Integer, String
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -8,10 +8,17 @@ from app.db.base import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_user_id_date", "user_id", "date"),
+        Index("ix_tasks_admin_id_date", "admin_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     date = Column(Date, nullable=False)
     description = Column(String, nullable=False)
+    # Денормализованные копии user.department_id и user.admin_id (см. app/services/tenancy.py)
+    department_id = Column(Integer, nullable=False)
+    admin_id = Column(Integer, nullable=False)
 
     user = relationship("User", back_populates="tasks")
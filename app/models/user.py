@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, false
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -9,7 +9,12 @@ class User(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="RESTRICT"), nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="RESTRICT"), nullable=False, index=True)
+    # Денормализованные копии job.department_id и department.admin_id (см. app/services/tenancy.py)
+    department_id = Column(Integer, nullable=False)
+    admin_id = Column(Integer, nullable=False, index=True)
+    # Поддерево удаляется в очереди (app/services/cascade_delete.py): строка скрыта из выборок
+    deleting = Column(Boolean, nullable=False, default=False, server_default=false())
 
     job = relationship("Job", back_populates="users")
     tasks = relationship("Task", back_populates="user", cascade="all, delete-orphan")
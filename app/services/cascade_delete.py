@@ -0,0 +1,143 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models import (
+    Department as DepartmentModel,
+    Job as JobModel,
+    QueueJob as QueueJobModel,
+    Statistic as StatisticModel,
+    StatisticRollup as StatisticRollupModel,
+    Task as TaskModel,
+    User as UserModel,
+)
+from app.services.department_counters import adjust_department_counters
+from app.services.job_queue import enqueue, find_active_job
+
+
+# Удаление отдела, должности или сотрудника вместе с поддеревом. ORM-каскад
+# (cascade="all, delete-orphan") загружал бы в сессию каждую строку поддерева; здесь оно
+# удаляется снизу вверх (tasks, statistics, statistic_rollups, users, jobs, корень) пачками
+# DELETE ... WHERE id IN (...), и каждая пачка фиксируется отдельной транзакцией.
+# Прерванное удаление достаточно запустить повторно: оно продолжит с оставшихся строк.
+# Поддеревья больше CASCADE_DELETE_SYNC_MAX_ROWS удаляются в очереди задачей "cascade_delete".
+# На время такого удаления корень, должности и сотрудники поддерева помечаются deleting: выборки
+# app/api/ownership.py их не видят, поэтому их нельзя изменить или прикрепить к ним новые строки.
+# У задачи ключ dedupe_key: повторный DELETE возвращает уже поставленную задачу.
+
+SCOPES = ("department", "job", "user")
+
+Progress = Callable[[Dict[str, int]], None]
+
+
+def _user_ids(scope: str, root_id: int):
+    if scope == "user":
+        return select(UserModel.id).where(UserModel.id == root_id)
+    if scope == "job":
+        return select(UserModel.id).where(UserModel.job_id == root_id)
+    jobs = select(JobModel.id).where(JobModel.department_id == root_id)
+    return select(UserModel.id).where(UserModel.job_id.in_(jobs))
+
+
+def _steps(scope: str, root_id: int) -> List[Tuple[str, Any, Any]]:
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown cascade delete scope: {scope}")
+    user_ids = _user_ids(scope, root_id)
+    steps = [
+        ("tasks", TaskModel, TaskModel.user_id.in_(user_ids)),
+        ("statistics", StatisticModel, StatisticModel.user_id.in_(user_ids)),
+        ("statistic_rollups", StatisticRollupModel, StatisticRollupModel.user_id.in_(user_ids)),
+        ("users", UserModel, UserModel.id.in_(user_ids)),
+    ]
+    if scope == "job":
+        steps.append(("jobs", JobModel, JobModel.id == root_id))
+    elif scope == "department":
+        steps.append(("jobs", JobModel, JobModel.department_id == root_id))
+        steps.append(("departments", DepartmentModel, DepartmentModel.id == root_id))
+    return steps
+
+
+def count_subtree_rows(db: Session, scope: str, root_id: int, limit: int) -> int:
+    """Число строк поддерева, но не больше limit + 1: подсчёт не читает лишнего."""
+    total = 0
+    for _, model, condition in _steps(scope, root_id):
+        bounded = select(model.id).where(condition).limit(limit + 1 - total).subquery()
+        total += db.execute(select(func.count()).select_from(bounded)).scalar()
+        if total > limit:
+            break
+    return total
+
+
+def _counters_department_id(db: Session, scope: str, root_id: int) -> Optional[int]:
+    # Счётчики отдела поддерживаются, пока удаляется его часть; удаляемому отделу они не нужны
+    if scope == "job":
+        return db.execute(select(JobModel.department_id).where(JobModel.id == root_id)).scalar()
+    if scope == "user":
+        return db.execute(select(UserModel.department_id).where(UserModel.id == root_id)).scalar()
+    return None
+
+
+def delete_subtree(
+    db: Session,
+    scope: str,
+    root_id: int,
+    *,
+    chunk_size: Optional[int] = None,
+    progress: Optional[Progress] = None,
+) -> Dict[str, int]:
+    """Удаляет корень и поддерево пачками; возвращает число удалённых строк по таблицам."""
+    chunk_size = chunk_size or get_settings().cascade_delete_chunk_size
+    steps = _steps(scope, root_id)
+    department_id = _counters_department_id(db, scope, root_id)
+    deleted = {name: 0 for name, _, _ in steps}
+
+    for name, model, condition in steps:
+        while True:
+            ids = db.execute(select(model.id).where(condition).limit(chunk_size)).scalars().all()
+            if not ids:
+                break
+            removed = db.execute(
+                delete(model).where(model.id.in_(ids)).execution_options(synchronize_session=False)
+            ).rowcount
+            if department_id is not None and model is UserModel:
+                adjust_department_counters(db, department_id, employees=-removed)
+            if department_id is not None and model is JobModel:
+                adjust_department_counters(db, department_id, jobs=-removed)
+            db.commit()
+            deleted[name] += removed
+            if progress is not None:
+                progress(dict(deleted))
+            if len(ids) < chunk_size:
+                break
+    return deleted
+
+
+def _mark_deleting(db: Session, scope: str, root_id: int) -> None:
+    marks = [(UserModel, UserModel.id.in_(_user_ids(scope, root_id)))]
+    if scope == "job":
+        marks.append((JobModel, JobModel.id == root_id))
+    elif scope == "department":
+        marks.append((JobModel, JobModel.department_id == root_id))
+        marks.append((DepartmentModel, DepartmentModel.id == root_id))
+    for model, condition in marks:
+        db.execute(update(model).where(condition).values(deleting=True).execution_options(synchronize_session=False))
+
+
+def delete_subtree_or_enqueue(db: Session, scope: str, root_id: int, admin_id: int) -> Optional[QueueJobModel]:
+    """Небольшое поддерево удаляет сразу; большое ставит в очередь и возвращает задачу.
+
+    Если удаление этого корня уже в очереди, возвращает существующую задачу.
+    """
+    dedupe_key = f"cascade_delete:{scope}:{root_id}"
+    pending = find_active_job(db, dedupe_key)
+    if pending is not None:
+        return pending
+    limit = get_settings().cascade_delete_sync_max_rows
+    if count_subtree_rows(db, scope, root_id, limit) > limit:
+        # Пометка и задача фиксируются одной транзакцией в enqueue
+        _mark_deleting(db, scope, root_id)
+        return enqueue(db, "cascade_delete", {"scope": scope, "id": root_id}, admin_id=admin_id, dedupe_key=dedupe_key)
+    delete_subtree(db, scope, root_id)
+    return None
@@ -0,0 +1,134 @@
+from collections import deque
+from threading import Lock
+import time
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Вызов отклонён без обращения к сервису: автомат разомкнут."""
+
+    def __init__(self, name: str, retry_after: float) -> None:
+        super().__init__(f"{name} is unavailable, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Автомат closed -> open -> half_open по скользящему окну последних вызовов.
+
+    Размыкается, когда в окне не меньше min_calls вызовов и доля ошибок достигает
+    failure_rate или p95 длительности превышает p95_seconds (0 отключает этот критерий).
+    Через open_seconds пропускает half_open_calls пробных вызовов: все успешны — замыкается,
+    любая ошибка — снова размыкается.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        p95_seconds: float,
+        open_seconds: float,
+        half_open_calls: int,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.p95_seconds = p95_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.rejected = 0
+        self.transitions: Dict[str, int] = {}
+        self._calls: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = Lock()
+
+    def _transition(self, state: str) -> None:
+        key = f"{self.state}->{state}"
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._probes = 0
+            self._probe_successes = 0
+        else:
+            self._calls.clear()
+
+    def before_call(self) -> None:
+        """Бросает CircuitOpenError, если вызов сейчас выполнять нельзя."""
+        with self._lock:
+            if self.state == OPEN:
+                remaining = self._opened_at + self.open_seconds - time.monotonic()
+                if remaining > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, remaining)
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.name, self.open_seconds)
+                self._probes += 1
+
+    def record(self, ok: bool, duration: float) -> None:
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if not ok:
+                    self._transition(OPEN)
+                    return
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    self._transition(CLOSED)
+                return
+            if self.state == OPEN:
+                return
+            self._calls.append((ok, duration))
+            if len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for call_ok, _ in self._calls if not call_ok)
+            slow = self.p95_seconds and self._percentile(95) >= self.p95_seconds
+            if failures / len(self._calls) >= self.failure_rate or slow:
+                self._transition(OPEN)
+
+    def abandon(self) -> None:
+        """Вызов прерван (отмена) без результата: освобождаем место пробного вызова."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes > 0:
+                self._probes -= 1
+
+    def _percentile(self, q: float) -> float:
+        durations = sorted(duration for _, duration in self._calls)
+        if not durations:
+            return 0.0
+        return durations[min(len(durations) - 1, int(len(durations) * q / 100))]
+
+    def latency_percentile(self, q: float) -> Optional[float]:
+        """Перцентиль длительности успешных вызовов окна или None, пока данных мало."""
+        with self._lock:
+            durations = sorted(duration for ok, duration in self._calls if ok)
+        if len(durations) < self.min_calls:
+            return None
+        return durations[min(len(durations) - 1, int(len(durations) * q / 100))]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = len(self._calls)
+            failures = sum(1 for ok, _ in self._calls if not ok)
+            return {
+                "state": self.state,
+                "window_calls": calls,
+                "failure_rate": failures / calls if calls else 0.0,
+                "p50_seconds": self._percentile(50),
+                "p95_seconds": self._percentile(95),
+                "rejected": self.rejected,
+                "transitions": dict(self.transitions),
+            }
@@ -0,0 +1,365 @@
+from collections import Counter
+import csv
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime
+from enum import Enum
+import os
+import tempfile
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+import zipfile
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.api.schemas.statistic import StatisticCreate
+from app.api.schemas.task import TaskCreate
+from app.api.schemas.user import UserCreate
+from app.core.config import get_settings
+from app.db.bulk import bulk_insert
+from app.db.session import DbSession, run_db
+from app.db.upsert import upsert
+from app.models import (
+    Department as DepartmentModel,
+    Job as JobModel,
+    Statistic as StatisticModel,
+    Task as TaskModel,
+    User as UserModel,
+)
+from app.services.department_counters import adjust_department_counters
+from app.services.statistic_rollups import refresh_statistic_rollups
+
+
+# Импорт сотрудников, задач и статистики из CSV/XLSX. Загрузка сначала пишется на диск
+# потоком (spool_upload), затем файл читается построчно: память не зависит от его размера.
+# Имена должностей и сотрудников разрешаются в id по словарям, построенным один раз на импорт;
+# строки проверяются схемами API и пишутся пачками по BULK_CHUNK_SIZE, каждая пачка — своя
+# транзакция. Ошибочные строки не прерывают импорт и попадают в отчёт с номером строки файла.
+
+
+class ImportKind(str, Enum):
+    users = "users"
+    tasks = "tasks"
+    statistics = "statistics"
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    xlsx = "xlsx"
+
+
+class ImportFileError(ValueError):
+    """Файл не читается целиком: неверный формат, кодировка или нет обязательных колонок."""
+
+
+class ImportTooLargeError(ImportFileError):
+    """Загрузка больше IMPORT_MAX_BYTES."""
+
+
+# Каждая строка должна содержать все колонки хотя бы одной группы
+_REQUIRED_COLUMNS = {
+    ImportKind.users: (("name", "job"), ("name", "job_id")),
+    ImportKind.tasks: (("user", "date", "description"), ("user_id", "date", "description")),
+    ImportKind.statistics: (("user", "date", "value"), ("user_id", "date", "value")),
+}
+
+
+class _RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    rows: int = 0
+    imported: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    errors_truncated: bool = False
+    elapsed_seconds: float = 0.0
+
+    def add_error(self, line: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < get_settings().import_max_errors:
+            self.errors.append({"line": line, "error": message})
+        else:
+            self.errors_truncated = True
+
+    def progress(self) -> Dict[str, int]:
+        return {"rows": self.rows, "imported": self.imported, "failed": self.failed}
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["elapsed_seconds"] = round(self.elapsed_seconds, 3)
+        return data
+
+
+async def spool_upload(chunks: AsyncIterator[bytes], file_format: ImportFormat) -> Tuple[str, int]:
+    """Пишет поток загрузки во временный файл IMPORT_SPOOL_DIR; возвращает путь и размер."""
+    settings = get_settings()
+    spool_dir = settings.import_spool_dir or None
+    if spool_dir:
+        os.makedirs(spool_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="import_", suffix=f".{file_format.value}", dir=spool_dir)
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as file:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > settings.import_max_bytes:
+                    raise ImportTooLargeError(f"Upload exceeds {settings.import_max_bytes} bytes")
+                await run_in_threadpool(file.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path, size
+
+
+def _column(name: Any) -> str:
+    return str(name or "").strip().lower()
+
+
+def _cell(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip() or None
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+# Читатели отдают сначала (1, заголовок), затем (номер строки файла, значения) непустых строк
+
+
+def _csv_rows(path: str) -> Iterator[Tuple[int, List[Any]]]:
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        yield 1, [_column(name) for name in next(reader, [])]
+        for values in reader:
+            if any(value.strip() for value in values):
+                yield reader.line_num, [_cell(value) for value in values]
+
+
+def _xlsx_rows(path: str) -> Iterator[Tuple[int, List[Any]]]:
+    # openpyxl нужен только для XLSX, поэтому импортируется по требованию
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("XLSX import requires openpyxl") from None
+
+    # read_only читает лист потоково, не собирая его в памяти
+    try:
+        workbook = load_workbook(path, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFileError(f"Unreadable xlsx file: {exc}") from None
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        yield 1, [_column(name) for name in next(rows, ())]
+        for line, values in enumerate(rows, start=2):
+            values = [_cell(value) for value in values]
+            if any(value is not None for value in values):
+                yield line, values
+    finally:
+        workbook.close()
+
+
+def _read_rows(path: str, file_format: ImportFormat, kind: ImportKind) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    rows = _csv_rows(path) if file_format == ImportFormat.csv else _xlsx_rows(path)
+    try:
+        _, header = next(rows)
+        if not any(all(column in header for column in group) for group in _REQUIRED_COLUMNS[kind]):
+            options = " or ".join(", ".join(group) for group in _REQUIRED_COLUMNS[kind])
+            raise ImportFileError(f"Missing required columns: {options}")
+        for line, values in rows:
+            yield line, {column: value for column, value in zip(header, values) if column}
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile) as exc:
+        raise ImportFileError(f"Unreadable {file_format.value} file: {exc}") from None
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors())
+
+
+def _unique(candidates: List[Any], missing: str, ambiguous: str) -> Any:
+    if not candidates:
+        raise _RowError(missing)
+    if len(candidates) > 1:
+        raise _RowError(ambiguous)
+    return candidates[0]
+
+
+class _Lookups:
+    """Словари имя -> id по данным администратора, строятся один раз на импорт."""
+
+    def __init__(self, db: Session, kind: ImportKind, admin_id: int) -> None:
+        self.jobs: Dict[int, Tuple[int, int]] = {}
+        self.jobs_by_name: Dict[str, List[int]] = {}
+        self.jobs_by_department: Dict[Tuple[str, str], List[int]] = {}
+        self.users: Dict[int, Tuple[int, int]] = {}
+        self.users_by_name: Dict[str, List[int]] = {}
+
+        if kind == ImportKind.users:
+            rows = (
+                db.query(JobModel.id, JobModel.name, DepartmentModel.id, DepartmentModel.name)
+                .join(DepartmentModel, DepartmentModel.id == JobModel.department_id)
+                .filter(DepartmentModel.admin_id == admin_id, JobModel.deleting.is_(False))
+            )
+            for job_id, job_name, department_id, department_name in rows:
+                self.jobs[job_id] = (department_id, admin_id)
+                self.jobs_by_name.setdefault(job_name.strip().lower(), []).append(job_id)
+                key = (department_name.strip().lower(), job_name.strip().lower())
+                self.jobs_by_department.setdefault(key, []).append(job_id)
+        else:
+            rows = db.query(UserModel.id, UserModel.name, UserModel.department_id).filter(
+                UserModel.admin_id == admin_id, UserModel.deleting.is_(False)
+            )
+            for user_id, user_name, department_id in rows:
+                self.users[user_id] = (department_id, admin_id)
+                self.users_by_name.setdefault(user_name.strip().lower(), []).append(user_id)
+
+    def job_id(self, row: Dict[str, Any]) -> int:
+        if row.get("job_id") is not None:
+            job_id = _as_int(row["job_id"], "job_id")
+            if job_id not in self.jobs:
+                raise _RowError("Job not found")
+            return job_id
+        name = str(row.get("job") or "").lower()
+        if row.get("department"):
+            candidates = self.jobs_by_department.get((str(row["department"]).lower(), name), [])
+        else:
+            candidates = self.jobs_by_name.get(name, [])
+        return _unique(candidates, "Job not found", "Job name is ambiguous, add a department column")
+
+    def user_id(self, row: Dict[str, Any]) -> int:
+        if row.get("user_id") is not None:
+            user_id = _as_int(row["user_id"], "user_id")
+            if user_id not in self.users:
+                raise _RowError("User not found")
+            return user_id
+        candidates = self.users_by_name.get(str(row.get("user") or "").lower(), [])
+        return _unique(candidates, "User not found", "User name is ambiguous, use a user_id column")
+
+
+def _as_int(value: Any, column: str) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise _RowError(f"{column}: not an integer") from None
+
+
+def _prepare(kind: ImportKind, row: Dict[str, Any], lookups: _Lookups) -> Dict[str, Any]:
+    """Разрешает имена в id, проверяет строку схемой API и добавляет tenant-колонки."""
+    if kind == ImportKind.users:
+        job_id = lookups.job_id(row)
+        values = UserCreate(name=row.get("name"), job_id=job_id).dict()
+        department_id, admin_id = lookups.jobs[job_id]
+    else:
+        user_id = lookups.user_id(row)
+        if kind == ImportKind.tasks:
+            values = TaskCreate(user_id=user_id, date=row.get("date"), description=row.get("description")).dict()
+        else:
+            values = StatisticCreate(user_id=user_id, date=row.get("date"), value=row.get("value")).dict()
+        department_id, admin_id = lookups.users[user_id]
+    return {**values, "department_id": department_id, "admin_id": admin_id}
+
+
+def _write_chunk(db: Session, kind: ImportKind, rows: List[Dict[str, Any]]) -> None:
+    if kind == ImportKind.users:
+        bulk_insert(db, UserModel, rows)
+        for department_id, count in Counter(row["department_id"] for row in rows).items():
+            adjust_department_counters(db, department_id, employees=count)
+    elif kind == ImportKind.tasks:
+        bulk_insert(db, TaskModel, rows)
+    else:
+        # Повтор (date, user_id) внутри пачки: побеждает последняя строка
+        unique: Dict[Tuple[date, int], Dict[str, Any]] = {}
+        for row in rows:
+            unique[(row["date"], row["user_id"])] = row
+        upsert(
+            db,
+            StatisticModel,
+            list(unique.values()),
+            index_elements=["date", "user_id"],
+            update_columns=["value", "department_id", "admin_id"],
+        )
+        refresh_statistic_rollups(db, [(user_id, day) for day, user_id in unique])
+    db.commit()
+
+
+def _prepared_chunks(
+    path: str, file_format: ImportFormat, kind: ImportKind, lookups: _Lookups, report: ImportReport, chunk_size: int
+) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    """Читает и проверяет строки файла без обращений к БД; ошибочные строки записывает в report."""
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    for line, row in _read_rows(path, file_format, kind):
+        report.rows += 1
+        try:
+            chunk.append((line, _prepare(kind, row, lookups)))
+        except _RowError as exc:
+            report.add_error(line, str(exc))
+        except ValidationError as exc:
+            report.add_error(line, _validation_message(exc))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _flush(db: Session, kind: ImportKind, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+    try:
+        _write_chunk(db, kind, [row for _, row in chunk])
+    except SQLAlchemyError as exc:
+        db.rollback()
+        for line, _ in chunk:
+            report.add_error(line, f"Database error: {exc.__class__.__name__}")
+    else:
+        report.imported += len(chunk)
+
+
+def run_import(
+    db: Session,
+    kind: ImportKind,
+    file_format: ImportFormat,
+    path: str,
+    admin_id: int,
+    *,
+    progress: Optional[Callable[[Dict[str, int]], None]] = None,
+) -> ImportReport:
+    """Импортирует файл path; бросает ImportFileError, только если файл не читается вовсе."""
+    report = ImportReport(kind=kind.value)
+    started = time.perf_counter()
+    lookups = _Lookups(db, kind, admin_id)
+    for chunk in _prepared_chunks(path, file_format, kind, lookups, report, get_settings().bulk_chunk_size):
+        _flush(db, kind, chunk, report)
+        if progress is not None:
+            progress(report.progress())
+
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+async def run_import_async(
+    db: DbSession, kind: ImportKind, file_format: ImportFormat, path: str, admin_id: int
+) -> ImportReport:
+    """run_import для обработчика запроса.
+
+    Разбор и проверка файла идут в пуле потоков, через run_db — только запросы: с DB_ASYNC
+    run_sync выполняет переданную функцию в event loop, и разбор блокировал бы его целиком.
+    """
+    report = ImportReport(kind=kind.value)
+    started = time.perf_counter()
+    lookups = await run_db(db, _Lookups, kind, admin_id)
+    chunks = _prepared_chunks(path, file_format, kind, lookups, report, get_settings().bulk_chunk_size)
+    try:
+        while True:
+            chunk = await run_in_threadpool(next, chunks, None)
+            if chunk is None:
+                break
+            await run_db(db, _flush, kind, chunk, report)
+    finally:
+        chunks.close()
+
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
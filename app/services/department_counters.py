@@ -0,0 +1,73 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.models import Department as DepartmentModel, Job as JobModel, User as UserModel
+
+
+# departments.jobs_count и departments.employees_count поддерживаются инкрементально, чтобы
+# список отделов читался без агрегации по jobs и users. Любая запись, добавляющая, удаляющая
+# или переносящая должность или сотрудника, должна вызвать adjust_department_counters в той же
+# транзакции. Расхождения находит и исправляет scripts/repair_department_counters.py.
+
+
+def adjust_department_counters(db: Session, department_id: int, *, jobs: int = 0, employees: int = 0) -> None:
+    """Атомарно сдвигает счётчики отдела (UPDATE ... SET x = x + n), без гонки чтение-запись."""
+    if not jobs and not employees:
+        return
+    db.execute(
+        update(DepartmentModel)
+        .where(DepartmentModel.id == department_id)
+        .values(
+            jobs_count=DepartmentModel.jobs_count + jobs,
+            employees_count=DepartmentModel.employees_count + employees,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def count_job_employees(db: Session, job_id: int) -> int:
+    return db.query(func.count(UserModel.id)).filter(UserModel.job_id == job_id).scalar()
+
+
+def verify_department_counters(db: Session, *, fix: bool = False) -> List[Dict[str, Any]]:
+    """Сравнивает сохранённые счётчики с пересчитанными; при fix=True записывает верные значения."""
+    jobs = (
+        db.query(JobModel.department_id, func.count(JobModel.id))
+        .group_by(JobModel.department_id)
+    )
+    employees = (
+        db.query(UserModel.department_id, func.count(UserModel.id))
+        .group_by(UserModel.department_id)
+    )
+    actual_jobs = dict(jobs.all())
+    actual_employees = dict(employees.all())
+
+    mismatches = []
+    for department_id, jobs_count, employees_count in db.query(
+        DepartmentModel.id, DepartmentModel.jobs_count, DepartmentModel.employees_count
+    ).order_by(DepartmentModel.id):
+        expected_jobs = actual_jobs.get(department_id, 0)
+        expected_employees = actual_employees.get(department_id, 0)
+        if (jobs_count, employees_count) == (expected_jobs, expected_employees):
+            continue
+        mismatches.append(
+            {
+                "department_id": department_id,
+                "jobs_count": jobs_count,
+                "expected_jobs_count": expected_jobs,
+                "employees_count": employees_count,
+                "expected_employees_count": expected_employees,
+            }
+        )
+        if fix:
+            db.execute(
+                update(DepartmentModel)
+                .where(DepartmentModel.id == department_id)
+                .values(jobs_count=expected_jobs, employees_count=expected_employees)
+                .execution_options(synchronize_session=False)
+            )
+    if fix:
+        db.commit()
+    return mismatches
@@ -0,0 +1,279 @@
+import asyncio
+from dataclasses import asdict, dataclass, field
+from datetime import date
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+import httpx
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.db.upsert import upsert
+from app.models import (
+    Job as JobModel,
+    Reviewer as ReviewerModel,
+    Statistic as StatisticModel,
+    Task as TaskModel,
+    User as UserModel,
+)
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.gigachat import GigaChatTimeoutError, get_async_gigachat_client
+from app.services.statistic_rollups import refresh_statistic_rollups
+
+
+# Оценка задач: задачи сотрудника за день оцениваются оценщиком его должности по метрикам
+# Reviewer.metrics (оценка 1-10 по каждой), взвешенное по Metric.value среднее переводится
+# в шкалу 0-100 и записывается в statistics(date, user_id).
+#
+# Прогон идемпотентен: запись идёт upsert'ом по uq_statistics_date_user, а без overwrite
+# уже оценённые дни (в том числе введённые вручную) пропускаются. Каждый промпт фиксируется
+# отдельной транзакцией, поэтому прерванный прогон достаточно запустить повторно.
+
+EVALUATION_PROMPT = (
+    "Ты оцениваешь ежедневную работу сотрудников. Оценщик: {name}. {description} "
+    "Для каждой записи ниже поставь оценку от 1 до 10 по каждой метрике. "
+    "Метрики (json_name: описание): {metrics}. "
+    "Ответ верни строго в JSON без markdown и без пояснений: "
+    "{{\"results\": [{{\"id\": number, \"scores\": {{\"<json_name>\": number}}}}]}}. "
+    "Записи:\n{items}"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # Грубая оценка без токенизатора: в среднем около четырёх символов на токен
+    return len(text) // 4 + 1
+
+
+@dataclass
+class _DayItem:
+    user_id: int
+    date: date
+    department_id: int
+    admin_id: int
+    tasks: List[str] = field(default_factory=list)
+
+    def render(self, index: int, max_chars: int) -> str:
+        text = f"[{index}] " + "; ".join(self.tasks)
+        return text[:max_chars]
+
+
+@dataclass
+class _Batch:
+    reviewer: Dict[str, Any]
+    items: List[_DayItem]
+
+
+@dataclass
+class EvaluationReport:
+    date_from: date
+    date_to: date
+    users: int = 0
+    user_days: int = 0
+    prompts: int = 0
+    failed_prompts: int = 0
+    skipped_user_days: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def users_per_second(self) -> float:
+        return self.users / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["date_from"] = self.date_from.isoformat()
+        data["date_to"] = self.date_to.isoformat()
+        data["users_per_second"] = round(self.users_per_second, 3)
+        return data
+
+
+_last_report: Optional[EvaluationReport] = None
+
+
+def last_evaluation_report() -> Optional[Dict[str, Any]]:
+    return _last_report.as_dict() if _last_report is not None else None
+
+
+def _load_work(
+    date_from: date, date_to: date, admin_id: Optional[int], overwrite: bool
+) -> tuple[Dict[int, Dict[str, Any]], Dict[int, List[_DayItem]]]:
+    """Задачи диапазона, сгруппированные по оценщику и (сотрудник, день)."""
+    with SessionLocal() as db:
+        query = (
+            db.query(
+                JobModel.reviewer_id,
+                TaskModel.user_id,
+                TaskModel.date,
+                TaskModel.department_id,
+                TaskModel.admin_id,
+                TaskModel.description,
+            )
+            .join(UserModel, UserModel.id == TaskModel.user_id)
+            .join(JobModel, JobModel.id == UserModel.job_id)
+            .filter(JobModel.reviewer_id.isnot(None), TaskModel.date >= date_from, TaskModel.date <= date_to)
+        )
+        if admin_id is not None:
+            query = query.filter(TaskModel.admin_id == admin_id)
+        if not overwrite:
+            scored = db.query(StatisticModel.id).filter(
+                StatisticModel.user_id == TaskModel.user_id, StatisticModel.date == TaskModel.date
+            )
+            query = query.filter(~scored.exists())
+        query = query.order_by(JobModel.reviewer_id, TaskModel.user_id, TaskModel.date, TaskModel.id)
+
+        work: Dict[int, List[_DayItem]] = {}
+        for reviewer_id, user_id, day, department_id, row_admin_id, description in query:
+            items = work.setdefault(reviewer_id, [])
+            if not items or items[-1].user_id != user_id or items[-1].date != day:
+                items.append(_DayItem(user_id, day, department_id, row_admin_id))
+            items[-1].tasks.append(description)
+
+        reviewers = {
+            reviewer.id: {
+                "name": reviewer.name,
+                "description": reviewer.description,
+                "metrics": reviewer.metrics or [],
+            }
+            for reviewer in db.query(ReviewerModel).filter(ReviewerModel.id.in_(list(work)))
+        }
+    return reviewers, work
+
+
+def _pack(reviewer: Dict[str, Any], items: List[_DayItem], token_budget: int, max_items: int) -> List[_Batch]:
+    """Складывает дни сотрудников в промпты, не превышая бюджет токенов на записи."""
+    batches: List[_Batch] = []
+    current: List[_DayItem] = []
+    used = 0
+    max_chars = token_budget * 4
+    for item in items:
+        cost = estimate_tokens(item.render(len(current), max_chars))
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(_Batch(reviewer, current))
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        batches.append(_Batch(reviewer, current))
+    return batches
+
+
+def _build_prompt(batch: _Batch, max_chars: int) -> str:
+    metrics = ", ".join(f"{metric['json_name']}: {metric['description']}" for metric in batch.reviewer["metrics"])
+    items = "\n".join(item.render(index, max_chars) for index, item in enumerate(batch.items))
+    return EVALUATION_PROMPT.format(
+        name=batch.reviewer["name"],
+        description=batch.reviewer["description"],
+        metrics=metrics,
+        items=items,
+    )
+
+
+def weighted_score(metrics: List[Dict[str, Any]], scores: Dict[str, Any]) -> Optional[int]:
+    """Взвешенное по Metric.value среднее оценок 1-10, переведённое в шкалу 0-100."""
+    total = weight = 0.0
+    for metric in metrics:
+        score = scores.get(metric["json_name"])
+        if not isinstance(score, (int, float)):
+            continue
+        score = min(max(float(score), 1.0), 10.0)
+        total += metric["value"] * score
+        weight += metric["value"]
+    if not weight:
+        return None
+    return round(total / weight * 10)
+
+
+def _parse_results(content: str, batch: _Batch) -> List[Dict[str, Any]]:
+    cleaned = re.sub(r"^```json\s*|\s*```$", "", content.strip(), flags=re.IGNORECASE)
+    results = json.loads(cleaned).get("results") or []
+    rows = []
+    for result in results:
+        index = result.get("id")
+        if not isinstance(index, int) or not 0 <= index < len(batch.items):
+            continue
+        value = weighted_score(batch.reviewer["metrics"], result.get("scores") or {})
+        if value is None:
+            continue
+        item = batch.items[index]
+        rows.append(
+            {
+                "date": item.date,
+                "user_id": item.user_id,
+                "value": value,
+                "department_id": item.department_id,
+                "admin_id": item.admin_id,
+            }
+        )
+    return rows
+
+
+def _save(rows: List[Dict[str, Any]], overwrite: bool) -> None:
+    with SessionLocal() as db:
+        upsert(
+            db,
+            StatisticModel,
+            rows,
+            index_elements=["date", "user_id"],
+            update_columns=["value", "department_id", "admin_id"] if overwrite else None,
+        )
+        refresh_statistic_rollups(db, [(row["user_id"], row["date"]) for row in rows])
+        db.commit()
+
+
+async def run_evaluation(
+    date_from: date,
+    date_to: date,
+    *,
+    admin_id: Optional[int] = None,
+    overwrite: bool = False,
+    concurrency: Optional[int] = None,
+) -> EvaluationReport:
+    """Оценивает задачи за [date_from, date_to] и записывает результат в statistics."""
+    global _last_report
+    settings = get_settings()
+    concurrency = concurrency or settings.evaluation_concurrency
+    token_budget = settings.evaluation_prompt_token_budget
+    report = EvaluationReport(date_from=date_from, date_to=date_to)
+    started = time.perf_counter()
+
+    reviewers, work = await run_in_threadpool(_load_work, date_from, date_to, admin_id, overwrite)
+    queue: "asyncio.Queue[_Batch]" = asyncio.Queue()
+    for reviewer_id, items in work.items():
+        reviewer = reviewers.get(reviewer_id)
+        if not reviewer or not reviewer["metrics"]:
+            report.skipped_user_days += len(items)
+            continue
+        for batch in _pack(reviewer, items, token_budget, settings.evaluation_max_items_per_prompt):
+            queue.put_nowait(batch)
+
+    client = get_async_gigachat_client()
+    scored_users = set()
+
+    async def worker() -> None:
+        while True:
+            try:
+                batch = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            report.prompts += 1
+            try:
+                response = await client.chat(_build_prompt(batch, token_budget * 4))
+                rows = _parse_results(response["choices"][0]["message"]["content"], batch)
+                await run_in_threadpool(_save, rows, overwrite)
+            except (GigaChatTimeoutError, CircuitOpenError, httpx.HTTPError, ValueError, KeyError, AttributeError):
+                # Неудачный промпт не прерывает прогон: его дни останутся без оценки
+                # и будут подобраны повторным запуском
+                report.failed_prompts += 1
+                report.skipped_user_days += len(batch.items)
+                continue
+            report.user_days += len(rows)
+            report.skipped_user_days += len(batch.items) - len(rows)
+            scored_users.update(row["user_id"] for row in rows)
+            report.users = len(scored_users)
+
+    await asyncio.gather(*(worker() for _ in range(max(concurrency, 1))))
+    report.elapsed_seconds = time.perf_counter() - started
+    _last_report = report
+    return report
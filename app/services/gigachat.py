@@ -1,13 +1,72 @@
 from base64 import b64encode
+import asyncio
+from contextlib import contextmanager
+import json as json_module
+import random
+import time
 from uuid import uuid4
-from typing import Any, Dict, Optional
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, Optional
 
 import httpx
 
 from app.core.config import get_settings
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.llm_cache import prompt_cache_key
+from app.services.singleflight import AsyncSingleFlight
 
 
-class GigaChatClient:
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class GigaChatTimeoutError(Exception):
+    """Вызов не уложился в дедлайн GIGACHAT_DEADLINE_SECONDS."""
+
+
+def _build_breaker() -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(
+        "GigaChat",
+        window=settings.gigachat_breaker_window,
+        min_calls=settings.gigachat_breaker_min_calls,
+        failure_rate=settings.gigachat_breaker_failure_rate,
+        p95_seconds=settings.gigachat_breaker_p95_seconds,
+        open_seconds=settings.gigachat_breaker_open_seconds,
+        half_open_calls=settings.gigachat_breaker_half_open_calls,
+    )
+
+
+# Один автомат на процесс: все вызовы идут в один и тот же сервис
+gigachat_breaker = _build_breaker()
+
+
+def _is_upstream_failure(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRY_STATUSES
+    return isinstance(exc, (GigaChatTimeoutError, httpx.TransportError))
+
+
+@contextmanager
+def _breaker_guard() -> Iterator[None]:
+    """Пропускает вызов через автомат и записывает его исход и длительность.
+
+    Ошибки клиента (4xx, разбор ответа) сервис не характеризуют и считаются успешными вызовами.
+    """
+    gigachat_breaker.before_call()
+    started = time.monotonic()
+    try:
+        yield
+    except Exception as exc:
+        gigachat_breaker.record(not _is_upstream_failure(exc), time.monotonic() - started)
+        raise
+    except BaseException:
+        gigachat_breaker.abandon()
+        raise
+    gigachat_breaker.record(True, time.monotonic() - started)
+
+
+class _GigaChatBase:
+    """Настройки клиента и разбор OAuth-ответа."""
+
     def __init__(self, base_url: Optional[str] = None, token: Optional[str] = None) -> None:
         settings = get_settings()
         self.base_url = (base_url or settings.gigachat_base_url or "").rstrip("/")
@@ -18,19 +77,34 @@ class GigaChatClient:
         self.model = settings.gigachat_model
         self.verify_ssl = settings.gigachat_verify_ssl
         self.token = token or settings.gigachat_api_pers
+        self.token_refresh_margin = settings.gigachat_token_refresh_margin_seconds
 
         if not self.base_url:
             raise ValueError("GIGACHAT_BASE_URL is required")
 
-    def _headers(self) -> Dict[str, str]:
+        self._access_token: Optional[str] = None
+        self._access_token_expires_at = 0.0
+
+    def _client_options(self) -> Dict[str, Any]:
+        settings = get_settings()
         return {
-            "Authorization": f"Bearer {self._get_access_token()}",
-            "Accept": "application/json",
+            "verify": self.verify_ssl,
+            "http2": settings.gigachat_http2,
+            "timeout": settings.gigachat_timeout_seconds,
+            "limits": httpx.Limits(
+                max_connections=settings.gigachat_max_connections,
+                max_keepalive_connections=settings.gigachat_max_keepalive_connections,
+            ),
         }
 
-    def _get_access_token(self) -> str:
+    def _cached_access_token(self) -> Optional[str]:
         if self.token:
             return self.token
+        if self._access_token and time.time() < self._access_token_expires_at:
+            return self._access_token
+        return None
+
+    def _oauth_request(self) -> tuple[Dict[str, str], Dict[str, str]]:
         if not self.oauth_url:
             raise ValueError("GIGACHAT_OAUTH_URL is required when no token is provided")
         if not self.client_id or not self.client_secret:
@@ -43,41 +117,282 @@ class GigaChatClient:
             "Accept": "application/json",
         }
         data = {"scope": self.scope, "grant_type": "client_credentials"}
-        with httpx.Client(timeout=30.0, verify=self.verify_ssl) as client:
-            response = client.post(self.oauth_url, headers=headers, data=data)
-            response.raise_for_status()
-            payload = response.json()
+        return headers, data
 
+    def _store_access_token(self, payload: Dict[str, Any]) -> str:
         access_token = payload.get("access_token")
         if not access_token:
             raise ValueError("Failed to get access_token from GigaChat")
+        # expires_at приходит в миллисекундах Unix time; без него считаем токен живущим 30 минут
+        expires_at = payload.get("expires_at")
+        expires_at = expires_at / 1000 if expires_at else time.time() + 30 * 60
+        self._access_token = access_token
+        self._access_token_expires_at = expires_at - self.token_refresh_margin
         return access_token
 
-    def request(
+    def _drop_access_token(self) -> None:
+        self._access_token = None
+        self._access_token_expires_at = 0.0
+
+    def _chat_payload(self, prompt: str) -> Dict[str, Any]:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": False,
+        }
+
+
+class AsyncGigaChatClient(_GigaChatBase):
+    """Асинхронный клиент: вызов LLM не занимает поток из пула, пока ждёт ответа.
+
+    Одновременных вызовов не больше max_in_flight, остальные ждут слот в семафоре.
+    Дедлайн покрывает ожидание слота, все повторы и паузы между ними.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, token: Optional[str] = None) -> None:
+        super().__init__(base_url, token)
+        settings = get_settings()
+        self.max_in_flight = settings.gigachat_max_in_flight
+        self.deadline = settings.gigachat_deadline_seconds
+        self.max_retries = settings.gigachat_max_retries
+        self.backoff = settings.gigachat_retry_backoff_seconds
+        self.backoff_max = settings.gigachat_retry_backoff_max_seconds
+        self._http = httpx.AsyncClient(**self._client_options())
+        self._token_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._flights = AsyncSingleFlight()
+        self.hedge = settings.gigachat_hedge_enabled
+        self.hedge_min_delay = settings.gigachat_hedge_min_delay_seconds
+        self._hedges = 0
+        self._hedge_wins = 0
+        self._in_flight = 0
+        self._waiting = 0
+        self._retries = 0
+        self._timeouts = 0
+
+    async def close(self) -> None:
+        await self._http.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "retries": self._retries,
+            "timeouts": self._timeouts,
+            "singleflight": self._flights.stats(),
+            "hedged": self._hedges,
+            "hedge_wins": self._hedge_wins,
+        }
+
+    async def _get_access_token(self) -> str:
+        cached = self._cached_access_token()
+        if cached:
+            return cached
+        async with self._token_lock:
+            cached = self._cached_access_token()
+            if cached:
+                return cached
+            headers, data = self._oauth_request()
+            response = await self._http.post(self.oauth_url, headers=headers, data=data)
+            response.raise_for_status()
+            return self._store_access_token(response.json())
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        # Full jitter: случайная пауза в [0, base * 2^attempt], чтобы повторы не шли волной
+        return random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    async def _send(self, method: str, url: str, *, stream: bool = False, **kwargs: Any) -> httpx.Response:
+        """Запрос с повторами; при stream=True тело не читается, и закрыть ответ должен вызывающий."""
+        attempt = 0
+        refreshed = False
+        while True:
+            response: Optional[httpx.Response] = None
+            try:
+                headers = {"Authorization": f"Bearer {await self._get_access_token()}", "Accept": "application/json"}
+                request = self._http.build_request(method, url, headers=headers, **kwargs)
+                response = await self._http.send(request, stream=stream)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+            else:
+                ok = response.status_code < 400
+                retryable = response.status_code in RETRY_STATUSES and attempt < self.max_retries
+                if ok:
+                    return response
+                await response.aclose()
+                if response.status_code == 401 and not self.token and not refreshed:
+                    refreshed = True
+                    async with self._token_lock:
+                        self._drop_access_token()
+                    continue
+                if not retryable:
+                    response.raise_for_status()
+            self._retries += 1
+            await asyncio.sleep(self._retry_delay(attempt, response))
+            attempt += 1
+
+    async def request(
         self,
         method: str,
         path: str,
         *,
         json: Optional[Dict[str, Any]] = None,
         params: Optional[Dict[str, Any]] = None,
-        timeout: float = 30.0,
+        deadline: Optional[float] = None,
     ) -> Dict[str, Any]:
         url = f"{self.base_url}/{path.lstrip('/')}"
-        with httpx.Client(timeout=timeout, verify=self.verify_ssl) as client:
-            response = client.request(
-                method=method,
-                url=url,
-                headers=self._headers(),
-                json=json,
-                params=params,
-            )
-            response.raise_for_status()
-            return response.json()
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + (self.deadline if deadline is None else deadline)
 
-    def chat(self, prompt: str) -> Dict[str, Any]:
-        payload = {
-            "model": self.model,
-            "messages": [{"role": "user", "content": prompt}],
-            "stream": False,
-        }
-        return self.request("POST", "/chat/completions", json=payload)
+        # Очередь за слотом — местная задержка: в автомат (и в p95 для хеджирования) попадает
+        # только время с начала отправки, как и в chat_stream
+        self._waiting += 1
+        try:
+            await self._within_deadline(self._semaphore.acquire(), expires_at)
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        try:
+            send = self._send_hedged if self.hedge else self._send
+            with _breaker_guard():
+                response = await self._within_deadline(send(method, url, json=json, params=params), expires_at)
+                return response.json()
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def _within_deadline(self, awaitable: Awaitable[Any], expires_at: float) -> Any:
+        try:
+            return await asyncio.wait_for(awaitable, max(expires_at - asyncio.get_running_loop().time(), 0))
+        except asyncio.TimeoutError as exc:
+            self._timeouts += 1
+            raise GigaChatTimeoutError("GigaChat request timed out") from exc
+
+    def _hedge_delay(self) -> float:
+        p95 = gigachat_breaker.latency_percentile(95)
+        return max(self.hedge_min_delay, p95 or 0.0)
+
+    async def _send_hedged(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Если ответа нет дольше p95, отправляет второй такой же запрос и берёт первый успешный.
+
+        Второй запрос занимает собственный слот семафора и отправляется, только если слот свободен:
+        иначе одновременных запросов было бы до 2 * max_in_flight. Незавершённые запросы
+        отменяются при любом выходе, в том числе по дедлайну или отмене вызывающего.
+        """
+        tasks = {asyncio.ensure_future(self._send(method, url, **kwargs))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self._hedge_delay())
+            if not done and not self._semaphore.locked():
+                await self._semaphore.acquire()
+                self._in_flight += 1
+                self._hedges += 1
+                hedge = asyncio.ensure_future(self._send(method, url, **kwargs))
+                hedge.add_done_callback(self._release_hedge_slot)
+                tasks.add(hedge)
+            else:
+                hedge = None
+
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled():
+                    task.exception()
+
+    def _release_hedge_slot(self, _: "asyncio.Future[httpx.Response]") -> None:
+        self._in_flight -= 1
+        self._semaphore.release()
+
+    async def chat_stream(self, prompt: str, *, deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """Потоковая генерация (stream: true): отдаёт фрагменты текста по мере прихода SSE-событий.
+
+        Слот семафора занят, пока поток не дочитан или не закрыт; дедлайн покрывает весь поток.
+        """
+        url = f"{self.base_url}/chat/completions"
+        payload = {**self._chat_payload(prompt), "stream": True}
+        expires_at = asyncio.get_running_loop().time() + (self.deadline if deadline is None else deadline)
+
+        def within_deadline(awaitable: Awaitable[Any]) -> Awaitable[Any]:
+            return self._within_deadline(awaitable, expires_at)
+
+        self._waiting += 1
+        try:
+            await within_deadline(self._semaphore.acquire())
+        finally:
+            self._waiting -= 1
+        self._in_flight += 1
+        try:
+            # Автомат учитывает только установку соединения: длительность потока зависит от объёма ответа
+            with _breaker_guard():
+                response = await within_deadline(self._send("POST", url, json=payload, stream=True))
+            try:
+                lines = response.aiter_lines()
+                while True:
+                    try:
+                        line = await within_deadline(lines.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    choices = json_module.loads(data).get("choices") or []
+                    delta = choices[0].get("delta", {}).get("content") if choices else None
+                    if delta:
+                        yield delta
+            finally:
+                await response.aclose()
+        finally:
+            self._in_flight -= 1
+            self._semaphore.release()
+
+    async def chat(self, prompt: str, *, deadline: Optional[float] = None) -> Dict[str, Any]:
+        # Ожидающие получают результат и дедлайн первого вызова с тем же промптом
+        return await self._flights.do(
+            prompt_cache_key(self.model, prompt),
+            lambda: self.request("POST", "/chat/completions", json=self._chat_payload(prompt), deadline=deadline),
+        )
+
+
+_async_client: Optional[AsyncGigaChatClient] = None
+
+
+def get_async_gigachat_client() -> AsyncGigaChatClient:
+    """Общий асинхронный клиент; создаётся лениво внутри цикла событий приложения."""
+    global _async_client
+    if _async_client is None:
+        _async_client = AsyncGigaChatClient()
+    return _async_client
+
+
+async def close_async_gigachat_client() -> None:
+    global _async_client
+    if _async_client is not None:
+        client, _async_client = _async_client, None
+        await client.close()
+
+
+def gigachat_stats() -> Dict[str, Any]:
+    return {
+        "async": _async_client.stats() if _async_client is not None else None,
+        "breaker": gigachat_breaker.stats(),
+    }
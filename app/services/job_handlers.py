@@ -0,0 +1,60 @@
+from datetime import date
+import os
+from typing import Any, Dict
+
+from app.db.session import SessionLocal
+from app.services.cascade_delete import delete_subtree
+from app.services.data_import import ImportFormat, ImportKind, run_import
+from app.services.evaluation import run_evaluation
+from app.services.job_queue import job_handler, report_progress
+from app.services.reviewer_description import generate_description_data
+
+
+# Обработчики задач очереди; модуль импортируется воркером перед стартом.
+
+
+@job_handler("reviewer_description")
+async def reviewer_description(payload: Dict[str, Any]) -> Dict[str, Any]:
+    data = await generate_description_data(
+        payload["name"], payload["description"], bypass_cache=payload.get("bypass_cache", False)
+    )
+    return {"gigachat_response": data.dict()}
+
+
+@job_handler("evaluate_statistics")
+async def evaluate_statistics(payload: Dict[str, Any]) -> Dict[str, Any]:
+    report = await run_evaluation(
+        date.fromisoformat(payload["date_from"]),
+        date.fromisoformat(payload["date_to"]),
+        admin_id=payload.get("admin_id"),
+        overwrite=payload.get("overwrite", False),
+    )
+    return report.as_dict()
+
+
+@job_handler("cascade_delete")
+def cascade_delete(payload: Dict[str, Any]) -> Dict[str, Any]:
+    with SessionLocal() as db:
+        return delete_subtree(db, payload["scope"], payload["id"], progress=report_progress)
+
+
+def _remove_spooled_upload(payload: Dict[str, Any]) -> None:
+    # Загрузка нужна до окончательного завершения задачи: прерванный импорт возвращается в очередь
+    try:
+        os.remove(payload["path"])
+    except FileNotFoundError:
+        pass
+
+
+@job_handler("import_rows", cleanup=_remove_spooled_upload)
+def import_rows(payload: Dict[str, Any]) -> Dict[str, Any]:
+    with SessionLocal() as db:
+        report = run_import(
+            db,
+            ImportKind(payload["kind"]),
+            ImportFormat(payload["format"]),
+            payload["path"],
+            payload["admin_id"],
+            progress=report_progress,
+        )
+    return report.as_dict()
@@ -0,0 +1,400 @@
+import asyncio
+from contextvars import ContextVar
+from datetime import datetime, timedelta, timezone
+import inspect
+import os
+import random
+import socket
+from threading import Event
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from uuid import uuid4
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models import QueueJob as QueueJobModel
+
+
+# Очередь фоновых задач поверх таблицы queue_jobs: работает на любой БД проекта, включая
+# SQLite, без внешнего брокера. Воркер забирает задачу условным UPDATE (аренда на
+# JOB_QUEUE_LEASE_SECONDS), пока обработчик работает — продлевает аренду (heartbeat).
+# Если воркер умер, аренда истекает и задачу подбирает другой. Ошибка обработчика
+# планирует повтор с экспоненциальной паузой, после max_attempts задача уходит в dead.
+#
+# Потерянная аренда или остановка воркера прерывают обработчик: асинхронный отменяется,
+# синхронный (он работает в потоке) получает JobAbortedError из report_progress на границе
+# пачек. Пока поток синхронного обработчика не завершился, задача в очередь не возвращается:
+# её подберут только после истечения аренды.
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+DEAD = "dead"
+
+Handler = Callable[[Dict[str, Any]], Union[Awaitable[Any], Any]]
+Cleanup = Callable[[Dict[str, Any]], None]
+_handlers: Dict[str, Handler] = {}
+_cleanups: Dict[str, Cleanup] = {}
+# (id задачи, id воркера, флаг прерывания) выполняемой задачи — для report_progress из обработчика
+_current_job: ContextVar[Optional[Tuple[int, str, Event]]] = ContextVar("current_queue_job", default=None)
+
+
+class JobAbortedError(Exception):
+    """Задача больше не принадлежит воркеру: аренда потеряна или воркер останавливается."""
+
+
+def job_handler(kind: str, *, cleanup: Optional[Cleanup] = None) -> Callable[[Handler], Handler]:
+    """Регистрирует обработчик задач вида kind; результат должен сериализоваться в JSON.
+
+    cleanup(payload) вызывается один раз, когда задача окончательно завершилась (succeeded или dead).
+    """
+
+    def decorator(fn: Handler) -> Handler:
+        _handlers[kind] = fn
+        if cleanup is not None:
+            _cleanups[kind] = cleanup
+        return fn
+
+    return decorator
+
+
+def _run_cleanup(kind: str, payload: Dict[str, Any]) -> None:
+    cleanup = _cleanups.get(kind)
+    if cleanup is not None:
+        cleanup(payload)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def find_active_job(db: Session, dedupe_key: str) -> Optional[QueueJobModel]:
+    """Незавершённая (queued или running) задача с ключом dedupe_key."""
+    return db.query(QueueJobModel).filter(QueueJobModel.dedupe_key == dedupe_key).first()
+
+
+def enqueue(
+    db: Session,
+    kind: str,
+    payload: Dict[str, Any],
+    *,
+    admin_id: Optional[int] = None,
+    max_attempts: Optional[int] = None,
+    dedupe_key: Optional[str] = None,
+) -> QueueJobModel:
+    """Ставит задачу в очередь в транзакции вызывающего кода и фиксирует её.
+
+    Если задача с тем же dedupe_key ещё не завершена, новая не создаётся (транзакция
+    откатывается) и возвращается существующая.
+    """
+    if dedupe_key is not None:
+        existing = find_active_job(db, dedupe_key)
+        if existing is not None:
+            db.rollback()
+            return existing
+    now = _utcnow()
+    job = QueueJobModel(
+        kind=kind,
+        payload=payload,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or get_settings().job_queue_max_attempts,
+        run_at=now,
+        admin_id=admin_id,
+        dedupe_key=dedupe_key,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Параллельный запрос успел поставить такую же задачу
+        db.rollback()
+        existing = find_active_job(db, dedupe_key) if dedupe_key is not None else None
+        if existing is None:
+            raise
+        return existing
+    db.refresh(job)
+    return job
+
+
+def requeue(db: Session, job: QueueJobModel) -> QueueJobModel:
+    """Возвращает задачу из dead в очередь с новым запасом попыток."""
+    now = _utcnow()
+    job.status = QUEUED
+    job.attempts = 0
+    job.run_at = now
+    job.error = None
+    job.progress = None
+    job.finished_at = None
+    job.updated_at = now
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _retry_delay(attempts: int) -> float:
+    settings = get_settings()
+    ceiling = min(settings.job_queue_retry_backoff_max_seconds, settings.job_queue_retry_backoff_seconds * 2 ** (attempts - 1))
+    return random.uniform(ceiling / 2, ceiling)
+
+
+def _claim(worker_id: str) -> Optional[Dict[str, Any]]:
+    """Забирает одну готовую задачу; конкурирующие воркеры отсекаются условием в UPDATE."""
+    settings = get_settings()
+    now = _utcnow()
+    ready = or_(
+        and_(QueueJobModel.status == QUEUED, QueueJobModel.run_at <= now),
+        and_(QueueJobModel.status == RUNNING, QueueJobModel.lease_expires_at < now),
+    )
+    with SessionLocal() as db:
+        # Задачи, чей воркер пропал на последней попытке, сразу уходят в dead
+        abandoned = and_(
+            QueueJobModel.status == RUNNING,
+            QueueJobModel.lease_expires_at < now,
+            QueueJobModel.attempts >= QueueJobModel.max_attempts,
+        )
+        expired = db.query(QueueJobModel.id, QueueJobModel.kind, QueueJobModel.payload).filter(abandoned).all()
+        for job_id, kind, payload in expired:
+            buried = db.execute(
+                update(QueueJobModel)
+                .where(QueueJobModel.id == job_id, abandoned)
+                .values(
+                    status=DEAD, error="Lease expired", finished_at=now, updated_at=now, locked_by=None, dedupe_key=None
+                )
+            ).rowcount
+            db.commit()
+            if buried:
+                _run_cleanup(kind, payload)
+
+        candidates = (
+            db.query(QueueJobModel.id)
+            .filter(ready, QueueJobModel.kind.in_(list(_handlers)))
+            .order_by(QueueJobModel.run_at, QueueJobModel.id)
+            .limit(5)
+            .all()
+        )
+        for (job_id,) in candidates:
+            claimed = db.execute(
+                update(QueueJobModel)
+                .where(QueueJobModel.id == job_id, ready)
+                .values(
+                    status=RUNNING,
+                    attempts=QueueJobModel.attempts + 1,
+                    locked_by=worker_id,
+                    lease_expires_at=now + timedelta(seconds=settings.job_queue_lease_seconds),
+                    heartbeat_at=now,
+                    updated_at=now,
+                )
+            ).rowcount
+            db.commit()
+            if claimed:
+                job = db.get(QueueJobModel, job_id)
+                return {"id": job.id, "kind": job.kind, "payload": job.payload, "attempts": job.attempts,
+                        "max_attempts": job.max_attempts}
+    return None
+
+
+def _owned(job_id: int, worker_id: str):
+    return and_(QueueJobModel.id == job_id, QueueJobModel.locked_by == worker_id, QueueJobModel.status == RUNNING)
+
+
+def _heartbeat(job_id: int, worker_id: str) -> bool:
+    now = _utcnow()
+    with SessionLocal() as db:
+        extended = db.execute(
+            update(QueueJobModel)
+            .where(_owned(job_id, worker_id))
+            .values(
+                lease_expires_at=now + timedelta(seconds=get_settings().job_queue_lease_seconds),
+                heartbeat_at=now,
+                updated_at=now,
+            )
+        ).rowcount
+        db.commit()
+    return bool(extended)
+
+
+def _finish(job_id: int, worker_id: str, values: Dict[str, Any]) -> None:
+    values.setdefault("updated_at", _utcnow())
+    with SessionLocal() as db:
+        db.execute(update(QueueJobModel).where(_owned(job_id, worker_id)).values(locked_by=None, **values))
+        db.commit()
+
+
+def report_progress(progress: Dict[str, Any]) -> None:
+    """Сохраняет прогресс выполняемой задачи (виден в GET /api/jobs-queue/{id}); вне обработчика ничего не делает.
+
+    Обработчики вызывают её между пачками, поэтому она же бросает JobAbortedError, если задача
+    прервана: следующая пачка не должна писать, когда задачей может владеть другой воркер.
+    """
+    current = _current_job.get()
+    if current is None:
+        return
+    job_id, worker_id, aborted = current
+    if aborted.is_set():
+        raise JobAbortedError(f"Queue job {job_id} was aborted")
+    with SessionLocal() as db:
+        owned = db.execute(
+            update(QueueJobModel).where(_owned(job_id, worker_id)).values(progress=progress, updated_at=_utcnow())
+        ).rowcount
+        db.commit()
+    if not owned:
+        aborted.set()
+        raise JobAbortedError(f"Queue job {job_id} lease was lost")
+
+
+class JobWorker:
+    """Пул из concurrency корутин, выполняющих задачи очереди в текущем процессе."""
+
+    def __init__(self, concurrency: Optional[int] = None, poll_interval: Optional[float] = None) -> None:
+        settings = get_settings()
+        self.concurrency = concurrency or settings.job_queue_workers
+        self.poll_interval = poll_interval or settings.job_queue_poll_interval_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self.processed = 0
+        self.failed = 0
+        self.lease_lost = 0
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._stopping = asyncio.Event()
+
+    async def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._loop()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self) -> None:
+        await self.start()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "concurrency": self.concurrency,
+            "processed": self.processed,
+            "failed": self.failed,
+            "lease_lost": self.lease_lost,
+        }
+
+    async def _loop(self) -> None:
+        while not self._stopping.is_set():
+            job = await run_in_threadpool(_claim, self.worker_id)
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(job)
+
+    async def _keep_lease(self, job_id: int, aborted: Event, work: "asyncio.Future[Any]", cancellable: bool) -> None:
+        interval = get_settings().job_queue_lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            if not await run_in_threadpool(_heartbeat, job_id, self.worker_id):
+                # Задачу уже забрал другой воркер или перевели в dead: наш обработчик прерывается
+                aborted.set()
+                if cancellable:
+                    work.cancel()
+                return
+
+    async def _execute(self, job: Dict[str, Any]) -> None:
+        handler = _handlers[job["kind"]]
+        cancellable = inspect.iscoroutinefunction(handler)
+        aborted = Event()
+        current = _current_job.set((job["id"], self.worker_id, aborted))
+        try:
+            if cancellable:
+                work = asyncio.ensure_future(handler(job["payload"]))
+            else:
+                work = asyncio.ensure_future(run_in_threadpool(handler, job["payload"]))
+        finally:
+            _current_job.reset(current)
+        # Исход обработчика, досрочно брошенного воркером, всё равно нужно забрать
+        work.add_done_callback(lambda done: done.cancelled() or done.exception())
+        heartbeat = asyncio.create_task(self._keep_lease(job["id"], aborted, work, cancellable))
+        try:
+            await asyncio.wait({work})
+        except asyncio.CancelledError:
+            aborted.set()
+            heartbeat.cancel()
+            if cancellable and not work.done():
+                work.cancel()
+                await asyncio.wait({work})
+            if not work.done():
+                # Поток обработчика ещё пишет: задача остаётся за воркером, пока не истечёт
+                # аренда, а поток остановится на ближайшем report_progress
+                raise
+            if work.cancelled() or isinstance(work.exception(), JobAbortedError):
+                # Остановка воркера: возвращаем задачу в очередь, попытка не засчитывается
+                await run_in_threadpool(
+                    _finish, job["id"], self.worker_id,
+                    {"status": QUEUED, "attempts": job["attempts"] - 1, "run_at": _utcnow(), "lease_expires_at": None},
+                )
+            else:
+                await self._record(job, work)
+            raise
+        finally:
+            heartbeat.cancel()
+
+        if aborted.is_set():
+            # Аренда потеряна: задачей владеет другой воркер или она уже в dead, исход не записываем
+            self.lease_lost += 1
+            return
+        await self._record(job, work)
+
+    async def _record(self, job: Dict[str, Any], work: "asyncio.Future[Any]") -> None:
+        exc = work.exception()
+        now = _utcnow()
+        if exc is not None:
+            self.failed += 1
+            error = f"{type(exc).__name__}: {exc}"
+            if job["attempts"] >= job["max_attempts"]:
+                values = {
+                    "status": DEAD, "error": error, "finished_at": now, "lease_expires_at": None, "dedupe_key": None,
+                }
+            else:
+                retry_at = now + timedelta(seconds=_retry_delay(job["attempts"]))
+                values = {"status": QUEUED, "error": error, "run_at": retry_at, "lease_expires_at": None}
+        else:
+            self.processed += 1
+            values = {
+                "status": SUCCEEDED, "result": work.result(), "error": None, "finished_at": now,
+                "lease_expires_at": None, "dedupe_key": None,
+            }
+        await run_in_threadpool(_finish, job["id"], self.worker_id, values)
+        if values["status"] != QUEUED:
+            await run_in_threadpool(_run_cleanup, job["kind"], job["payload"])
+
+
+_worker: Optional[JobWorker] = None
+
+
+async def start_in_process_worker() -> None:
+    global _worker
+    import app.services.job_handlers  # noqa: F401  регистрирует обработчики
+
+    if get_settings().job_queue_in_process and _worker is None:
+        _worker = JobWorker()
+        await _worker.start()
+
+
+async def stop_in_process_worker() -> None:
+    global _worker
+    if _worker is not None:
+        worker, _worker = _worker, None
+        await worker.stop()
+
+
+def job_queue_stats() -> Optional[Dict[str, Any]]:
+    return _worker.stats() if _worker is not None else None
@@ -0,0 +1,69 @@
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ArrayItemStreamParser:
+    """Инкрементальный разбор JSON-документа, приходящего кусками.
+
+    feed() принимает очередной фрагмент текста и возвращает объекты массива array_key
+    верхнего уровня, которые закрылись в этом фрагменте. Текст вне JSON (например,
+    markdown-ограждение ```json) игнорируется.
+    """
+
+    def __init__(self, array_key: str) -> None:
+        self.array_key = array_key
+        self._text = ""
+        self._position = 0
+        self._stack: List[Tuple[str, Optional[str], int]] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._key: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        self._text += chunk
+        items: List[Dict[str, Any]] = []
+        text = self._text
+        for index in range(self._position, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._last_string = text[self._string_start + 1:index]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char == ":":
+                self._key = self._last_string
+            elif char in "{[":
+                self._stack.append((char, self._key, index))
+                self._key = None
+            elif char in "}]" and self._stack:
+                opened, _, start = self._stack.pop()
+                if (
+                    char == "}"
+                    and opened == "{"
+                    and len(self._stack) == 2
+                    and self._stack[1][0] == "["
+                    and self._stack[1][1] == self.array_key
+                ):
+                    try:
+                        items.append(json.loads(text[start:index + 1]))
+                    except json.JSONDecodeError:
+                        pass
+                self._key = None
+            elif char == ",":
+                self._key = None
+        self._position = len(text)
+        return items
+
+    @property
+    def text(self) -> str:
+        return self._text
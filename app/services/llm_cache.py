@@ -0,0 +1,166 @@
+from hashlib import sha256
+import json
+import sqlite3
+from threading import Lock
+import time
+from typing import Any, Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+
+
+def prompt_cache_key(model: str, prompt: str) -> str:
+    """Ключ кэша: хэш модели и промпта с нормализованными пробелами."""
+    normalized = " ".join(prompt.split())
+    return sha256(f"{model}\n{normalized}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Двухуровневый кэш ответов LLM: LRU в памяти процесса и SQLite-файл на диске.
+
+    Дисковый уровень переживает перезапуск и общий для всех воркеров на машине.
+    Значения — JSON-совместимые dict; класть сюда стоит только успешно разобранные ответы.
+    Истёкшие записи остаются на диске ещё stale_ttl секунд: их отдаёт только get_stale.
+    """
+
+    def __init__(
+        self, path: str, ttl: float, memory_size: int, disk_max_entries: int, stale_ttl: float = 0.0
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.disk_max_entries = disk_max_entries
+        self.memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+        self.stale_hits = 0
+        self._schema_lock = Lock()
+        self._schema_ready = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.execute(
+                        "CREATE TABLE IF NOT EXISTS llm_response_cache ("
+                        "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                        "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                    )
+                    connection.execute(
+                        "CREATE INDEX IF NOT EXISTS ix_llm_response_cache_accessed_at "
+                        "ON llm_response_cache (accessed_at)"
+                    )
+                    connection.commit()
+                    self._schema_ready = True
+        return connection
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        value = self.memory.get(key)
+        if value is not None or not self.path:
+            return value
+
+        now = time.time()
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT value, expires_at FROM llm_response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.disk_misses += 1
+                return None
+            connection.execute("UPDATE llm_response_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            connection.commit()
+        finally:
+            connection.close()
+
+        self.disk_hits += 1
+        value = json.loads(row[0])
+        self.memory.set(key, value, ttl=row[1] - now)
+        return value
+
+    def get_stale(self, key: str) -> Optional[Dict[str, Any]]:
+        """Последнее сохранённое значение, даже истёкшее (но не старше stale_ttl после истечения)."""
+        value = self.get(key)
+        if value is not None or not self.enabled or not self.path:
+            return value
+
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT value FROM llm_response_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time() - self.stale_ttl),
+            ).fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        self.stale_hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        self.memory.set(key, value)
+        if not self.path:
+            return
+
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO llm_response_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + self.ttl, now),
+            )
+            connection.execute("DELETE FROM llm_response_cache WHERE expires_at <= ?", (now - self.stale_ttl,))
+            # Вытесняем давно не читанные записи сверх лимита
+            evicted = connection.execute(
+                "DELETE FROM llm_response_cache WHERE key IN ("
+                "SELECT key FROM llm_response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.disk_max_entries,),
+            ).rowcount
+            connection.commit()
+        finally:
+            connection.close()
+        self.disk_evictions += max(evicted, 0)
+
+    def invalidate(self, key: str) -> None:
+        self.memory.invalidate(key)
+        if self.path:
+            connection = self._connect()
+            try:
+                connection.execute("DELETE FROM llm_response_cache WHERE key = ?", (key,))
+                connection.commit()
+            finally:
+                connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.memory.stats(),
+            "disk": {
+                "path": self.path or None,
+                "max_entries": self.disk_max_entries,
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "evictions": self.disk_evictions,
+                "stale_hits": self.stale_hits,
+            },
+        }
+
+
+_settings = get_settings()
+description_cache = ResponseCache(
+    path=_settings.description_cache_path,
+    ttl=_settings.description_cache_ttl_seconds,
+    memory_size=_settings.description_cache_memory_size,
+    disk_max_entries=_settings.description_cache_disk_max_entries,
+    stale_ttl=_settings.description_cache_stale_seconds,
+)
@@ -0,0 +1,78 @@
+import json
+import re
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+
+from app.api.schemas.reviewer import ReviewerDescriptionData
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.gigachat import get_async_gigachat_client
+from app.services.llm_cache import description_cache, prompt_cache_key
+
+
+DESCRIPTION_PROMPT = (
+    # Метрика: значение 1-10, json_название (id поля), имя для пользователя, короткое описание что отслеживает
+    "Сформируй структурированное описание оценщика по короткому описанию. "
+    "Ответ верни строго в JSON без markdown и без пояснений. Количество metrics должно быть от 4 и более. "
+    "Поле value должно быть числом от 1 до 10. (оно отображает ценность и приоритетность метрики, значит чем больше значение value тем ценне метрика)"
+    "Структура: {"
+    "\"name\": string, "
+    "\"summary\": string, "
+    "\"what_is_evaluated\": [string], "
+    "\"metrics\": ["
+    "{"
+    "\"value\": number, "
+    "\"json_name\": string, "
+    "\"display_name\": string, "
+    "\"description\": string"
+    "}"
+    "],"
+    "}."
+)
+
+
+class DescriptionFormatError(ValueError):
+    """Ответ модели не разобрался как ReviewerDescriptionData."""
+
+
+def build_description_prompt(name: str, description: str) -> str:
+    return f"{DESCRIPTION_PROMPT} Название оценщика: {name.strip()}. Короткое описание оценщика: {description.strip()}."
+
+
+def description_cache_key(prompt: str) -> str:
+    return prompt_cache_key(get_async_gigachat_client().model, prompt)
+
+
+def parse_description(content: str) -> ReviewerDescriptionData:
+    cleaned = re.sub(r"^```json\s*|\s*```$", "", content.strip(), flags=re.IGNORECASE)
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError as exc:
+        raise DescriptionFormatError(f"Invalid JSON from GigaChat: {exc}") from exc
+    try:
+        return ReviewerDescriptionData(**data)
+    except (TypeError, ValidationError) as exc:
+        raise DescriptionFormatError(f"Unexpected description format from GigaChat: {exc}") from exc
+
+
+async def generate_description_data(name: str, description: str, *, bypass_cache: bool = False) -> ReviewerDescriptionData:
+    """Описание оценщика через кэш ответов; в кэш попадают только разобранные ответы."""
+    prompt = build_description_prompt(name, description)
+    key = description_cache_key(prompt)
+    if not bypass_cache:
+        cached = await run_in_threadpool(description_cache.get, key)
+        if cached is not None:
+            return ReviewerDescriptionData(**cached)
+
+    try:
+        response = await get_async_gigachat_client().chat(prompt)
+    except CircuitOpenError:
+        # Сервис недоступен: отдаём последний сохранённый удачный ответ, даже истёкший
+        # и даже если просили без кэша
+        cached = await run_in_threadpool(description_cache.get_stale, key)
+        if cached is None:
+            raise
+        return ReviewerDescriptionData(**cached)
+    data = parse_description(response["choices"][0]["message"]["content"])
+    await run_in_threadpool(description_cache.set, key, data.dict())
+    return data
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+# Single-flight: одновременные вызовы с одинаковым ключом ждут один общий вызов и получают
+# его результат или исключение. Результат отдаётся всем ожидающим как есть, без копирования.
+
+
+class AsyncSingleFlight:
+    """Объединение одинаковых вызовов внутри цикла событий.
+
+    Общий вызов выполняется отдельной задачей: отмена одного из ожидающих (например,
+    клиент закрыл соединение) не прерывает запрос для остальных.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Забираем исключение, даже если все ожидающие уже отменены, иначе asyncio пишет предупреждение
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._tasks), "leaders": self.leaders, "coalesced": self.coalesced}
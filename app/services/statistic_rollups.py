@@ -0,0 +1,138 @@
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Date, delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models import Statistic as StatisticModel, StatisticRollup as StatisticRollupModel
+
+
+# statistic_rollups хранит по строке на (период, корзина, сотрудник): недели с понедельника
+# и календарные месяцы. Дневной свёртки нет: statistics уникальна по (date, user_id), и день
+# сотрудника — это одна строка исходной таблицы.
+#
+# Любая запись в statistics должна вызвать refresh_statistic_rollups с затронутыми парами
+# (user_id, date) в той же транзакции. Затронутые корзины пересчитываются целиком из
+# statistics по индексу (user_id, date): это не больше 31 строки на сотрудника, зато min/max
+# остаются точными при изменении и удалении значений, а upsert не требует знать старое значение.
+# Полная пересборка — scripts/rebuild_statistic_rollups.py.
+
+WEEK = "week"
+MONTH = "month"
+ROLLUP_PERIODS = (WEEK, MONTH)
+
+
+def bucket_start(day: date, period: str) -> date:
+    if period == WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def next_bucket_start(start: date, period: str) -> date:
+    if period == WEEK:
+        return start + timedelta(days=7)
+    if period == MONTH:
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def _refresh_bucket(
+    db: Session,
+    period: str,
+    start: date,
+    *,
+    user_ids: Optional[Iterable[int]] = None,
+    admin_id: Optional[int] = None,
+) -> None:
+    end = next_bucket_start(start, period)
+    rollup_scope = [StatisticRollupModel.period == period, StatisticRollupModel.bucket_start == start]
+    source_scope = [StatisticModel.date >= start, StatisticModel.date < end]
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        rollup_scope.append(StatisticRollupModel.user_id.in_(user_ids))
+        source_scope.append(StatisticModel.user_id.in_(user_ids))
+    if admin_id is not None:
+        rollup_scope.append(StatisticRollupModel.admin_id == admin_id)
+        source_scope.append(StatisticModel.admin_id == admin_id)
+
+    db.execute(
+        delete(StatisticRollupModel).where(*rollup_scope).execution_options(synchronize_session=False)
+    )
+    db.execute(
+        insert(StatisticRollupModel).from_select(
+            [
+                StatisticRollupModel.period,
+                StatisticRollupModel.bucket_start,
+                StatisticRollupModel.user_id,
+                StatisticRollupModel.department_id,
+                StatisticRollupModel.admin_id,
+                StatisticRollupModel.value_count,
+                StatisticRollupModel.value_sum,
+                StatisticRollupModel.value_min,
+                StatisticRollupModel.value_max,
+            ],
+            select(
+                literal(period),
+                literal(start, Date),
+                StatisticModel.user_id,
+                StatisticModel.department_id,
+                StatisticModel.admin_id,
+                func.count(StatisticModel.value),
+                func.sum(StatisticModel.value),
+                func.min(StatisticModel.value),
+                func.max(StatisticModel.value),
+            )
+            .where(*source_scope)
+            .group_by(StatisticModel.user_id, StatisticModel.department_id, StatisticModel.admin_id),
+        )
+    )
+
+
+def refresh_statistic_rollups(db: Session, keys: Iterable[Tuple[int, date]]) -> None:
+    """Пересчитывает корзины, затронутые парами (user_id, date); вызывать до commit записи."""
+    keys = list(keys)
+    if not keys:
+        return
+    db.flush()
+    for period in ROLLUP_PERIODS:
+        buckets: Dict[date, set] = {}
+        for user_id, day in keys:
+            buckets.setdefault(bucket_start(day, period), set()).add(user_id)
+        for start, user_ids in buckets.items():
+            _refresh_bucket(db, period, start, user_ids=user_ids)
+
+
+def rebuild_statistic_rollups(
+    db: Session,
+    *,
+    admin_id: Optional[int] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    progress: Optional[Callable[[Dict[str, int]], None]] = None,
+) -> Dict[str, int]:
+    """Пересобирает корзины за период (по умолчанию — за всё время), по транзакции на корзину."""
+    if date_from is None or date_to is None:
+        bounds = []
+        for column, model in ((StatisticModel.date, StatisticModel), (StatisticRollupModel.bucket_start, StatisticRollupModel)):
+            query = select(func.min(column), func.max(column))
+            if admin_id is not None:
+                query = query.where(model.admin_id == admin_id)
+            bounds.extend(value for value in db.execute(query).one() if value is not None)
+        if not bounds:
+            return {period: 0 for period in ROLLUP_PERIODS}
+        date_from = date_from or min(bounds)
+        date_to = date_to or max(bounds)
+
+    rebuilt = {period: 0 for period in ROLLUP_PERIODS}
+    for period in ROLLUP_PERIODS:
+        start = bucket_start(date_from, period)
+        while start <= date_to:
+            _refresh_bucket(db, period, start, admin_id=admin_id)
+            db.commit()
+            rebuilt[period] += 1
+            if progress is not None:
+                progress(dict(rebuilt))
+            start = next_bucket_start(start, period)
+    return rebuilt
@@ -0,0 +1,270 @@
+from datetime import date, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, case, cast, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Department as DepartmentModel,
+    Job as JobModel,
+    Statistic as StatisticModel,
+    StatisticRollup as StatisticRollupModel,
+    User as UserModel,
+)
+from app.services.statistic_rollups import ROLLUP_PERIODS, bucket_start, next_bucket_start
+
+
+# Агрегаты statistics считаются в БД: в ответ уходит по строке на группу, а не исходные строки.
+# Выборка всегда ограничена администратором (денормализованный statistics.admin_id) и
+# диапазоном дат, поэтому идёт по индексу ix_statistics_admin_id_date.
+#
+# Без перцентилей целые недели и месяцы диапазона читаются из statistic_rollups, а из
+# statistics — только неполные корзины по краям; обе части сводятся одним UNION ALL.
+
+
+class Dimension(str, Enum):
+    user = "user"
+    job = "job"
+    department = "department"
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class Aggregate(str, Enum):
+    count = "count"
+    sum = "sum"
+    avg = "avg"
+    min = "min"
+    max = "max"
+    p50 = "p50"
+    p75 = "p75"
+    p90 = "p90"
+    p95 = "p95"
+    p99 = "p99"
+
+
+PERIODS = (Dimension.day, Dimension.week, Dimension.month)
+DEFAULT_AGGREGATES = (Aggregate.count, Aggregate.sum, Aggregate.avg, Aggregate.min, Aggregate.max)
+
+
+def period_start(column, unit: Dimension, dialect: str):
+    """Начало дня, недели (с понедельника) или месяца для колонки-даты на диалекте dialect."""
+    if unit == Dimension.day:
+        return column
+    if dialect == "postgresql":
+        return cast(func.date_trunc(unit.value, column), Date)
+    if dialect in ("mysql", "mariadb"):
+        if unit == Dimension.week:
+            return func.subdate(column, func.weekday(column))
+        return cast(func.date_format(column, "%Y-%m-01"), Date)
+    # SQLite: даты хранятся строками ISO, результат — тоже строка YYYY-MM-DD
+    if unit == Dimension.week:
+        return func.date(column, "weekday 0", "-6 days")
+    return func.strftime("%Y-%m-01", column)
+
+
+def _percentile(aggregate: Aggregate) -> Optional[int]:
+    return int(aggregate.value[1:]) if aggregate.value.startswith("p") else None
+
+
+def _group_columns(dimensions: Sequence[Dimension], dialect: str, model=StatisticModel) -> Tuple[List[Any], set]:
+    """Колонки группировки (с подписями для ответа) и таблицы, которые нужно присоединить.
+
+    model — statistics или statistic_rollups; у свёрток период группировки совпадает
+    с периодом корзины, поэтому это просто bucket_start.
+    """
+    columns = []
+    joins = set()
+    for dimension in dimensions:
+        if dimension == Dimension.user:
+            joins.add(UserModel)
+            columns += [model.user_id.label("user_id"), UserModel.name.label("user_name")]
+        elif dimension == Dimension.job:
+            joins.update((UserModel, JobModel))
+            columns += [UserModel.job_id.label("job_id"), JobModel.name.label("job_name")]
+        elif dimension == Dimension.department:
+            joins.add(DepartmentModel)
+            columns += [model.department_id.label("department_id"), DepartmentModel.name.label("department_name")]
+        elif model is StatisticRollupModel:
+            columns.append(model.bucket_start.label("period"))
+        else:
+            columns.append(period_start(model.date, dimension, dialect).label("period"))
+    return columns, joins
+
+
+def _scope(
+    model,
+    joins: set,
+    admin_id: int,
+    user_id: Optional[int],
+    job_id: Optional[int],
+    department_id: Optional[int],
+) -> Tuple[Any, List[Any]]:
+    """FROM с нужными join и условия по администратору и фильтрам (без дат)."""
+    if job_id is not None:
+        joins = joins | {UserModel}
+    source = model.__table__
+    if UserModel in joins:
+        source = source.join(UserModel, UserModel.id == model.user_id)
+    if JobModel in joins:
+        source = source.join(JobModel, JobModel.id == UserModel.job_id)
+    if DepartmentModel in joins:
+        source = source.join(DepartmentModel, DepartmentModel.id == model.department_id)
+
+    conditions = [model.admin_id == admin_id]
+    if user_id is not None:
+        conditions.append(model.user_id == user_id)
+    if job_id is not None:
+        conditions.append(UserModel.job_id == job_id)
+    if department_id is not None:
+        conditions.append(model.department_id == department_id)
+    return source, conditions
+
+
+def _rollup_window(
+    dimensions: Sequence[Dimension], aggregates: Sequence[Aggregate], date_from: date, date_to: date
+) -> Optional[Tuple[str, date, date]]:
+    """Период свёрток и полуинтервал целых корзин внутри [date_from, date_to], если свёртки применимы."""
+    if any(_percentile(aggregate) is not None for aggregate in aggregates):
+        return None
+    periods = [dimension.value for dimension in dimensions if dimension in PERIODS]
+    # Группировка по периоду требует корзин того же периода; без неё берётся самая крупная
+    for period in periods or ROLLUP_PERIODS[::-1]:
+        if period not in ROLLUP_PERIODS:
+            continue
+        start = bucket_start(date_from, period)
+        if start < date_from:
+            start = next_bucket_start(start, period)
+        end = bucket_start(date_to + timedelta(days=1), period)
+        if start < end:
+            return period, start, end
+    return None
+
+
+def _serialize(row: Dict[str, Any]) -> Dict[str, Any]:
+    period = row.get("period")
+    if isinstance(period, str):
+        row["period"] = date.fromisoformat(period[:10])
+    if row.get("avg") is not None:
+        row["avg"] = float(row["avg"])
+    return row
+
+
+def aggregate_statistics(
+    db: Session,
+    admin_id: int,
+    date_from: date,
+    date_to: date,
+    dimensions: Sequence[Dimension],
+    aggregates: Sequence[Aggregate],
+    *,
+    user_id: Optional[int] = None,
+    job_id: Optional[int] = None,
+    department_id: Optional[int] = None,
+    limit: int = 1000,
+) -> Tuple[List[Dict[str, Any]], bool, str]:
+    """Возвращает группы (не больше limit), признак, что групп было больше, и источник данных."""
+    dialect = db.get_bind().dialect.name
+    filters = {"admin_id": admin_id, "user_id": user_id, "job_id": job_id, "department_id": department_id}
+    columns, joins = _group_columns(dimensions, dialect)
+    source, conditions = _scope(StatisticModel, joins, **filters)
+    window = _rollup_window(dimensions, aggregates, date_from, date_to)
+
+    percentiles = [aggregate for aggregate in aggregates if _percentile(aggregate) is not None]
+    if window is not None:
+        period, start, end = window
+        origin = f"statistic_rollups:{period}"
+        rollup_columns, rollup_joins = _group_columns(dimensions, dialect, StatisticRollupModel)
+        rollup_source, rollup_conditions = _scope(StatisticRollupModel, rollup_joins, **filters)
+        parts = [
+            select(
+                *rollup_columns,
+                StatisticRollupModel.value_count.label("n"),
+                StatisticRollupModel.value_sum.label("total"),
+                StatisticRollupModel.value_min.label("low"),
+                StatisticRollupModel.value_max.label("high"),
+            )
+            .select_from(rollup_source)
+            .where(
+                *rollup_conditions,
+                StatisticRollupModel.period == period,
+                StatisticRollupModel.bucket_start >= start,
+                StatisticRollupModel.bucket_start < end,
+            )
+        ]
+        # Неполные корзины в начале и в конце диапазона — из исходных строк
+        for low, high in ((date_from, start), (end, date_to + timedelta(days=1))):
+            if low < high:
+                parts.append(
+                    select(
+                        *columns,
+                        literal(1).label("n"),
+                        StatisticModel.value.label("total"),
+                        StatisticModel.value.label("low"),
+                        StatisticModel.value.label("high"),
+                    )
+                    .select_from(source)
+                    .where(*conditions, StatisticModel.date >= low, StatisticModel.date < high)
+                )
+        merged = union_all(*parts).subquery()
+        keys = [merged.c[column.key] for column in columns]
+        functions = {
+            Aggregate.count: func.coalesce(func.sum(merged.c.n), 0),
+            Aggregate.sum: func.sum(merged.c.total),
+            Aggregate.avg: func.sum(merged.c.total) * 1.0 / func.sum(merged.c.n),
+            Aggregate.min: func.min(merged.c.low),
+            Aggregate.max: func.max(merged.c.high),
+        }
+        extra = {}
+        query = select(*keys).select_from(merged)
+    else:
+        origin = "statistics"
+        conditions += [StatisticModel.date >= date_from, StatisticModel.date <= date_to]
+        if percentiles:
+            # Перцентиль по ближайшему рангу: наименьшее значение, чей номер в группе rn
+            # удовлетворяет rn * 100 >= p * cnt. Целочисленно и переносимо между диалектами.
+            partition = [column.element for column in columns] or None
+            inner = (
+                select(
+                    *columns,
+                    StatisticModel.value.label("value"),
+                    func.row_number().over(partition_by=partition, order_by=StatisticModel.value).label("rn"),
+                    func.count().over(partition_by=partition).label("cnt"),
+                )
+                .select_from(source)
+                .where(*conditions)
+                .subquery()
+            )
+            keys = [inner.c[column.key] for column in columns]
+            value = inner.c.value
+            extra = {
+                aggregate.value: func.min(case((inner.c.rn * 100 >= _percentile(aggregate) * inner.c.cnt, value)))
+                for aggregate in percentiles
+            }
+            query = select(*keys).select_from(inner)
+        else:
+            keys = columns
+            value = StatisticModel.value
+            extra = {}
+            query = select(*keys).select_from(source).where(*conditions)
+        functions = {
+            Aggregate.count: func.count(value),
+            Aggregate.sum: func.sum(value),
+            Aggregate.avg: func.avg(value),
+            Aggregate.min: func.min(value),
+            Aggregate.max: func.max(value),
+        }
+
+    selected = [
+        (functions[aggregate] if aggregate in functions else extra[aggregate.value]).label(aggregate.value)
+        for aggregate in aggregates
+    ]
+    query = query.add_columns(*selected)
+    if keys:
+        query = query.group_by(*keys).order_by(*keys)
+
+    rows = db.execute(query.limit(limit + 1)).mappings().all()
+    groups = [_serialize(dict(row)) for row in rows[:limit]]
+    return groups, len(rows) > limit, origin
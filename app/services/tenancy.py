@@ -0,0 +1,55 @@
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import (
+    Department as DepartmentModel,
+    Job as JobModel,
+    Statistic as StatisticModel,
+    StatisticRollup as StatisticRollupModel,
+    Task as TaskModel,
+    User as UserModel,
+)
+
+
+# users, tasks, statistics и statistic_rollups хранят копии department_id/admin_id, чтобы списки
+# и проверки владения фильтровались по одной индексированной колонке без цепочки JOIN до departments.
+# Любая запись, меняющая эти связи, должна пройти через функции ниже в той же транзакции.
+
+
+def assign_user_tenant(user: UserModel, job: JobModel) -> None:
+    user.department_id = job.department_id
+    user.admin_id = job.department.admin_id
+
+
+def assign_row_tenant(row: TaskModel | StatisticModel, user: UserModel) -> None:
+    row.department_id = user.department_id
+    row.admin_id = user.admin_id
+
+
+def propagate_user_tenant(db: Session, user: UserModel) -> None:
+    """Переносит department_id/admin_id пользователя на его задачи, статистику и её свёртки."""
+    for model in (TaskModel, StatisticModel, StatisticRollupModel):
+        db.execute(
+            update(model)
+            .where(model.user_id == user.id)
+            .values(department_id=user.department_id, admin_id=user.admin_id)
+            .execution_options(synchronize_session=False)
+        )
+
+
+def propagate_job_tenant(db: Session, job: JobModel, department: DepartmentModel) -> None:
+    """Переносит новый отдел должности на всех её сотрудников, их задачи, статистику и её свёртки."""
+    db.execute(
+        update(UserModel)
+        .where(UserModel.job_id == job.id)
+        .values(department_id=department.id, admin_id=department.admin_id)
+        .execution_options(synchronize_session=False)
+    )
+    user_ids = select(UserModel.id).where(UserModel.job_id == job.id).scalar_subquery()
+    for model in (TaskModel, StatisticModel, StatisticRollupModel):
+        db.execute(
+            update(model)
+            .where(model.user_id.in_(user_ids))
+            .values(department_id=department.id, admin_id=department.admin_id)
+            .execution_options(synchronize_session=False)
+        )
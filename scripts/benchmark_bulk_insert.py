@@ -0,0 +1,118 @@
+"""Пропускная способность пакетной записи против поштучной.
+
+Поднимает приложение на временной SQLite-базе и в течение --duration секунд пишет данные:
+    single   POST /api/tasks по одной задаче
+    bulk     POST /api/tasks/bulk по --batch-size задач
+    upsert   PUT /api/statistics/bulk по --batch-size значений (часть ключей повторяется — обновления)
+затем печатает запросы/с, перцентили задержки и главное — записей в секунду.
+Запуск из корня проекта:
+    python scripts/benchmark_bulk_insert.py --concurrency 8 --duration 10 --batch-size 200
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import httpx  # noqa: E402
+
+from scripts.loadgen import Server, migrate, print_report, run_load  # noqa: E402
+
+
+SCENARIOS = ("single", "bulk", "upsert")
+
+
+def _seed(base_url: str, users: int) -> tuple[dict, list[int]]:
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        client.post("/api/admins", json={"email": "bench@example.com", "full_name": "Bench", "password": "bench"})
+        token = client.post("/api/auth/login", json={"email": "bench@example.com", "password": "bench"}).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        department = client.post("/api/departments", json={"name": "Bench"}, headers=headers).json()
+        job = client.post("/api/jobs", json={"name": "Bench", "department_id": department["id"]}, headers=headers).json()
+        user_ids = [
+            client.post("/api/users", json={"name": f"Bench {index}", "job_id": job["id"]}, headers=headers).json()["id"]
+            for index in range(users)
+        ]
+    return headers, user_ids
+
+
+def _task(user_ids: list[int], n: int) -> dict:
+    return {
+        "user_id": user_ids[n % len(user_ids)],
+        "date": f"2024-{n % 12 + 1:02d}-{n % 28 + 1:02d}",
+        "description": f"bench task {n}",
+    }
+
+
+def _request_factory(scenario: str, headers: dict, user_ids: list[int], batch_size: int):
+    async def request(client: httpx.AsyncClient, n: int) -> httpx.Response:
+        if scenario == "single":
+            return await client.post("/api/tasks", json=_task(user_ids, n), headers=headers)
+        if scenario == "bulk":
+            items = [_task(user_ids, n * batch_size + index) for index in range(batch_size)]
+            return await client.post("/api/tasks/bulk", json={"items": items}, headers=headers)
+        items = []
+        for index in range(batch_size):
+            task = _task(user_ids, n * batch_size + index)
+            items.append({"user_id": task["user_id"], "date": task["date"], "value": index % 100})
+        return await client.put("/api/statistics/bulk", json={"items": items}, headers=headers)
+
+    return request
+
+
+async def _run(args: argparse.Namespace, workdir: str):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    env.pop("DATABASE_ASYNC_URL", None)
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    migrate(env)
+
+    results = []
+    with Server(env) as server:
+        headers, user_ids = _seed(server.base_url, args.users)
+        for scenario in args.scenarios:
+            batch = 1 if scenario == "single" else args.batch_size
+            result = await run_load(
+                f"{scenario} x{batch} (c={args.concurrency})",
+                _request_factory(scenario, headers, user_ids, args.batch_size),
+                base_url=server.base_url,
+                concurrency=args.concurrency,
+                duration=args.duration,
+            )
+            results.append((result, batch))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument(
+        "--app-env", action="append", default=[], metavar="KEY=VALUE",
+        help="Переопределить настройку приложения, например DB_ASYNC=true",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="daily_crm_bulk_bench_") as workdir:
+        results = asyncio.run(_run(args, workdir))
+
+    print_report([result for result, _ in results])
+    print()
+    print(f"{'scenario':<32}{'rows/s':>10}")
+    for result, batch in results:
+        rows_per_second = (result.requests - result.errors) * batch / result.duration if result.duration else 0.0
+        print(f"{result.name:<32}{rows_per_second:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Сравнение синхронного и асинхронного режимов работы с БД (DB_ASYNC=false/true).
+
+Для каждого режима поднимает uvicorn на отдельной временной SQLite-базе, наполняет её
+и гоняет смешанную нагрузку на чтение. Запуск из корня проекта:
+    python scripts/benchmark_db_modes.py --concurrency 64 --duration 15
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import httpx  # noqa: E402
+
+from scripts.loadgen import Server, migrate, print_report, run_load  # noqa: E402
+
+
+def _seed(base_url: str, tasks: int) -> tuple[dict, list[int]]:
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        client.post("/api/admins", json={"email": "bench@example.com", "full_name": "Bench", "password": "bench"})
+        token = client.post("/api/auth/login", json={"email": "bench@example.com", "password": "bench"}).json()
+        headers = {"Authorization": f"Bearer {token['access_token']}"}
+        department = client.post("/api/departments", json={"name": "Bench"}, headers=headers).json()
+        job = client.post("/api/jobs", json={"name": "Bench", "department_id": department["id"]}, headers=headers).json()
+        user = client.post("/api/users", json={"name": "Bench", "job_id": job["id"]}, headers=headers).json()
+        task_ids = []
+        for index in range(tasks):
+            payload = {
+                "user_id": user["id"],
+                "date": f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d}",
+                "description": "bench",
+            }
+            task_ids.append(client.post("/api/tasks", json=payload, headers=headers).json()["id"])
+    return headers, task_ids
+
+
+async def _bench_mode(mode: str, args: argparse.Namespace, workdir: str):
+    env = dict(os.environ)
+    env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, mode + '.db')}"
+    env["DB_ASYNC"] = "true" if mode == "async" else "false"
+    env.pop("DATABASE_ASYNC_URL", None)
+    migrate(env)
+
+    with Server(env) as server:
+        headers, task_ids = _seed(server.base_url, args.tasks)
+
+        async def request(client: httpx.AsyncClient, n: int) -> httpx.Response:
+            if n % 3 == 0:
+                return await client.get("/api/tasks", params={"limit": 50}, headers=headers)
+            if n % 3 == 1:
+                return await client.get(f"/api/tasks/{task_ids[n % len(task_ids)]}", headers=headers)
+            return await client.get("/api/departments", headers=headers)
+
+        return await run_load(
+            f"{mode} (c={args.concurrency})",
+            request,
+            base_url=server.base_url,
+            concurrency=args.concurrency,
+            duration=args.duration,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--modes", nargs="+", choices=["sync", "async"], default=["sync", "async"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="daily_crm_bench_") as workdir:
+        results = [asyncio.run(_bench_mode(mode, args, workdir)) for mode in args.modes]
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
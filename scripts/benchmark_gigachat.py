@@ -0,0 +1,139 @@
+"""Сквозной нагрузочный тест LLM-пути приложения на локальной замене GigaChat (scripts/mock_gigachat.py).
+
+Поднимает mock GigaChat и приложение на временной SQLite-базе, затем гоняет сценарии
+через /api/reviewers/description* и печатает пропускную способность, перцентили задержки,
+число вызовов, дошедших до mock-сервиса, и счётчики /api/metrics приложения.
+
+Сценарии:
+    unique   каждый запрос с новым описанием — всегда вызов LLM
+    repeat   небольшой набор одинаковых описаний — кэш и объединение запросов
+    stream   SSE-режим /description/stream с уникальными описаниями
+
+Запуск из корня проекта:
+    python scripts/benchmark_gigachat.py --concurrency 32 --duration 15 --latency-median-ms 1000 \\
+        --app-env GIGACHAT_MAX_IN_FLIGHT=16
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import httpx  # noqa: E402
+
+from scripts.loadgen import Server, migrate, print_report, run_load  # noqa: E402
+
+
+SCENARIOS = ("unique", "repeat", "stream")
+
+
+def _login(base_url: str) -> dict:
+    with httpx.Client(base_url=base_url, timeout=30.0) as client:
+        client.post("/api/admins", json={"email": "bench@example.com", "full_name": "Bench", "password": "bench"})
+        token = client.post("/api/auth/login", json={"email": "bench@example.com", "password": "bench"}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
+
+
+def _request_factory(scenario: str, headers: dict, repeat_keys: int):
+    async def request(client: httpx.AsyncClient, n: int) -> httpx.Response:
+        if scenario == "repeat":
+            payload = {"name": f"Reviewer {n % repeat_keys}", "description": "Оценивает качество кода"}
+            return await client.post("/api/reviewers/description", json=payload, headers=headers)
+        payload = {"name": f"Reviewer {scenario}-{n}", "description": "Оценивает качество кода"}
+        if scenario == "stream":
+            async with client.stream("POST", "/api/reviewers/description/stream", json=payload, headers=headers) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("event: error"):
+                        return httpx.Response(502)
+            return response
+        return await client.post("/api/reviewers/description", json=payload, headers=headers)
+
+    return request
+
+
+async def _run(args: argparse.Namespace, workdir: str) -> None:
+    mock_env = dict(os.environ)
+    mock_env.update(
+        MOCK_GIGACHAT_LATENCY_MEDIAN_MS=str(args.latency_median_ms),
+        MOCK_GIGACHAT_LATENCY_SIGMA=str(args.latency_sigma),
+        MOCK_GIGACHAT_ERROR_RATE=str(args.error_rate),
+        MOCK_GIGACHAT_RATE_LIMIT_RPS=str(args.rate_limit_rps),
+    )
+
+    app_env = dict(os.environ)
+    app_env["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    app_env["DESCRIPTION_CACHE_PATH"] = os.path.join(workdir, "description_cache.db")
+    app_env.pop("DATABASE_ASYNC_URL", None)
+    for item in args.app_env:
+        key, _, value = item.partition("=")
+        app_env[key] = value
+    migrate(app_env)
+
+    with Server(mock_env, app="scripts.mock_gigachat:app") as mock:
+        app_env.update(
+            GIGACHAT_BASE_URL=f"{mock.base_url}/api/v1",
+            GIGACHAT_OAUTH_URL=f"{mock.base_url}/oauth",
+            GIGACHAT_CLIENT_ID="bench",
+            GIGACHAT_CLIENT_SECRET="bench",
+            GIGACHAT_API_PERS="",
+            GIGACHAT_VERIFY_SSL="false",
+        )
+        with Server(app_env) as server:
+            headers = _login(server.base_url)
+            results = []
+            upstream = []
+            for scenario in args.scenarios:
+                before = httpx.get(f"{mock.base_url}/stats").json()
+                results.append(
+                    await run_load(
+                        f"{scenario} (c={args.concurrency})",
+                        _request_factory(scenario, headers, args.repeat_keys),
+                        base_url=server.base_url,
+                        concurrency=args.concurrency,
+                        duration=args.duration,
+                        timeout=args.timeout,
+                    )
+                )
+                after = httpx.get(f"{mock.base_url}/stats").json()
+                upstream.append((scenario, {key: after[key] - before[key] for key in after}))
+            metrics = httpx.get(f"{server.base_url}/api/metrics", headers=headers).json()
+
+    print_report(results)
+    print()
+    print("Upstream calls per scenario (mock GigaChat):")
+    for scenario, counts in upstream:
+        print(f"  {scenario:<10}{counts}")
+    print()
+    print("App GigaChat metrics:")
+    print(json.dumps({"gigachat": metrics["gigachat"], "description_cache": metrics["description_cache"]}, indent=2))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--repeat-keys", type=int, default=5, help="Число разных описаний в сценарии repeat")
+    parser.add_argument("--latency-median-ms", type=float, default=800)
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rps", type=float, default=0)
+    parser.add_argument(
+        "--app-env", action="append", default=[], metavar="KEY=VALUE",
+        help="Переопределить настройку приложения, например GIGACHAT_MAX_IN_FLIGHT=16",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="daily_crm_llm_bench_") as workdir:
+        asyncio.run(_run(args, workdir))
+
+
+if __name__ == "__main__":
+    main()
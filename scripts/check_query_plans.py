@@ -0,0 +1,156 @@
+"""Проверка планов запросов: прогоняет все маршруты API на временной SQLite-базе,
+собирает выполненные SELECT и падает, если какой-то из них читает таблицу полным сканированием.
+
+Запуск из корня проекта:
+    python scripts/check_query_plans.py
+В составе тестов запускается из tests/test_query_plans.py (python -m pytest).
+"""
+
+import os
+import re
+import sys
+import tempfile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+_tmp_dir = tempfile.mkdtemp(prefix="daily_crm_plans_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'plans.db')}"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.db.base import Base  # noqa: E402
+from app.db.session import active_engine, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+# Таблицы, которые маршруты читают целиком по смыслу (справочники без привязки к администратору)
+FULL_SCAN_ALLOWED = {"admins", "reviewers", "alembic_version"}
+
+# Полный проход по индексу тоже считаем сканированием; алиасы вида jobs_1 приводим к имени таблицы
+SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+?)(?:_\d+)?\b")
+
+
+def _migrate() -> None:
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "alembic"))
+    command.upgrade(config, "head")
+
+
+def _exercise_routes(client: TestClient) -> None:
+    def call(method: str, url: str, expected: int = 200, **kwargs):
+        response = client.request(method, url, headers=headers, **kwargs)
+        if response.status_code != expected:
+            raise SystemExit(f"{method} {url} -> {response.status_code}: {response.text}")
+        return response
+
+    headers = {}
+    client.post("/api/admins", json={"email": "plans@example.com", "full_name": "Plans", "password": "plans"})
+    token = client.post("/api/auth/login", json={"email": "plans@example.com", "password": "plans"}).json()
+    headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+    call("GET", "/api/admins")
+    call("GET", "/api/admins/1")
+    call("PUT", "/api/admins/1", json={"full_name": "Plans"})
+
+    reviewer = call("POST", "/api/reviewers", 201, json={"name": "R", "description": "D"}).json()
+    call("GET", "/api/reviewers")
+    call("GET", f"/api/reviewers/{reviewer['id']}")
+
+    department = call("POST", "/api/departments", 201, json={"name": "Plans"}).json()
+    call("GET", "/api/departments")
+    call("PUT", f"/api/departments/{department['id']}", json={"name": "Plans 2"})
+
+    job = call(
+        "POST", "/api/jobs", 201, json={"name": "J", "department_id": department["id"], "reviewer_id": reviewer["id"]}
+    ).json()
+    call("GET", "/api/jobs")
+    call("GET", f"/api/jobs/{job['id']}")
+    call("PUT", f"/api/jobs/{job['id']}", json={"name": "J2", "department_id": department["id"]})
+
+    user = call("POST", "/api/users", 201, json={"name": "U", "job_id": job["id"]}).json()
+    call("GET", "/api/users", params={"limit": 1})
+    call("GET", "/api/users", params={"department_id": department["id"], "job_id": job["id"]})
+    call("GET", f"/api/users/{user['id']}")
+    call("PUT", f"/api/users/{user['id']}", json={"name": "U2", "job_id": job["id"]})
+
+    for resource, extra in (("tasks", {"description": "T"}), ("statistics", {"value": 1})):
+        first = call("POST", f"/api/{resource}", 201, json={"user_id": user["id"], "date": "2024-01-01", **extra}).json()
+        call("POST", f"/api/{resource}", 201, json={"user_id": user["id"], "date": "2024-01-02", **extra})
+        page = call("GET", f"/api/{resource}", params={"limit": 1})
+        call("GET", f"/api/{resource}", params={"cursor": page.headers["X-Next-Cursor"]})
+        filters = {
+            "user_id": user["id"],
+            "job_id": job["id"],
+            "department_id": department["id"],
+            "date_from": "2024-01-01",
+            "date_to": "2024-12-31",
+        }
+        call("GET", f"/api/{resource}", params=filters)
+        call("GET", f"/api/{resource}/export", params={"format": "csv", **filters})
+        call("GET", f"/api/{resource}/{first['id']}")
+        call("PUT", f"/api/{resource}/{first['id']}", json={"user_id": user["id"], "date": "2024-01-03", **extra})
+        call("DELETE", f"/api/{resource}/{first['id']}", 204)
+
+    call("POST", "/api/tasks/bulk", json={"items": [{"user_id": user["id"], "date": "2024-02-01", "description": "B"}]})
+    call("PUT", "/api/statistics/bulk", json={"items": [{"user_id": user["id"], "date": "2024-02-01", "value": 3}]})
+    aggregate = {"date_from": "2024-01-01", "date_to": "2024-12-31"}
+    call("GET", "/api/statistics/aggregate", params={**aggregate, "group_by": ["department", "month"]})
+    call("GET", "/api/statistics/aggregate", params={**aggregate, "group_by": ["user", "job"], "aggregates": ["avg", "p95"]})
+    call("POST", "/api/imports/users", content=f"name,job_id\nImported,{job['id']}\n".encode())
+    call("POST", "/api/imports/tasks", content=b"user,date,description\nImported,2024-02-02,I\n")
+
+    call("GET", "/api/metrics")
+    call("DELETE", f"/api/users/{user['id']}", 204)
+    call("DELETE", f"/api/jobs/{job['id']}", 204)
+    call("DELETE", f"/api/departments/{department['id']}", 204)
+    call("DELETE", f"/api/reviewers/{reviewer['id']}", 204)
+
+
+def main() -> int:
+    _migrate()
+
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    # В асинхронном режиме экспорт всё равно идёт через синхронный движок
+    engines = {engine, active_engine}
+    for target in engines:
+        event.listen(target, "before_cursor_execute", _capture)
+    _exercise_routes(TestClient(app))
+    for target in engines:
+        event.remove(target, "before_cursor_execute", _capture)
+
+    failures = []
+    seen = set()
+    with engine.connect() as conn:
+        raw = conn.connection.driver_connection
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            plan = [row[3] for row in raw.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+            for detail in plan:
+                match = SCAN_RE.match(detail)
+                table = match.group(1) if match else None
+                if table in Base.metadata.tables and table not in FULL_SCAN_ALLOWED:
+                    failures.append((statement, plan))
+                    break
+
+    print(f"Checked {len(seen)} distinct queries")
+    for statement, plan in failures:
+        print("\nFULL SCAN:\n" + " ".join(statement.split()))
+        for detail in plan:
+            print(f"    {detail}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
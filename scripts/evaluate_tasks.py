@@ -0,0 +1,50 @@
+"""Пакетная оценка задач сотрудников оценщиками их должностей с записью в statistics.
+
+Повторный запуск продолжает с неоценённых дней; --overwrite пересчитывает всё за период.
+Запуск из корня проекта:
+    python scripts/evaluate_tasks.py --date-from 2024-01-01 --date-to 2024-01-31 --concurrency 8
+"""
+
+import argparse
+import asyncio
+from datetime import date
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.services.evaluation import run_evaluation  # noqa: E402
+from app.services.gigachat import close_async_gigachat_client  # noqa: E402
+
+
+async def _run(args: argparse.Namespace):
+    try:
+        return await run_evaluation(
+            args.date_from,
+            args.date_to,
+            admin_id=args.admin_id,
+            overwrite=args.overwrite,
+            concurrency=args.concurrency,
+        )
+    finally:
+        await close_async_gigachat_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--date-from", type=date.fromisoformat, required=True)
+    parser.add_argument("--date-to", type=date.fromisoformat, required=True)
+    parser.add_argument("--admin-id", type=int, default=None, help="Оценить только данные одного администратора")
+    parser.add_argument("--overwrite", action="store_true", help="Пересчитать уже оценённые дни")
+    parser.add_argument("--concurrency", type=int, default=None)
+    args = parser.parse_args()
+
+    report = asyncio.run(_run(args))
+    for key, value in report.as_dict().items():
+        print(f"{key:<20}{value}")
+
+
+if __name__ == "__main__":
+    main()
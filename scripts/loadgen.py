@@ -0,0 +1,140 @@
+"""Общие утилиты нагрузочных бенчмарков: запуск uvicorn в отдельном процессе и генератор нагрузки."""
+
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def migrate(env: Dict[str, str]) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BASE_DIR,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+class Server:
+    """uvicorn app.main:app в дочернем процессе с заданным окружением."""
+
+    def __init__(self, env: Dict[str, str], port: Optional[int] = None, app: str = "app.main:app") -> None:
+        self.env = env
+        self.port = port or free_port()
+        self.app = app
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "Server":
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", self.app, "--port", str(self.port), "--log-level", "warning"],
+            cwd=BASE_DIR,
+            env=self.env,
+        )
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                httpx.get(f"{self.base_url}/openapi.json", timeout=1.0)
+                return self
+            except httpx.TransportError:
+                time.sleep(0.2)
+        self.__exit__()
+        raise RuntimeError(f"Server {self.app} did not start on port {self.port}")
+
+    def __exit__(self, *exc) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+            self.process = None
+
+
+@dataclass
+class LoadResult:
+    name: str
+    duration: float
+    latencies: List[float] = field(default_factory=list)
+    errors: int = 0
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + self.errors
+
+    @property
+    def rps(self) -> float:
+        return self.requests / self.duration if self.duration else 0.0
+
+    def percentile(self, q: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered))) - 1))
+        return ordered[index] * 1000
+
+
+async def run_load(
+    name: str,
+    request: Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]],
+    *,
+    base_url: str,
+    concurrency: int,
+    duration: float,
+    timeout: float = 60.0,
+) -> LoadResult:
+    """Гоняет request(client, n) из concurrency корутин в течение duration секунд."""
+    result = LoadResult(name=name, duration=duration)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    counter = 0
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+
+        async def worker() -> None:
+            nonlocal counter
+            while time.perf_counter() < deadline:
+                counter += 1
+                begin = time.perf_counter()
+                try:
+                    response = await request(client, counter)
+                    ok = response.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    result.latencies.append(time.perf_counter() - begin)
+                else:
+                    result.errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        result.duration = time.perf_counter() - started
+    return result
+
+
+def print_report(results: List[LoadResult]) -> None:
+    header = f"{'scenario':<32}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(
+            f"{result.name:<32}{result.requests:>10}{result.errors:>8}{result.rps:>10.1f}"
+            f"{result.percentile(50):>10.1f}{result.percentile(95):>10.1f}{result.percentile(99):>10.1f}"
+        )
@@ -0,0 +1,167 @@
+"""Локальная замена GigaChat для нагрузочных тестов: OAuth и /chat/completions без трат токенов.
+
+Поведение задаётся переменными окружения (или флагами при запуске напрямую):
+    MOCK_GIGACHAT_LATENCY_MEDIAN_MS  медиана задержки ответа (логнормальное распределение), по умолчанию 800
+    MOCK_GIGACHAT_LATENCY_SIGMA      разброс логнормального распределения, 0 — фиксированная задержка
+    MOCK_GIGACHAT_ERROR_RATE         доля ответов 500, от 0 до 1
+    MOCK_GIGACHAT_RATE_LIMIT_RPS     лимит запросов в секунду (token bucket), сверх него — 429; 0 — без лимита
+    MOCK_GIGACHAT_STREAM_CHUNK_CHARS размер фрагмента текста в stream-режиме
+    MOCK_GIGACHAT_TOKEN_TTL_SECONDS  срок жизни выдаваемого OAuth-токена
+
+Запуск из корня проекта:
+    python scripts/mock_gigachat.py --port 9000 --latency-median-ms 1500 --error-rate 0.05
+и в .env приложения: GIGACHAT_BASE_URL=http://127.0.0.1:9000/api/v1, GIGACHAT_OAUTH_URL=http://127.0.0.1:9000/oauth
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+from uuid import uuid4
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+LATENCY_MEDIAN = _env_float("MOCK_GIGACHAT_LATENCY_MEDIAN_MS", 800) / 1000
+LATENCY_SIGMA = _env_float("MOCK_GIGACHAT_LATENCY_SIGMA", 0.5)
+ERROR_RATE = _env_float("MOCK_GIGACHAT_ERROR_RATE", 0.0)
+RATE_LIMIT_RPS = _env_float("MOCK_GIGACHAT_RATE_LIMIT_RPS", 0)
+STREAM_CHUNK_CHARS = int(_env_float("MOCK_GIGACHAT_STREAM_CHUNK_CHARS", 16))
+TOKEN_TTL = _env_float("MOCK_GIGACHAT_TOKEN_TTL_SECONDS", 1800)
+
+app = FastAPI(title="Mock GigaChat")
+counters = {"oauth": 0, "chat": 0, "stream": 0, "rate_limited": 0, "errors": 0}
+_bucket = {"tokens": RATE_LIMIT_RPS, "updated": time.monotonic()}
+
+
+def _latency() -> float:
+    if LATENCY_SIGMA <= 0:
+        return LATENCY_MEDIAN
+    return LATENCY_MEDIAN * math.exp(random.gauss(0, LATENCY_SIGMA))
+
+
+def _rate_limited() -> bool:
+    if RATE_LIMIT_RPS <= 0:
+        return False
+    now = time.monotonic()
+    _bucket["tokens"] = min(RATE_LIMIT_RPS, _bucket["tokens"] + (now - _bucket["updated"]) * RATE_LIMIT_RPS)
+    _bucket["updated"] = now
+    if _bucket["tokens"] < 1:
+        return True
+    _bucket["tokens"] -= 1
+    return False
+
+
+def _completion_text(prompt: str) -> str:
+    """Правдоподобный ответ: описание оценщика или оценки для пакетной оценки задач."""
+    ids = [int(index) for index in re.findall(r"^\[(\d+)\]", prompt, flags=re.MULTILINE)]
+    if ids:
+        listed = re.search(r"Метрики \(json_name: описание\): (.*?)\. Ответ", prompt)
+        metrics = [part.split(":", 1)[0].strip() for part in listed.group(1).split(", ")] if listed else []
+        results = [{"id": index, "scores": {name: random.randint(1, 10) for name in metrics}} for index in ids]
+        return json.dumps({"results": results}, ensure_ascii=False)
+
+    match = re.search(r"Название оценщика: (.*?)\. Короткое", prompt)
+    name = match.group(1) if match else "Оценщик"
+    metrics = [
+        {
+            "value": random.randint(1, 10),
+            "json_name": f"metric_{index}",
+            "display_name": f"Метрика {index}",
+            "description": f"Что отслеживает метрика {index}",
+        }
+        for index in range(1, 6)
+    ]
+    return json.dumps(
+        {"name": name, "summary": f"Оценщик {name}", "what_is_evaluated": ["качество"], "metrics": metrics},
+        ensure_ascii=False,
+    )
+
+
+@app.post("/oauth")
+async def oauth() -> dict:
+    counters["oauth"] += 1
+    return {"access_token": uuid4().hex, "expires_at": int((time.time() + TOKEN_TTL) * 1000)}
+
+
+@app.post("/api/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    if _rate_limited():
+        counters["rate_limited"] += 1
+        return JSONResponse(status_code=429, content={"message": "Too many requests"}, headers={"Retry-After": "1"})
+    if random.random() < ERROR_RATE:
+        counters["errors"] += 1
+        await asyncio.sleep(_latency() / 4)
+        return JSONResponse(status_code=500, content={"message": "Internal error"})
+
+    text = _completion_text(body["messages"][-1]["content"])
+    latency = _latency()
+    if not body.get("stream"):
+        counters["chat"] += 1
+        await asyncio.sleep(latency)
+        return {
+            "choices": [{"message": {"role": "assistant", "content": text}, "index": 0, "finish_reason": "stop"}],
+            "model": body.get("model"),
+            "usage": {"prompt_tokens": len(body["messages"][-1]["content"]) // 4, "completion_tokens": len(text) // 4},
+        }
+
+    counters["stream"] += 1
+    chunks = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+
+    async def events():
+        # Первая порция приходит примерно через десятую часть полной задержки, остальное — равномерно
+        await asyncio.sleep(latency / 10)
+        for chunk in chunks:
+            payload = {"choices": [{"delta": {"content": chunk}, "index": 0}]}
+            yield f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+            await asyncio.sleep(latency * 0.9 / len(chunks))
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+async def stats() -> dict:
+    return counters
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency-median-ms", type=float)
+    parser.add_argument("--latency-sigma", type=float)
+    parser.add_argument("--error-rate", type=float)
+    parser.add_argument("--rate-limit-rps", type=float)
+    parser.add_argument("--stream-chunk-chars", type=int)
+    args = parser.parse_args()
+
+    options = {
+        "MOCK_GIGACHAT_LATENCY_MEDIAN_MS": args.latency_median_ms,
+        "MOCK_GIGACHAT_LATENCY_SIGMA": args.latency_sigma,
+        "MOCK_GIGACHAT_ERROR_RATE": args.error_rate,
+        "MOCK_GIGACHAT_RATE_LIMIT_RPS": args.rate_limit_rps,
+        "MOCK_GIGACHAT_STREAM_CHUNK_CHARS": args.stream_chunk_chars,
+    }
+    env = dict(os.environ, **{key: str(value) for key, value in options.items() if value is not None})
+    os.execve(
+        sys.executable,
+        [sys.executable, "-m", "uvicorn", "scripts.mock_gigachat:app", "--port", str(args.port)],
+        dict(env, PYTHONPATH=BASE_DIR),
+    )
+
+
+if __name__ == "__main__":
+    main()
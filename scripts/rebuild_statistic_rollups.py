@@ -0,0 +1,40 @@
+"""Пересборка недельных и месячных свёрток statistic_rollups из statistics.
+
+Нужна после записи в statistics в обход API (ручной SQL, восстановление из резервной копии).
+Каждая корзина пересобирается отдельной транзакцией, поэтому прерванный запуск безопасно
+повторить. Без --date-from/--date-to берётся весь диапазон дат.
+Запуск из корня проекта:
+    python scripts/rebuild_statistic_rollups.py --admin-id 1 --date-from 2024-01-01
+"""
+
+import argparse
+from datetime import date
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.db.session import SessionLocal  # noqa: E402
+from app.services.statistic_rollups import rebuild_statistic_rollups  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--admin-id", type=int, help="Только данные этого администратора")
+    parser.add_argument("--date-from", type=date.fromisoformat, help="Начало диапазона, YYYY-MM-DD")
+    parser.add_argument("--date-to", type=date.fromisoformat, help="Конец диапазона, YYYY-MM-DD")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        rebuilt = rebuild_statistic_rollups(
+            db, admin_id=args.admin_id, date_from=args.date_from, date_to=args.date_to
+        )
+
+    for period, count in rebuilt.items():
+        print(f"{period}: {count} bucket(s) rebuilt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Проверка и исправление поддерживаемых счётчиков отделов (jobs_count, employees_count).
+
+Без флагов только сообщает о расхождениях и завершается с кодом 1, если они есть;
+--fix записывает пересчитанные значения.
+Запуск из корня проекта:
+    python scripts/repair_department_counters.py --fix
+"""
+
+import argparse
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from app.db.session import SessionLocal  # noqa: E402
+from app.services.department_counters import verify_department_counters  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fix", action="store_true", help="Исправить найденные расхождения")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        mismatches = verify_department_counters(db, fix=args.fix)
+
+    for item in mismatches:
+        print(
+            f"department {item['department_id']}: "
+            f"jobs_count {item['jobs_count']} -> {item['expected_jobs_count']}, "
+            f"employees_count {item['employees_count']} -> {item['expected_employees_count']}"
+        )
+    print(f"{len(mismatches)} department(s) {'fixed' if args.fix else 'out of sync'}")
+    if mismatches and not args.fix:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Отдельный процесс-воркер очереди фоновых задач (таблица queue_jobs).
+
+Запускается рядом с приложением, если JOB_QUEUE_IN_PROCESS=false или нужна дополнительная
+пропускная способность; несколько воркеров безопасно работают с одной БД. Из корня проекта:
+    python scripts/run_job_worker.py --concurrency 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import app.services.job_handlers  # noqa: E402,F401  регистрирует обработчики
+from app.services.gigachat import close_async_gigachat_client  # noqa: E402
+from app.services.job_queue import JobWorker  # noqa: E402
+
+
+async def _run(args: argparse.Namespace) -> None:
+    worker = JobWorker(concurrency=args.concurrency, poll_interval=args.poll_interval)
+    print(f"Job worker {worker.worker_id} started with {worker.concurrency} slots")
+    try:
+        await worker.run_forever()
+    finally:
+        await worker.stop()
+        await close_async_gigachat_client()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--poll-interval", type=float, default=None)
+    args = parser.parse_args()
+    try:
+        asyncio.run(_run(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+# Настройки читаются при импорте app, поэтому временная база задаётся до него
+_tmp_dir = tempfile.mkdtemp(prefix="daily_crm_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp_dir, 'tests.db')}"
+os.environ["DESCRIPTION_CACHE_PATH"] = os.path.join(_tmp_dir, "description_cache.db")
+os.environ["IMPORT_SPOOL_DIR"] = os.path.join(_tmp_dir, "imports")
+os.environ["JOB_QUEUE_IN_PROCESS"] = "false"
+os.environ.pop("DATABASE_ASYNC_URL", None)
+os.environ.pop("DATABASE_READ_URLS", None)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from alembic import command
+    from alembic.config import Config
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    config = Config(os.path.join(BASE_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(BASE_DIR, "alembic"))
+    command.upgrade(config, "head")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(client):
+    client.post("/api/admins", json={"email": "tests@example.com", "full_name": "Tests", "password": "tests"})
+    token = client.post("/api/auth/login", json={"email": "tests@example.com", "password": "tests"}).json()
+    return {"Authorization": f"Bearer {token['access_token']}"}
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+
+def test_queued_delete_hides_subtree_and_is_not_enqueued_twice(client, auth_headers, monkeypatch):
+    from app.core.config import get_settings
+    from app.db.session import SessionLocal
+    from app.models import QueueJob
+    from app.services import job_queue
+
+    def post(url, payload, expected=201):
+        response = client.post(url, json=payload, headers=auth_headers)
+        assert response.status_code == expected, response.text
+        return response.json()
+
+    department = post("/api/departments", {"name": "Cascade"})
+    job = post("/api/jobs", {"name": "Cascade", "department_id": department["id"]})
+    user = post("/api/users", {"name": "Cascade", "job_id": job["id"]})
+    # Любое непустое поддерево уходит в очередь
+    monkeypatch.setattr(get_settings(), "cascade_delete_sync_max_rows", 0)
+
+    first = client.delete(f"/api/departments/{department['id']}", headers=auth_headers)
+    second = client.delete(f"/api/departments/{department['id']}", headers=auth_headers)
+    assert (first.status_code, second.status_code) == (202, 202)
+    assert first.json()["id"] == second.json()["id"]
+
+    # Пока задача в очереди, поддерево скрыто и не принимает изменений
+    for url in (f"/api/departments/{department['id']}", f"/api/jobs/{job['id']}", f"/api/users/{user['id']}"):
+        assert client.get(url, headers=auth_headers).status_code == 404
+    assert department["id"] not in [row["id"] for row in client.get("/api/departments", headers=auth_headers).json()]
+    put = client.put(f"/api/users/{user['id']}", json={"name": "Renamed", "job_id": job["id"]}, headers=auth_headers)
+    assert put.status_code == 404
+    post("/api/users", {"name": "Late", "job_id": job["id"]}, expected=404)
+    post("/api/tasks", {"user_id": user["id"], "date": "2024-01-01", "description": "Late"}, expected=404)
+
+    def load():
+        with SessionLocal() as db:
+            return db.get(QueueJob, first.json()["id"])
+
+    async def run_queue():
+        import app.services.job_handlers  # noqa: F401  регистрирует обработчики
+
+        worker = job_queue.JobWorker(concurrency=1, poll_interval=0.02)
+        await worker.start()
+        deadline = time.monotonic() + 5
+        while load().status != job_queue.SUCCEEDED:
+            assert time.monotonic() < deadline, "cascade delete did not finish"
+            await asyncio.sleep(0.02)
+        await worker.stop()
+
+    asyncio.run(run_queue())
+    assert load().dedupe_key is None
+    assert client.delete(f"/api/departments/{department['id']}", headers=auth_headers).status_code == 404
@@ -0,0 +1,64 @@
+import asyncio
+import os
+
+
+def test_async_import_parses_rows_off_the_event_loop(client, auth_headers, tmp_path, monkeypatch):
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.core.config import get_settings
+    from app.db.session import build_async_engine, to_async_url
+    from app.services import data_import
+
+    department = client.post("/api/departments", json={"name": "Import"}, headers=auth_headers).json()
+    job = client.post("/api/jobs", json={"name": "Import", "department_id": department["id"]}, headers=auth_headers).json()
+    path = tmp_path / "users.csv"
+    path.write_text(f"name,job_id\nFirst,{job['id']}\nSecond,{job['id']}\nOrphan,999999\n", encoding="utf-8")
+
+    # С DB_ASYNC run_sync выполняет функцию в потоке event loop: разбор туда попадать не должен
+    threads = []
+    prepare = data_import._prepare
+
+    def recording_prepare(*args):
+        try:
+            asyncio.get_running_loop()
+            threads.append("event loop")
+        except RuntimeError:
+            threads.append("worker")
+        return prepare(*args)
+
+    monkeypatch.setattr(data_import, "_prepare", recording_prepare)
+
+    async def scenario():
+        engine = build_async_engine(to_async_url(os.environ["DATABASE_URL"]), get_settings())
+        try:
+            async with AsyncSession(engine, expire_on_commit=False) as db:
+                return await data_import.run_import_async(
+                    db, data_import.ImportKind.users, data_import.ImportFormat.csv, str(path), department["admin_id"]
+                )
+        finally:
+            await engine.dispose()
+
+    report = asyncio.run(scenario())
+    assert threads == ["worker"] * 3
+    assert (report.rows, report.imported, report.failed) == (3, 2, 1)
+    users = client.get("/api/users", params={"job_id": job["id"]}, headers=auth_headers).json()
+    assert sorted(user["name"] for user in users) == ["First", "Second"]
+
+
+def test_upload_is_spooled_without_a_pooled_connection(client, auth_headers, monkeypatch):
+    from app.api.routes import imports
+    from app.db.session import active_engine
+
+    checked_out = []
+    spool_upload = imports.spool_upload
+
+    async def recording_spool_upload(chunks, file_format):
+        # Сессия из get_db берёт соединение лениво: чтение тела запроса его не держит
+        checked_out.append(active_engine.pool.checkedout())
+        return await spool_upload(chunks, file_format)
+
+    monkeypatch.setattr(imports, "spool_upload", recording_spool_upload)
+    response = client.post("/api/imports/users", content=b"name,job_id\nNobody,999999\n", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert checked_out == [0]
+    assert response.json()["failed"] == 1
@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from app.core.config import get_settings
+from app.services.gigachat import AsyncGigaChatClient, GigaChatTimeoutError
+from app.services.llm_cache import ResponseCache
+
+
+class _Upstream:
+    """Медленный GigaChat: считает одновременные и отменённые запросы."""
+
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.active -= 1
+        return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+
+def _client(monkeypatch, upstream: _Upstream, max_in_flight: int) -> AsyncGigaChatClient:
+    settings = get_settings()
+    monkeypatch.setattr(settings, "gigachat_base_url", "http://gigachat.test/api/v1")
+    monkeypatch.setattr(settings, "gigachat_api_pers", "token")
+    monkeypatch.setattr(settings, "gigachat_max_in_flight", max_in_flight)
+    monkeypatch.setattr(settings, "gigachat_hedge_enabled", True)
+    monkeypatch.setattr(settings, "gigachat_hedge_min_delay_seconds", 0.05)
+    monkeypatch.setattr(settings, "gigachat_max_retries", 0)
+    client = AsyncGigaChatClient()
+    client._http = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+    return client
+
+
+def test_hedge_needs_a_free_slot(monkeypatch):
+    upstream = _Upstream(delay=0.2)
+
+    async def scenario():
+        client = _client(monkeypatch, upstream, max_in_flight=1)
+        await client.request("POST", "/chat/completions", json={})
+        assert client.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+    assert (upstream.calls, upstream.peak) == (1, 1)
+
+
+def test_hedge_uses_its_own_slot_and_is_cancelled_by_the_winner(monkeypatch):
+    upstream = _Upstream(delay=0.2)
+
+    async def scenario():
+        client = _client(monkeypatch, upstream, max_in_flight=2)
+        await client.request("POST", "/chat/completions", json={})
+        await asyncio.sleep(0.01)
+        stats = client.stats()
+        assert (stats["hedged"], stats["in_flight"]) == (1, 0)
+        assert client._semaphore._value == 2
+
+    asyncio.run(scenario())
+    assert (upstream.calls, upstream.peak, upstream.cancelled) == (2, 2, 1)
+
+
+def test_deadline_before_hedge_cancels_primary(monkeypatch):
+    upstream = _Upstream(delay=1.0)
+
+    async def scenario():
+        client = _client(monkeypatch, upstream, max_in_flight=2)
+        monkeypatch.setattr(client, "hedge_min_delay", 0.5)
+        with pytest.raises(GigaChatTimeoutError):
+            await client.request("POST", "/chat/completions", json={}, deadline=0.05)
+        await asyncio.sleep(0.01)
+        assert upstream.active == 0
+
+    asyncio.run(scenario())
+    assert (upstream.calls, upstream.cancelled) == (1, 1)
+
+
+def test_stale_lookup_returns_expired_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=0.05, memory_size=8, disk_max_entries=8, stale_ttl=60)
+    cache.set("key", {"value": 1})
+    time.sleep(0.1)
+    assert cache.get("key") is None
+    assert cache.get_stale("key") == {"value": 1}
+    # Запись за пределами stale_ttl удаляется при следующей записи
+    cache.stale_ttl = 0
+    cache.set("other", {"value": 2})
+    assert cache.get_stale("key") is None
+
+
+def test_queueing_for_a_slot_is_not_upstream_latency(monkeypatch):
+    from app.services import gigachat
+    from app.services.circuit_breaker import CircuitBreaker
+
+    breaker = CircuitBreaker(
+        "test", window=10, min_calls=10, failure_rate=0.5, p95_seconds=0, open_seconds=30, half_open_calls=1
+    )
+    monkeypatch.setattr(gigachat, "gigachat_breaker", breaker)
+    upstream = _Upstream(delay=0.2)
+
+    async def scenario():
+        client = _client(monkeypatch, upstream, max_in_flight=1)
+
+        def call(**kwargs):
+            return client.request("POST", "/chat/completions", json={}, **kwargs)
+
+        # Второй вызов ждёт слот 0.2 с, третий не дожидается его до дедлайна
+        results = await asyncio.gather(call(), call(), call(deadline=0.1), return_exceptions=True)
+        assert isinstance(results[2], GigaChatTimeoutError)
+
+    asyncio.run(scenario())
+    assert upstream.calls == 2
+    assert [ok for ok, _ in breaker._calls] == [True, True]
+    assert max(duration for _, duration in breaker._calls) < 0.35
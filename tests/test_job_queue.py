@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+
+@pytest.fixture()
+def queue(client, monkeypatch):
+    from app.core.config import get_settings
+    from app.services import job_queue
+
+    # Короткая аренда: heartbeat раз в 0.1 с
+    monkeypatch.setattr(get_settings(), "job_queue_lease_seconds", 0.3)
+    return job_queue
+
+
+def _enqueue(queue, kind, **kwargs):
+    from app.db.session import SessionLocal
+
+    with SessionLocal() as db:
+        return queue.enqueue(db, kind, {"kind": kind}, **kwargs).id
+
+
+def _load(job_id):
+    from app.db.session import SessionLocal
+    from app.models import QueueJob
+
+    with SessionLocal() as db:
+        return db.get(QueueJob, job_id)
+
+
+def _steal(job_id):
+    from sqlalchemy import update
+
+    from app.db.session import SessionLocal
+    from app.models import QueueJob
+
+    with SessionLocal() as db:
+        db.execute(update(QueueJob).where(QueueJob.id == job_id).values(locked_by="other-worker"))
+        db.commit()
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.02)
+
+
+def test_stopped_worker_keeps_running_sync_job_until_thread_exits(queue):
+    started, release = threading.Event(), threading.Event()
+    seen = {}
+
+    @queue.job_handler("test_stop_sync")
+    def handler(payload):
+        started.set()
+        release.wait(5)
+        try:
+            queue.report_progress({"step": 1})
+        except queue.JobAbortedError:
+            seen["aborted"] = True
+            raise
+
+    job_id = _enqueue(queue, "test_stop_sync")
+
+    async def scenario():
+        worker = queue.JobWorker(concurrency=1, poll_interval=0.02)
+        await worker.start()
+        await _wait_for(started.is_set)
+        await worker.stop()
+        # Поток ещё работает: задача не возвращена в очередь и не может достаться второму воркеру
+        job = _load(job_id)
+        assert (job.status, job.attempts) == (queue.RUNNING, 1)
+        release.set()
+        await _wait_for(lambda: "aborted" in seen)
+
+    asyncio.run(scenario())
+
+
+def test_lost_lease_aborts_sync_handler_between_chunks(queue):
+    chunks = []
+
+    @queue.job_handler("test_lease_sync")
+    def handler(payload):
+        for chunk in range(100):
+            queue.report_progress({"chunk": chunk})
+            chunks.append(chunk)
+            time.sleep(0.02)
+        return "finished"
+
+    job_id = _enqueue(queue, "test_lease_sync")
+
+    async def scenario():
+        worker = queue.JobWorker(concurrency=1, poll_interval=0.02)
+        await worker.start()
+        await _wait_for(lambda: len(chunks) >= 3)
+        _steal(job_id)
+        await _wait_for(lambda: worker.lease_lost == 1)
+        await worker.stop()
+
+    asyncio.run(scenario())
+    assert len(chunks) < 100
+    job = _load(job_id)
+    # Исход не записан поверх нового владельца
+    assert (job.status, job.locked_by, job.result) == (queue.RUNNING, "other-worker", None)
+
+
+def test_lost_lease_cancels_async_handler(queue):
+    state = {}
+
+    @queue.job_handler("test_lease_async")
+    async def handler(payload):
+        state["started"] = True
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+
+    job_id = _enqueue(queue, "test_lease_async")
+
+    async def scenario():
+        worker = queue.JobWorker(concurrency=1, poll_interval=0.02)
+        await worker.start()
+        await _wait_for(lambda: "started" in state)
+        _steal(job_id)
+        await _wait_for(lambda: worker.lease_lost == 1)
+        await worker.stop()
+
+    asyncio.run(scenario())
+    assert state.get("cancelled")
+
+
+def test_cleanup_runs_on_terminal_status(queue):
+    from datetime import timedelta
+
+    from sqlalchemy import update
+
+    from app.db.session import SessionLocal
+    from app.models import QueueJob
+
+    cleaned = []
+
+    @queue.job_handler("test_cleanup", cleanup=lambda payload: cleaned.append(payload["kind"]))
+    def handler(payload):
+        raise ValueError("broken file")
+
+    failed_id = _enqueue(queue, "test_cleanup", max_attempts=1)
+
+    async def scenario():
+        worker = queue.JobWorker(concurrency=1, poll_interval=0.02)
+        await worker.start()
+        await _wait_for(lambda: _load(failed_id).status == queue.DEAD)
+        await worker.stop()
+
+    asyncio.run(scenario())
+    assert cleaned == ["test_cleanup"]
+
+    # Воркер умер на последней попытке: задачу хоронит следующий _claim
+    abandoned_id = _enqueue(queue, "test_cleanup", max_attempts=1)
+    with SessionLocal() as db:
+        db.execute(
+            update(QueueJob)
+            .where(QueueJob.id == abandoned_id)
+            .values(
+                status=queue.RUNNING,
+                attempts=1,
+                locked_by="dead-worker",
+                lease_expires_at=queue._utcnow() - timedelta(seconds=1),
+            )
+        )
+        db.commit()
+    queue._claim("test-worker")
+    assert _load(abandoned_id).status == queue.DEAD
+    assert cleaned == ["test_cleanup", "test_cleanup"]
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from app.services.json_stream import ArrayItemStreamParser
+
+
+DESCRIPTION = {
+    "name": "metrics",
+    "summary": 'Оценщик "кода": {скобки} и [массивы] внутри строк, обратный слэш \\ и "metrics": [',
+    "what_is_evaluated": ["{не объект}", "[не массив]", "\\\"", "}]"],
+    "metrics": [
+        {"value": 9, "json_name": "quality", "display_name": "Качество", "description": "Ошибки \"по делу\" {}"},
+        {"value": 7, "json_name": "speed", "display_name": "Скорость", "description": "Строка с \\ и \\\" и ]}"},
+        {"value": 5, "json_name": "nested", "display_name": "Вложенность", "description": "{\"a\": [1]}",
+         "extra": {"metrics": [{"value": 1}]}},
+        {"value": 3, "json_name": "escape", "display_name": "Экранирование", "description": "\\\\\" конец"},
+    ],
+}
+TEXT = json.dumps(DESCRIPTION, ensure_ascii=False)
+METRICS = DESCRIPTION["metrics"]
+
+
+def _end(metric):
+    # Позиция сразу после закрывающей скобки метрики в TEXT
+    encoded = json.dumps(metric, ensure_ascii=False)
+    return TEXT.index(encoded) + len(encoded)
+
+
+ENDS = [_end(metric) for metric in METRICS]
+
+
+def _feed_all(parser, chunks):
+    items = []
+    for chunk in chunks:
+        items.extend(parser.feed(chunk))
+    return items
+
+
+def test_items_match_json_loads():
+    assert _feed_all(ArrayItemStreamParser("metrics"), [TEXT]) == json.loads(TEXT)["metrics"]
+
+
+@pytest.mark.parametrize("text", [TEXT, f"```json\n{TEXT}\n```"])
+def test_split_at_every_boundary(text):
+    expected = json.loads(TEXT)["metrics"]
+    for split in range(len(text) + 1):
+        parser = ArrayItemStreamParser("metrics")
+        assert _feed_all(parser, [text[:split], text[split:]]) == expected, split
+        assert parser.text == text
+
+
+def test_one_character_at_a_time():
+    assert _feed_all(ArrayItemStreamParser("metrics"), list(TEXT)) == METRICS
+
+
+def test_truncated_stream_emits_only_closed_items():
+    for cut in range(len(TEXT) + 1):
+        parser = ArrayItemStreamParser("metrics")
+        items = _feed_all(parser, [TEXT[:cut]])
+        assert items == [metric for metric, end in zip(METRICS, ENDS) if end <= cut], cut
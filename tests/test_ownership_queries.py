@@ -0,0 +1,96 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@contextmanager
+def count_statements():
+    """Считает SQL-выражения, выполненные приложением внутри блока."""
+    from app.db.session import active_engine, engine
+
+    statements = []
+
+    def _capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = {engine, active_engine}
+    for target in engines:
+        event.listen(target, "before_cursor_execute", _capture)
+    try:
+        yield statements
+    finally:
+        for target in engines:
+            event.remove(target, "before_cursor_execute", _capture)
+
+
+@pytest.fixture(scope="module")
+def tree(client, auth_headers):
+    def post(url, payload):
+        response = client.post(url, json=payload, headers=auth_headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    department = post("/api/departments", {"name": "Ownership"})
+    job = post("/api/jobs", {"name": "Ownership", "department_id": department["id"]})
+    user = post("/api/users", {"name": "Ownership", "job_id": job["id"]})
+    return {"department": department, "job": job, "user": user}
+
+
+def _assert_statements(client, auth_headers, method, url, bound, expected_status=200, **kwargs):
+    # Первый запрос прогревает кэш администраторов и пул соединений
+    client.get("/api/users", params={"limit": 1}, headers=auth_headers)
+    with count_statements() as statements:
+        response = client.request(method, url, headers=auth_headers, **kwargs)
+    assert response.status_code == expected_status, response.text
+    assert len(statements) <= bound, f"{method} {url}: {len(statements)} statements\n" + "\n".join(statements)
+    return response
+
+
+# Верхние границы числа выражений на запрос: поиск владельца — один SELECT с фильтром
+# по admin_id, без ленивой подгрузки цепочки user.job.department
+@pytest.mark.parametrize("resource", ["tasks", "statistics"])
+def test_row_handlers_query_count(client, auth_headers, tree, resource):
+    extra = {"description": "T"} if resource == "tasks" else {"value": 1}
+    payload = {"user_id": tree["user"]["id"], "date": "2024-01-01", **extra}
+    row = client.post(f"/api/{resource}", json=payload, headers=auth_headers).json()
+
+    _assert_statements(client, auth_headers, "GET", f"/api/{resource}", 1, params={"limit": 10})
+    _assert_statements(client, auth_headers, "GET", f"/api/{resource}/{row['id']}", 1)
+    # PUT: владение строкой, UPDATE, повторное чтение; для statistics ещё пересчёт
+    # недельной и месячной свёрток (DELETE + INSERT ... SELECT на корзину старого и нового ключа)
+    bound = 3 if resource == "tasks" else 3 + 4 * 2
+    _assert_statements(
+        client, auth_headers, "PUT", f"/api/{resource}/{row['id']}", bound, json={**payload, "date": "2024-01-02"}
+    )
+    bound = 2 if resource == "tasks" else 2 + 4
+    _assert_statements(client, auth_headers, "DELETE", f"/api/{resource}/{row['id']}", bound, expected_status=204)
+
+
+def test_user_handlers_query_count(client, auth_headers, tree):
+    user = client.post(
+        "/api/users", json={"name": "Counted", "job_id": tree["job"]["id"]}, headers=auth_headers
+    ).json()
+
+    _assert_statements(client, auth_headers, "GET", "/api/users", 1, params={"limit": 10})
+    _assert_statements(client, auth_headers, "GET", f"/api/users/{user['id']}", 1)
+    # PUT без смены должности: владение, UPDATE, повторное чтение
+    _assert_statements(
+        client, auth_headers, "PUT", f"/api/users/{user['id']}", 3, json={"name": "Renamed", "job_id": tree["job"]["id"]}
+    )
+    # DELETE пустого поддерева: владение, поиск задачи удаления в очереди, подсчёт и выборка id
+    # по каждому шагу каскада, DELETE корня
+    _assert_statements(client, auth_headers, "DELETE", f"/api/users/{user['id']}", 13, expected_status=204)
+
+
+def test_foreign_rows_are_not_found(client, auth_headers, tree):
+    client.post(
+        "/api/admins",
+        json={"email": "other@example.com", "full_name": "Other", "password": "other"},
+        headers=auth_headers,
+    )
+    token = client.post("/api/auth/login", json={"email": "other@example.com", "password": "other"}).json()
+    other = {"Authorization": f"Bearer {token['access_token']}"}
+
+    for url in (f"/api/users/{tree['user']['id']}", f"/api/jobs/{tree['job']['id']}"):
+        assert client.get(url, headers=other).status_code == 404
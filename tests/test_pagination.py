@@ -0,0 +1,72 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def rows(client, auth_headers):
+    def post(url, payload):
+        response = client.post(url, json=payload, headers=auth_headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    department = post("/api/departments", {"name": "Paging"})
+    other_department = post("/api/departments", {"name": "Paging other"})
+    job = post("/api/jobs", {"name": "Paging", "department_id": department["id"]})
+    other_job = post("/api/jobs", {"name": "Paging other", "department_id": other_department["id"]})
+    first = post("/api/users", {"name": "First", "job_id": job["id"]})
+    second = post("/api/users", {"name": "Second", "job_id": other_job["id"]})
+    # Несколько задач на одну дату: порядок внутри даты задаёт id
+    for day in ("2024-03-03", "2024-03-01", "2024-03-02", "2024-03-01"):
+        post("/api/tasks", {"user_id": first["id"], "date": day, "description": f"First {day}"})
+    post("/api/tasks", {"user_id": second["id"], "date": "2024-03-02", "description": "Second"})
+    return {"department": department, "job": job, "first": first, "second": second}
+
+
+def _walk(client, auth_headers, url, limit, **params):
+    items, cursor = [], None
+    while True:
+        query = {**params, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, params=query, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page) <= limit
+        items.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return items
+
+
+def test_cursor_round_trip_matches_full_list(client, auth_headers, rows):
+    params = {"user_id": rows["first"]["id"]}
+    full = client.get("/api/tasks", params=params, headers=auth_headers)
+    # Без limit и cursor список отдаётся целиком и без курсора
+    assert "X-Next-Cursor" not in full.headers
+    tasks = full.json()
+    assert [(task["date"], task["id"]) for task in tasks] == sorted((task["date"], task["id"]) for task in tasks)
+    assert len(tasks) == 4
+    for limit in (1, 2, 3, 4, 5):
+        assert _walk(client, auth_headers, "/api/tasks", limit, **params) == tasks
+
+    users = client.get("/api/users", params={"department_id": rows["department"]["id"]}, headers=auth_headers).json()
+    assert _walk(client, auth_headers, "/api/users", 1, department_id=rows["department"]["id"]) == users
+
+
+def test_filters(client, auth_headers, rows):
+    def descriptions(**params):
+        response = client.get("/api/tasks", params=params, headers=auth_headers)
+        assert response.status_code == 200, response.text
+        return [task["description"] for task in response.json()]
+
+    assert descriptions(job_id=rows["job"]["id"]) == descriptions(user_id=rows["first"]["id"])
+    assert descriptions(department_id=rows["department"]["id"]) == descriptions(user_id=rows["first"]["id"])
+    assert descriptions(user_id=rows["second"]["id"]) == ["Second"]
+    assert descriptions(user_id=rows["first"]["id"], date_from="2024-03-02", date_to="2024-03-02") == ["First 2024-03-02"]
+
+    users = client.get("/api/users", params={"job_id": rows["job"]["id"]}, headers=auth_headers).json()
+    assert [user["id"] for user in users] == [rows["first"]["id"]]
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bm90LWpzb24", "WzFd", "WyJ4IiwgMV0"])
+def test_malformed_cursor_is_rejected(client, auth_headers, rows, cursor):
+    response = client.get("/api/tasks", params={"cursor": cursor}, headers=auth_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
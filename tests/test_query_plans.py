@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_no_full_table_scans():
+    # Скрипт поднимает приложение на своей временной базе, поэтому запускается отдельным процессом
+    env = {key: value for key, value in os.environ.items() if key not in ("DATABASE_URL", "DATABASE_ASYNC_URL")}
+    result = subprocess.run(
+        [sys.executable, os.path.join(BASE_DIR, "scripts", "check_query_plans.py")],
+        cwd=BASE_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,57 @@
+def test_inline_generation_holds_no_pooled_connection(client, auth_headers, monkeypatch):
+    from app.api.routes import reviewers
+    from app.api.schemas.reviewer import ReviewerDescriptionData
+    from app.db.session import active_engine
+
+    checked_out = []
+
+    async def generate(name, description, *, bypass_cache=False):
+        # Пока ждём GigaChat, соединение из пула нужно другим запросам
+        checked_out.append(active_engine.pool.checkedout())
+        return ReviewerDescriptionData(name=name, summary="summary", metrics=[])
+
+    monkeypatch.setattr(reviewers, "generate_description_data", generate)
+    response = client.post(
+        "/api/reviewers/description", json={"name": "Reviewer", "description": "Checks"}, headers=auth_headers
+    )
+    assert response.status_code == 200, response.text
+    assert checked_out == [0]
+
+    queued = client.post(
+        "/api/reviewers/description",
+        params={"background": "true"},
+        json={"name": "Reviewer", "description": "Checks"},
+        headers=auth_headers,
+    )
+    assert queued.status_code == 202, queued.text
+
+
+def test_stream_serves_stale_description_while_breaker_is_open(client, auth_headers, monkeypatch):
+    from app.api.routes import reviewers
+    from app.services import reviewer_description
+    from app.services.circuit_breaker import CircuitOpenError
+    from app.services.llm_cache import description_cache
+
+    class _OpenClient:
+        model = "GigaChat"
+
+        async def chat_stream(self, prompt):
+            raise CircuitOpenError("GigaChat", 30)
+            yield
+
+    for module in (reviewers, reviewer_description):
+        monkeypatch.setattr(module, "get_async_gigachat_client", _OpenClient)
+
+    payload = {"name": "Stale", "description": "Open breaker"}
+    prompt = reviewer_description.build_description_prompt(payload["name"], payload["description"])
+    key = reviewer_description.description_cache_key(prompt)
+    metric = {"value": 5, "json_name": "speed", "display_name": "Speed", "description": "How fast"}
+    description_cache.set(key, {"name": "Stale", "summary": "Cached", "metrics": [metric]})
+    # Запись истекла, но ещё в пределах stale_ttl
+    monkeypatch.setattr(description_cache, "get", lambda key: None)
+
+    response = client.post("/api/reviewers/description/stream", json=payload, headers=auth_headers)
+    assert response.status_code == 200
+    assert "event: metric" in response.text
+    assert "event: done" in response.text
+    assert "event: error" not in response.text
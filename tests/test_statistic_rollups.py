@@ -0,0 +1,96 @@
+def _assert_rollups_match_statistics(user_ids):
+    from app.db.session import SessionLocal
+    from app.models import Statistic, StatisticRollup
+    from app.services.statistic_rollups import ROLLUP_PERIODS, bucket_start
+
+    with SessionLocal() as db:
+        statistics = db.query(Statistic).filter(Statistic.user_id.in_(user_ids)).all()
+        rollups = db.query(StatisticRollup).filter(StatisticRollup.user_id.in_(user_ids)).all()
+
+    buckets = {}
+    for statistic in statistics:
+        for period in ROLLUP_PERIODS:
+            key = (period, bucket_start(statistic.date, period), statistic.user_id)
+            tenant, values = buckets.setdefault(key, ((statistic.department_id, statistic.admin_id), []))
+            values.append(statistic.value)
+    expected = {
+        key: (*tenant, len(values), sum(values), min(values), max(values)) for key, (tenant, values) in buckets.items()
+    }
+    actual = {
+        (rollup.period, rollup.bucket_start, rollup.user_id): (
+            rollup.department_id,
+            rollup.admin_id,
+            rollup.value_count,
+            rollup.value_sum,
+            rollup.value_min,
+            rollup.value_max,
+        )
+        for rollup in rollups
+    }
+    assert actual == expected
+
+
+def test_rollups_follow_every_statistics_write(client, auth_headers):
+    def call(method, url, expected, payload=None):
+        response = client.request(method, url, json=payload, headers=auth_headers)
+        assert response.status_code == expected, response.text
+        return response.json() if response.content else None
+
+    department = call("POST", "/api/departments", 201, {"name": "Rollups"})
+    other_department = call("POST", "/api/departments", 201, {"name": "Rollups other"})
+    job = call("POST", "/api/jobs", 201, {"name": "Rollups", "department_id": department["id"]})
+    other_job = call("POST", "/api/jobs", 201, {"name": "Rollups other", "department_id": other_department["id"]})
+    first = call("POST", "/api/users", 201, {"name": "First", "job_id": job["id"]})
+    second = call("POST", "/api/users", 201, {"name": "Second", "job_id": job["id"]})
+    user_ids = [first["id"], second["id"]]
+
+    # Недели 2024-01-29 и 2024-02-05 пересекают границу месяца
+    created = [
+        call("POST", "/api/statistics", 201, {"user_id": first["id"], "date": day, "value": value})
+        for day, value in (("2024-01-30", 4), ("2024-01-31", 9), ("2024-02-01", 2), ("2024-02-06", 7))
+    ]
+    call("PUT", "/api/statistics/bulk", 200, {"items": [
+        {"user_id": second["id"], "date": "2024-01-31", "value": 5},
+        {"user_id": second["id"], "date": "2024-02-02", "value": 1},
+        {"user_id": first["id"], "date": "2024-01-31", "value": 3},
+    ]})
+    _assert_rollups_match_statistics(user_ids)
+
+    # Новое значение, другая неделя и месяц, другой сотрудник
+    for statistic, user, day, value in (
+        (created[0], first, "2024-01-30", 10),
+        (created[2], first, "2024-02-13", 2),
+        (created[3], second, "2024-02-06", 6),
+    ):
+        call("PUT", f"/api/statistics/{statistic['id']}", 200, {"user_id": user["id"], "date": day, "value": value})
+    _assert_rollups_match_statistics(user_ids)
+
+    # Удаление последнего значения корзины убирает и её строку
+    call("DELETE", f"/api/statistics/{created[2]['id']}", 204)
+    call("DELETE", f"/api/statistics/{created[0]['id']}", 204)
+    _assert_rollups_match_statistics(user_ids)
+
+    # Перевод сотрудника и должности в другой отдел переносит tenant-колонки свёрток
+    call("PUT", f"/api/users/{first['id']}", 200, {"name": "First", "job_id": other_job["id"]})
+    _assert_rollups_match_statistics(user_ids)
+    call("PUT", f"/api/jobs/{job['id']}", 200, {"name": "Rollups", "department_id": other_department["id"]})
+    _assert_rollups_match_statistics(user_ids)
+
+    # Агрегат по свёрткам совпадает с агрегатом по исходной таблице (перцентиль его форсирует)
+    for period, date_from, date_to in (("week", "2024-01-29", "2024-02-25"), ("month", "2024-01-01", "2024-02-29")):
+        params = {
+            "date_from": date_from, "date_to": date_to, "group_by": [period, "department"],
+            "department_id": other_department["id"],
+        }
+        from_rollups = client.get("/api/statistics/aggregate", params=params, headers=auth_headers).json()
+        raw = client.get(
+            "/api/statistics/aggregate",
+            params={**params, "aggregates": ["count", "sum", "avg", "min", "max", "p50"]},
+            headers=auth_headers,
+        ).json()
+        assert from_rollups["source"] == f"statistic_rollups:{period}"
+        assert raw["source"] == "statistics"
+        assert raw["groups"]
+        assert from_rollups["groups"] == [
+            {key: value for key, value in group.items() if key != "p50"} for group in raw["groups"]
+        ]